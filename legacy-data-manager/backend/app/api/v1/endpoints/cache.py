@@ -1,28 +1,41 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from typing import Optional
 from ....services.scan_cache_service import ScanCacheService
+from ....services.scan_result import render_result
 from ....core.config import settings
+from ....core.responses import FastJSONResponse, not_modified
 from datetime import datetime
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 scan_cache = ScanCacheService()
 
 @router.get("/status")
 async def get_cache_status():
-    """Get the current status of the scan cache."""
+    """Get the current status of the scan cache, with hit, eviction and scan time metrics per namespace."""
     return scan_cache.get_cache_status()
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_cache_metrics():
+    """Cache metrics in the Prometheus text format, for scrapers."""
+    return PlainTextResponse(scan_cache.get_metrics_text(), media_type="text/plain; version=0.0.4")
+
 @router.get("/debug/{target_id}")
-async def debug_cache(target_id: str):
+async def debug_cache(target_id: str, request: Request):
     """Debug endpoint to check cache contents for a specific target."""
     try:
-        cache_entry = scan_cache.get_cached_result(target_id)
+        cache_entry = scan_cache.get_cached_result(target_id, allow_stale=True)
         if cache_entry:
-            return {
+            etag = scan_cache.get_etag(target_id)
+            unchanged = not_modified(request, etag)
+            if unchanged:
+                return unchanged
+            return FastJSONResponse({
                 "target_id": target_id,
                 "cached": True,
-                "data": cache_entry
-            }
+                "stale": scan_cache.is_stale(target_id),
+                "data": render_result(cache_entry)
+            }, headers={"ETag": etag} if etag else None)
         return {
             "target_id": target_id,
             "cached": False,
@@ -50,7 +63,7 @@ async def get_cached_directories():
     return {"directories": scan_cache.get_cached_directories()}
 
 @router.get("/check/{target_id}")
-async def check_cache(target_id: str):
+async def check_cache(target_id: str, request: Request):
     """Check if a specific target is currently cached and return its data."""
     try:
         cache_entry = scan_cache.get_cache_entry(target_id)
@@ -59,6 +72,11 @@ async def check_cache(target_id: str):
                 "cached": False,
                 "message": "No cache entry found"
             }
+
+        etag = scan_cache.get_etag(target_id)
+        unchanged = not_modified(request, etag)
+        if unchanged:
+            return unchanged
             
         # Calculate time until expiry
         now = datetime.utcnow()
@@ -67,12 +85,13 @@ async def check_cache(target_id: str):
         expires_at = last_scan + ttl if last_scan else None
         time_until_expiry = (expires_at - now).total_seconds() if expires_at and expires_at > now else 0
         
-        return {
+        return FastJSONResponse({
             "cached": True,
             "last_scan": last_scan.isoformat() if last_scan else None,
             "expires_at": expires_at.isoformat() if expires_at else None,
             "time_until_expiry_seconds": time_until_expiry if time_until_expiry > 0 else 0,
-            "data": cache_entry['data']
-        }
+            "stale": scan_cache.is_stale(target_id),
+            "data": render_result(cache_entry['data'])
+        }, headers={"ETag": etag} if etag else None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
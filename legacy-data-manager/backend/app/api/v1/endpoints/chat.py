@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from ....services.chat_service import ChatService
 from ....services.google_drive import GoogleDriveService
+from ....services.drive_inventory import DriveInventoryService
 import logging
 import traceback
 
@@ -11,7 +12,7 @@ router = APIRouter()
 
 # Create a single instance of GoogleDriveService
 drive_service = GoogleDriveService()
-chat_service = ChatService(drive_service)
+chat_service = ChatService(drive_service, DriveInventoryService(drive_service))
 
 class ChatMessage(BaseModel):
     message: str
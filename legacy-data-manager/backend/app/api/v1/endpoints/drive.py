@@ -2,24 +2,30 @@ from fastapi import APIRouter, HTTPException, Request, Depends, status
 from typing import Dict, List, Optional
 from ....services.google_drive import GoogleDriveService
 from ....core.config import settings
+from ....core.responses import FastJSONResponse, not_modified
 import logging
 from datetime import datetime, timezone, timedelta
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 import json
 import uuid
 import asyncio
 from ....core.auth import get_current_user
 from ....services.file_scanner_with_json import scan_files
-from ....services.scan_cache_service import ScanCacheService
-from asyncio import Lock, TimeoutError
+from ....services.scan_cache_service import ScanCacheService, view_key
+from ....services.scan_result import ScanResult, render_result
+from ....services.file_record import parse_drive_time, age_group_for
+from ....services.drive_inventory import DriveInventoryService
+from ....services.content_index import get_content_index
+from ....services.name_index import get_name_index
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 drive_service = GoogleDriveService()
 scan_cache = ScanCacheService()
+inventory = DriveInventoryService(drive_service)
 
 def determine_file_type(file: Dict) -> str:
     """
@@ -47,16 +53,7 @@ def categorize_file_by_age(file: Dict) -> str:
     Returns one of: "moreThanThreeYears", "oneToThreeYears", "lessThanOneYear"
     """
     try:
-        modified_time = datetime.fromisoformat(file['modifiedTime'].replace('Z', '+00:00'))
-        now = datetime.now(timezone.utc)
-        age = now - modified_time
-        
-        if age > timedelta(days=3*365):  # More than 3 years
-            return "moreThanThreeYears"
-        elif age > timedelta(days=365):   # Between 1-3 years
-            return "oneToThreeYears"
-        else:                             # Less than 1 year
-            return "lessThanOneYear"
+        return age_group_for(parse_drive_time(file['modifiedTime']))
     except Exception as e:
         logger.error(f"Error categorizing file age: {e}")
         return "moreThanThreeYears"  # Default to oldest category if we can't determine age
@@ -96,12 +93,60 @@ async def list_inactive_files():
     if not drive_service.is_authenticated():
         raise HTTPException(status_code=401, detail="Not authenticated. Please authenticate first.")
     try:
-        files = drive_service.get_inactive_files()
+        # Answer from the metadata inventory only when the whole drive was synced recently
+        if await inventory.is_fresh('root'):
+            files = [record.to_dict() for record in await inventory.get_inactive_files()]
+        else:
+            files = drive_service.get_inactive_files()
         return {"files": files}
     except Exception as e:
         logger.error(f"Error listing inactive files: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/inventory/sync")
+async def sync_inventory(folder_id: str = 'root'):
+    """Crawl a folder tree into the metadata inventory."""
+    if not drive_service.is_authenticated():
+        raise HTTPException(status_code=401, detail="Not authenticated. Please authenticate first.")
+    try:
+        stored = await inventory.sync(folder_id)
+        return {"folder_id": folder_id, "files": stored}
+    except Exception as e:
+        logger.error(f"Error syncing inventory: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/inventory/age-buckets")
+async def get_inventory_age_buckets(folder_id: Optional[str] = None):
+    """File counts and sizes per age group from the metadata inventory."""
+    try:
+        return {
+            "folder_id": folder_id,
+            "age_buckets": await inventory.age_buckets(folder_id),
+            # False when the buckets come from a partial or outdated sync
+            "fresh": await inventory.is_fresh(folder_id or 'root')
+        }
+    except Exception as e:
+        logger.error(f"Error reading inventory age buckets: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search")
+async def search_content(q: str, limit: int = 20):
+    """Full-text search over the names and scanned content of Drive files."""
+    try:
+        return {"query": q, "results": get_content_index().search(q, limit)}
+    except Exception as e:
+        logger.error(f"Error searching content index: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/files/search")
+async def search_file_names(q: str, limit: int = 20, fuzzy: bool = True):
+    """Substring and fuzzy file name search over every listed file."""
+    try:
+        return {"query": q, "results": get_name_index().search(q, limit, fuzzy)}
+    except Exception as e:
+        logger.error(f"Error searching file names: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/files/{file_id}")
 async def get_file_metadata(file_id: str):
     """Get metadata for a specific file."""
@@ -125,106 +170,64 @@ async def list_directory_files(folder_id: str, page_size: int = 100):
         logger.error(f"Error listing directory files: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-def initialize_response_structure():
-    return {
-        "moreThanThreeYears": {
-            "total_documents": 0,
-            "total_sensitive": 0,
-            "file_types": {
-                "documents": [],
-                "spreadsheets": [],
-                "presentations": [],
-                "pdfs": [],
-                "images": [],
-                "others": []
-            },
-            "sensitive_info": {
-                "pii": [],
-                "financial": [],
-                "legal": [],
-                "confidential": []
-            }
-        },
-        "oneToThreeYears": {
-            "total_documents": 0,
-            "total_sensitive": 0,
-            "file_types": {
-                "documents": [],
-                "spreadsheets": [],
-                "presentations": [],
-                "pdfs": [],
-                "images": [],
-                "others": []
-            },
-            "sensitive_info": {
-                "pii": [],
-                "financial": [],
-                "legal": [],
-                "confidential": []
-            }
-        },
-        "lessThanOneYear": {
-            "total_documents": 0,
-            "total_sensitive": 0,
-            "file_types": {
-                "documents": [],
-                "spreadsheets": [],
-                "presentations": [],
-                "pdfs": [],
-                "images": [],
-                "others": []
-            },
-            "sensitive_info": {
-                "pii": [],
-                "financial": [],
-                "legal": [],
-                "confidential": []
-            }
-        },
-        "scan_complete": False,
-        "processed_files": 0,
-        "total_files": 0,
-        "failed_files": []
-    }
+def analysis_response(result, summary_only: bool = False, stream: bool = False, etag: Optional[str] = None,
+                      cache_status: str = "miss"):
+    """
+    Render a scan result for the analyze endpoint: the full JSON dict by default,
+    only the counts with summary_only, or NDJSON chunks with stream.
+    Dicts are wrapped in a response here so FastAPI skips jsonable_encoder on large results.
+    X-Cache-Status tells clients whether the result is fresh ("hit"), expired and
+    being rescanned ("stale"), or was just scanned ("miss").
+    """
+    headers = {"X-Cache-Status": cache_status}
+    if etag:
+        headers["ETag"] = etag
+    if not isinstance(result, ScanResult):
+        return FastJSONResponse(render_result(result), headers=headers)
+    if stream:
+        return StreamingResponse(result.iter_ndjson(), media_type="application/x-ndjson", headers=headers)
+    if summary_only:
+        return FastJSONResponse(result.summary(), headers=headers)
+    return FastJSONResponse(render_result(result), headers=headers)
 
 @router.post("/directories/{folder_id}/analyze")
 async def analyze_directory(
     folder_id: str,
+    request: Request,
+    summary_only: bool = False,
+    stream: bool = False,
     drive_service: GoogleDriveService = Depends(get_current_user),
 ):
     try:
-        # Check cache first
-        cached_result = scan_cache.get_cached_result(folder_id)
+        async def scan():
+            # The scanner does the only listing, inside the coalesced scan, and reuses folder partials;
+            # an empty folder gives an empty result with the usual shape
+            result = await scan_files(source='gdrive', path_or_drive_id=folder_id)
+            if not result['total_files']:
+                logger.info(f"No files found in directory {folder_id}")
+            return result
+
+        # Check cache first; an expired result is still served while it is rescanned in the background
+        cached_result, cache_status = scan_cache.lookup(folder_id)
         if cached_result:
             logger.info(f"Using cached result for directory {folder_id}")
-            return cached_result
+            stale = cache_status == 'stale'
+            if stale:
+                scan_cache.revalidate(folder_id, scan)
+            # Pollers that already hold this version get an empty 304
+            etag = scan_cache.get_etag(folder_id)
+            unchanged = not_modified(request, etag)
+            if unchanged:
+                return unchanged
+            return analysis_response(cached_result, summary_only, stream, etag, "stale" if stale else "hit")
 
-        # Initialize response structure
-        response = initialize_response_structure()
-        
-        # Get files in directory
+        # Process files using the scanner; concurrent requests for this folder share one scan
         try:
-            files = await drive_service.list_directory(folder_id, recursive=True)
-        except Exception as e:
-            logger.error(f"Error listing directory: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error listing directory: {str(e)}"
-            )
-            
-        if not files:
-            return response
-        
-        # Process files using the scanner
-        try:
-            response = await scan_files(source='gdrive', path_or_drive_id=folder_id)
-            response["scan_complete"] = True
-            
-            # Cache the results
-            scan_cache.update_cache(folder_id, response)
+            # The compact result is cached; the JSON shape is only rendered for the response
+            response = await scan_cache.rescan(folder_id, scan)
             logger.info(f"Cached scan results for directory {folder_id}")
             
-            return response
+            return analysis_response(response, summary_only, stream, scan_cache.get_etag(folder_id))
         except Exception as e:
             logger.error(f"Error scanning files: {e}")
             raise HTTPException(
@@ -239,13 +242,42 @@ async def analyze_directory(
             detail=f"Error analyzing directory: {str(e)}"
         )
 
+@router.get("/directories/{folder_id}/analyze/files")
+async def get_analysis_page(
+    folder_id: str,
+    age_group: str,
+    request: Request,
+    section: str,
+    key: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100
+):
+    """Page through one file list of a cached analysis, e.g. section=file_types&key=documents."""
+    cached_result = scan_cache.get_cached_result(folder_id, allow_stale=True)
+    if not isinstance(cached_result, ScanResult):
+        raise HTTPException(status_code=404, detail=f"No analysis cached for directory {folder_id}. Analyze it first.")
+    etag = scan_cache.get_etag(folder_id)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    try:
+        page = cached_result.page(age_group, section, key, cursor, min(limit, 1000))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(page, headers={"ETag": etag} if etag else None)
+
 @router.get("/directories/{folder_id}/categorize")
 async def categorize_directory(folder_id: str, page_size: int = 100):
     """Get categorized files in a specific directory."""
     if not drive_service.is_authenticated():
         raise HTTPException(status_code=401, detail="Not authenticated. Please authenticate first.")
     try:
-        categories = drive_service.categorize_directory(folder_id, page_size)
+        if await inventory.is_fresh(folder_id):
+            categories = await inventory.categorize_directory(folder_id)
+        else:
+            categories = await scan_cache.get_or_scan(
+                view_key('categorize', folder_id), lambda: drive_service.categorize_directory(folder_id, page_size)
+            )
         return {
             "folder_id": folder_id,
             "categories": categories
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from ....services.slack_service import SlackService
 from ....services.chat_service import ChatService
 from ....services.google_drive import GoogleDriveService
+from ....services.drive_inventory import DriveInventoryService
 from ....db.database import get_db
 from fastapi.responses import JSONResponse
 import logging
@@ -19,7 +20,7 @@ router = APIRouter()
 def get_slack_service(db: Session = Depends(get_db)) -> SlackService:
     try:
         drive_service = GoogleDriveService()
-        chat_service = ChatService(drive_service=drive_service)
+        chat_service = ChatService(drive_service=drive_service, inventory=DriveInventoryService(drive_service))
         return SlackService(chat_service=chat_service, db=db)
     except Exception as e:
         logger.error(f"Error initializing Slack service: {str(e)}", exc_info=True)
@@ -1,7 +1,12 @@
+import os
+from pathlib import Path
 from pydantic_settings import BaseSettings
 from typing import Optional, List
 from functools import lru_cache
 
+# The backend directory, which holds the local SQLite files unless DATA_DIR says otherwise
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Legacy Data Manager"
     VERSION: str = "1.0.0"
@@ -29,6 +34,52 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str
     GOOGLE_REDIRECT_URI: str = "http://localhost:8000/api/v1/auth/google/callback" # Adjust if needed
     
+    # Scanner Settings
+    # Directory for the scanner's SQLite files; relative *_PATH settings below are resolved against it
+    DATA_DIR: str = str(BACKEND_DIR)
+    # Estimated Jaccard similarity at which extracted texts count as near-duplicates
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8
+    # Processes used for local filesystem scans; 1 scans in-process
+    LOCAL_SCAN_WORKERS: int = 1
+    # SQLite file holding the full-text index of scanned content
+    CONTENT_INDEX_PATH: str = "content_index.db"
+    # SQLite file holding per-file scan findings, reused while a file's version is unchanged
+    FINDINGS_STORE_PATH: str = "findings.db"
+    # Responses smaller than this many bytes are sent uncompressed
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+    # Where scan results are cached: "sqlite" (shared by workers, kept across restarts) or "memory"
+    SCAN_CACHE_BACKEND: str = "sqlite"
+    # SQLite file holding cached scan results
+    SCAN_CACHE_PATH: str = "scan_cache.db"
+    # Ceiling on the approximate size of scan results held in memory; least recently used go first
+    SCAN_CACHE_MAX_MEMORY_BYTES: int = 512 * 1024 * 1024
+    # With the memory backend, results estimated at this many bytes or more are kept compressed
+    SCAN_CACHE_COMPRESS_THRESHOLD: int = 1024 * 1024
+    # Memory for recently read compressed results kept decompressed, on top of SCAN_CACHE_MAX_MEMORY_BYTES
+    SCAN_CACHE_HOT_BYTES: int = 128 * 1024 * 1024
+    # Seconds between sweeps that free expired scan cache entries
+    SCAN_CACHE_SWEEP_INTERVAL: int = 300
+    # Seconds past the cache TTL during which an expired scan result is served while a rescan runs
+    SCAN_CACHE_STALE_GRACE: int = 24 * 60 * 60
+    # Seconds a metadata inventory sync is trusted; older inventories fall back to the Drive API until resynced
+    INVENTORY_MAX_AGE: int = 24 * 60 * 60
+    # Seconds between cache-warming runs; 0 turns warming off
+    CACHE_WARM_INTERVAL: int = 15 * 60
+    # Off-peak hours (server local time, start inclusive, end exclusive) during which folders are pre-scanned
+    CACHE_WARM_START_HOUR: int = 1
+    CACHE_WARM_END_HOUR: int = 7
+    # Folders warmed ahead of the top-level folders, e.g. '["1A2B3C"]'
+    CACHE_WARM_FOLDERS: List[str] = []
+    # Scans a warming run keeps in flight at once
+    CACHE_WARM_CONCURRENCY: int = 2
+    # Most folders scanned per warming run
+    CACHE_WARM_MAX_FOLDERS: int = 50
+    # Minimum seconds between the starts of two warming scans, to leave Drive API quota for users
+    CACHE_WARM_MIN_SPACING: float = 5.0
+    # Let warming runs resync a stale whole-drive metadata inventory; the crawl takes one folder from the
+    # run's budget and its folder listings are spaced like scans
+    CACHE_WARM_SYNC_INVENTORY: bool = False
+    
     # Hugging Face Settings
     HUGGINGFACE_API_TOKEN: str = ""
     
@@ -44,6 +95,13 @@ class Settings(BaseSettings):
         case_sensitive = True
         env_file_encoding = 'utf-8' # Specify encoding
 
+    def data_path(self, path: str) -> str:
+        """A file setting resolved under DATA_DIR; absolute paths and ':memory:' are kept as they are."""
+        if path == ':memory:' or os.path.isabs(path):
+            return path
+        os.makedirs(self.DATA_DIR, exist_ok=True)
+        return os.path.join(self.DATA_DIR, path)
+
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
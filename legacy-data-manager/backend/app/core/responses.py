@@ -0,0 +1,42 @@
+from typing import Any, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+# Optional: orjson serializes large nested dicts several times faster than the json module
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when it is installed, falling back to the json module.
+
+    FastAPI still runs jsonable_encoder over dicts returned from an endpoint, so endpoints
+    with large payloads (scan results, cache dumps) should return this response directly.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if HAS_ORJSON:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        return super().render(content)
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag, as conditional GETs use."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """A 304 response when the client already holds this ETag, otherwise None."""
+    if_none_match = request.headers.get("if-none-match")
+    if etag and if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
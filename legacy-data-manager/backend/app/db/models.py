@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Boolean
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -14,4 +14,38 @@ class SlackUser(Base):
     google_drive_refresh_token = Column(String)
     token_expires_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
+
+class DriveFile(Base):
+    """Drive file metadata inventory filled by the crawler, so listings can be answered by SQL."""
+    __tablename__ = "drive_files"
+    
+    id = Column(String, primary_key=True)
+    name = Column(String, index=True)
+    mime_type = Column(String, index=True)
+    size = Column(BigInteger, default=0)
+    modified_time = Column(String)  # Raw RFC 3339 string, returned as is
+    modified_ts = Column(BigInteger, index=True)  # Epoch seconds, used for filtering
+    created_ts = Column(BigInteger)
+    owner_email = Column(String, index=True)
+    owner_name = Column(String)
+    md5 = Column(String, index=True)
+    synced_at = Column(DateTime, default=datetime.utcnow)
+    
+    parents = relationship("DriveFileParent", cascade="all, delete-orphan", lazy="selectin")
+
+
+class DriveFileParent(Base):
+    """Parent folder links of inventory files; a Drive file may live in several folders."""
+    __tablename__ = "drive_file_parents"
+    
+    file_id = Column(String, ForeignKey("drive_files.id", ondelete="CASCADE"), primary_key=True)
+    parent_id = Column(String, primary_key=True, index=True)
+
+
+class InventorySync(Base):
+    """When each folder tree was last crawled into the inventory, so stale inventories are not trusted."""
+    __tablename__ = "inventory_syncs"
+    
+    folder_id = Column(String, primary_key=True)
+    synced_at = Column(DateTime, default=datetime.utcnow, index=True)
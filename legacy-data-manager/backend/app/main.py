@@ -2,9 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.endpoints import drive, chat, slack, auth, cache
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
 from app.db.database import engine, Base
 from app.services.google_drive import GoogleDriveService
 from app.services.chat_service import ChatService
+from app.services.scan_cache_service import ScanCacheService
+from app.services.cache_warmer import CacheWarmer
+from app.services.drive_inventory import DriveInventoryService
 import logging
 
 # Create database tables (if they don't exist)
@@ -21,6 +25,13 @@ logger = logging.getLogger(__name__)
 # Initialize services
 drive_service = GoogleDriveService()
 chat_service = ChatService(drive_service)
+cache_warmer = CacheWarmer(
+    drive_service, ScanCacheService(), settings.CACHE_WARM_INTERVAL,
+    settings.CACHE_WARM_START_HOUR, settings.CACHE_WARM_END_HOUR, settings.CACHE_WARM_FOLDERS,
+    concurrency=settings.CACHE_WARM_CONCURRENCY, max_folders=settings.CACHE_WARM_MAX_FOLDERS,
+    min_spacing=settings.CACHE_WARM_MIN_SPACING,
+    inventory=DriveInventoryService(drive_service) if settings.CACHE_WARM_SYNC_INVENTORY else None
+)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -49,6 +60,28 @@ app.add_middleware(
     max_age=3600,
 )
 
+# Compress large JSON responses (scan results, cache dumps) with brotli or gzip
+app.add_middleware(CompressionMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE)
+
+@app.on_event("startup")
+async def start_cache_sweeper():
+    """Free expired scan results in the background instead of waiting for them to be read."""
+    ScanCacheService().start_sweeper(settings.SCAN_CACHE_SWEEP_INTERVAL)
+
+@app.on_event("shutdown")
+async def stop_cache_sweeper():
+    ScanCacheService().stop_sweeper()
+
+@app.on_event("startup")
+async def start_cache_warmer():
+    """Pre-scan hot and top-level folders off-peak so the first dashboard visit finds them cached."""
+    if settings.CACHE_WARM_INTERVAL > 0:
+        cache_warmer.start()
+
+@app.on_event("shutdown")
+async def stop_cache_warmer():
+    cache_warmer.stop()
+
 # Include routers
 app.include_router(drive.router, prefix=settings.API_V1_STR + "/drive", tags=["drive"])
 app.include_router(chat.router, prefix=settings.API_V1_STR + "/chat", tags=["chat"])
@@ -0,0 +1,128 @@
+import bisect
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+# Upper bounds in seconds of the scan duration histogram buckets; scans range from a small folder to a whole drive
+SCAN_DURATION_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# Ways a lookup can be answered
+lookup_results = ('hit', 'stale', 'miss')
+# Why entries leave the cache: pushed out by the memory ceiling, or past their TTL and grace period.
+# 'unload' is not a removal: a disk-backed entry's in-memory copy was dropped and is read back on the next hit
+eviction_reasons = ('lru', 'expired', 'unload')
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum, as in the Prometheus histogram type."""
+
+    def __init__(self, buckets=SCAN_DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket and a last one for observations above every bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """Observations at or below each bound, ending with the total (the +Inf bucket)."""
+        totals, running = [], 0
+        for count in self.counts:
+            running += count
+            totals.append(running)
+        return totals
+
+class CacheMetrics:
+    """
+    Counters for the scan cache, kept per namespace: 'scan' for raw scan results,
+    a view name ('summary', 'risks', ...) for derived views, 'folder_partials' for
+    per-folder partials. Rendered as a dict for /cache/status and in the Prometheus
+    text format for scrapers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lookups: Dict[str, Counter] = defaultdict(Counter)
+        self.evictions: Dict[str, Counter] = defaultdict(Counter)
+        self.scan_seconds: Dict[str, Histogram] = defaultdict(Histogram)
+
+    def record_lookup(self, namespace: str, result: str) -> None:
+        with self._lock:
+            self.lookups[namespace][result] += 1
+
+    def record_eviction(self, namespace: str, reason: str, count: int = 1) -> None:
+        if count:
+            with self._lock:
+                self.evictions[namespace][reason] += count
+
+    def observe_scan(self, namespace: str, seconds: float) -> None:
+        """Record how long a scan run after a miss (or to refresh a stale entry) took."""
+        with self._lock:
+            self.scan_seconds[namespace].observe(seconds)
+
+    def _namespaces(self, bytes_held: Dict[str, int]) -> List[str]:
+        return sorted(set(self.lookups) | set(self.evictions) | set(self.scan_seconds) | set(bytes_held))
+
+    def snapshot(self, bytes_held: Dict[str, int]) -> Dict[str, Dict]:
+        """Per-namespace counters, with bytes_held (namespace -> bytes of cached entries) alongside."""
+        snapshot = {}
+        with self._lock:
+            for namespace in self._namespaces(bytes_held):
+                lookups = self.lookups[namespace]
+                total = sum(lookups[result] for result in lookup_results)
+                histogram = self.scan_seconds[namespace]
+                snapshot[namespace] = {
+                    'hits': lookups['hit'],
+                    'stale': lookups['stale'],
+                    'misses': lookups['miss'],
+                    # Stale serves answer without waiting for a scan, so they count towards the hit ratio
+                    'hit_ratio': round((lookups['hit'] + lookups['stale']) / total, 4) if total else None,
+                    'evictions': {reason: self.evictions[namespace][reason] for reason in eviction_reasons},
+                    'bytes': bytes_held.get(namespace, 0),
+                    'scan_seconds': {
+                        'count': histogram.count,
+                        'sum': round(histogram.sum, 3),
+                        'buckets': dict(zip([str(bound) for bound in histogram.buckets] + ['+Inf'], histogram.cumulative()))
+                    }
+                }
+        return snapshot
+
+    def to_prometheus(self, bytes_held: Dict[str, int]) -> str:
+        """The counters in the Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            "# HELP scan_cache_lookups_total Scan cache lookups by namespace and result.",
+            "# TYPE scan_cache_lookups_total counter",
+        ]
+        with self._lock:
+            namespaces = self._namespaces(bytes_held)
+            for namespace in namespaces:
+                for result in lookup_results:
+                    lines.append(f'scan_cache_lookups_total{{namespace="{namespace}",result="{result}"}} {self.lookups[namespace][result]}')
+            lines += [
+                "# HELP scan_cache_evictions_total Entries removed from the scan cache by namespace and reason; reason=\"unload\" only dropped an in-memory copy.",
+                "# TYPE scan_cache_evictions_total counter",
+            ]
+            for namespace in namespaces:
+                for reason in eviction_reasons:
+                    lines.append(f'scan_cache_evictions_total{{namespace="{namespace}",reason="{reason}"}} {self.evictions[namespace][reason]}')
+            lines += [
+                "# HELP scan_cache_bytes Approximate size of the entries held in the scan cache.",
+                "# TYPE scan_cache_bytes gauge",
+            ]
+            for namespace in namespaces:
+                lines.append(f'scan_cache_bytes{{namespace="{namespace}"}} {bytes_held.get(namespace, 0)}')
+            lines += [
+                "# HELP scan_cache_scan_duration_seconds Time taken by scans run on a cache miss or refresh.",
+                "# TYPE scan_cache_scan_duration_seconds histogram",
+            ]
+            for namespace in namespaces:
+                histogram = self.scan_seconds[namespace]
+                bounds = [str(bound) for bound in histogram.buckets] + ['+Inf']
+                for bound, count in zip(bounds, histogram.cumulative()):
+                    lines.append(f'scan_cache_scan_duration_seconds_bucket{{namespace="{namespace}",le="{bound}"}} {count}')
+                lines.append(f'scan_cache_scan_duration_seconds_sum{{namespace="{namespace}"}} {histogram.sum}')
+                lines.append(f'scan_cache_scan_duration_seconds_count{{namespace="{namespace}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
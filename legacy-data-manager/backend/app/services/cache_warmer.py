@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+from .scan_cache_service import ScanCacheService
+from .file_scanner_with_json import scan_files
+
+logger = logging.getLogger(__name__)
+
+class CacheWarmer:
+    """
+    Pre-scans folders during off-peak hours so interactive requests find a cached result.
+
+    Each run warms the configured hot folders and then the top-level folders from
+    list_directories(), skipping folders whose cached result will still be fresh at
+    the next run. Runs are budgeted: at most max_folders scans per run, at most
+    concurrency at once, and scan starts spaced at least min_spacing seconds apart.
+    Warming scans go through the cache's single-flight, so a user asking for a folder
+    that is being warmed waits for that scan instead of starting another.
+    With an inventory, a run also resyncs the whole-drive metadata inventory once it
+    is older than the inventory's max_age. The sync counts as one of the run's
+    max_folders and each folder it lists is spaced like a scan start.
+    """
+
+    def __init__(self, drive_service, scan_cache: ScanCacheService, interval: float,
+                 start_hour: int, end_hour: int, hot_folders: Optional[List[str]] = None,
+                 concurrency: int = 2, max_folders: int = 50, min_spacing: float = 5.0,
+                 now: Callable[[], datetime] = datetime.now, inventory=None):
+        self.drive_service = drive_service
+        self.inventory = inventory
+        self.scan_cache = scan_cache
+        self.interval = interval
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.hot_folders = list(hot_folders or [])
+        self.concurrency = concurrency
+        self.max_folders = max_folders
+        self.min_spacing = min_spacing
+        self.now = now
+        self.warmed = 0
+        self._next_start = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def in_window(self) -> bool:
+        """Whether the current hour is off-peak; a window may wrap past midnight (e.g. 22 to 5)."""
+        hour = self.now().hour
+        if self.start_hour <= self.end_hour:
+            return self.start_hour <= hour < self.end_hour
+        return hour >= self.start_hour or hour < self.end_hour
+
+    def needs_warming(self, folder_id: str) -> bool:
+        """A folder needs a scan unless its cached result is still within the TTL at the next run."""
+        cache_entry = self.scan_cache.get_cache_entry(folder_id)
+        if not cache_entry or not cache_entry['last_scan']:
+            return True
+        age = (datetime.utcnow() - cache_entry['last_scan']).total_seconds()
+        return age + self.interval > self.scan_cache.cache_ttl.total_seconds()
+
+    async def candidates(self) -> List[str]:
+        """Hot folders first, then top-level folders, without repeats."""
+        folder_ids = list(self.hot_folders)
+        try:
+            folder_ids.extend(folder['id'] for folder in await self.drive_service.list_directories())
+        except Exception as e:
+            logger.error(f"Error listing directories to warm: {str(e)}")
+        return list(dict.fromkeys(folder_ids))
+
+    async def _pace(self) -> None:
+        """Wait until min_spacing has passed since the previous scan started."""
+        while True:
+            wait = self._next_start - time.monotonic()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        self._next_start = time.monotonic() + self.min_spacing
+
+    async def _warm(self, folder_id: str, slots: asyncio.Semaphore) -> bool:
+        async with slots:
+            await self._pace()
+            try:
+                await self.scan_cache.rescan(folder_id, lambda: scan_files(source='gdrive', path_or_drive_id=folder_id))
+                return True
+            except Exception as e:
+                logger.error(f"Error warming cache for {folder_id}: {str(e)}")
+                return False
+
+    async def warm_once(self) -> int:
+        """Scan the folders that need warming, within the run's budget, and return how many were warmed."""
+        if not await self.drive_service.is_authenticated():
+            logger.info("Skipping cache warming: Google Drive is not authenticated")
+            return 0
+        budget = self.max_folders
+        if budget > 0 and self.inventory is not None and not await self.inventory.is_fresh('root'):
+            budget -= 1
+            try:
+                await self.inventory.sync('root', pace=self._pace)
+            except Exception as e:
+                logger.error(f"Error refreshing the metadata inventory: {str(e)}")
+        folder_ids = [folder_id for folder_id in await self.candidates() if self.needs_warming(folder_id)]
+        skipped = max(0, len(folder_ids) - budget)
+        folder_ids = folder_ids[:budget]
+        slots = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._warm(folder_id, slots) for folder_id in folder_ids))
+        warmed = sum(results)
+        self.warmed += warmed
+        logger.info(f"Warmed the scan cache for {warmed} folders"
+                    + (f", {skipped} left for the next run" if skipped else ""))
+        return warmed
+
+    async def _run(self) -> None:
+        while True:
+            if self.in_window():
+                try:
+                    await self.warm_once()
+                except Exception as e:
+                    logger.error(f"Error warming scan cache: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Run warming every interval seconds on the event loop. Calling it again while it runs does nothing."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
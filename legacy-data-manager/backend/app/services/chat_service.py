@@ -1,15 +1,22 @@
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 from .google_drive import GoogleDriveService
-from .scan_cache_service import ScanCacheService
+from .scan_cache_service import ScanCacheService, view_key
 from .file_scanner_with_json import scan_files
+from .file_record import FileRecord, SECONDS_PER_DAY
+from .scan_result import ScanAggregates, age_groups
+from .drive_inventory import DriveInventoryService
+from .content_index import get_content_index
+from .name_index import get_name_index
 import logging
-from datetime import datetime, timedelta
+import time
 
 logger = logging.getLogger(__name__)
 
 class ChatService:
-    def __init__(self, drive_service: GoogleDriveService):
+    def __init__(self, drive_service: GoogleDriveService, inventory: Optional[DriveInventoryService] = None):
         self.drive_service = drive_service
+        # Synced metadata inventory; commands fall back to the Drive API without it
+        self.inventory = inventory
         self.scan_cache = ScanCacheService()
         self.commands = {
             "help": self._handle_help,
@@ -120,7 +127,10 @@ Try any of these commands!"""
             }
         
         try:
-            files = self.drive_service.get_inactive_files()
+            if self.inventory and await self.inventory.is_fresh('root'):
+                files = [record.to_dict() for record in await self.inventory.get_inactive_files()]
+            else:
+                files = self.drive_service.get_inactive_files()
             if not files:
                 return {
                     "type": "text",
@@ -157,21 +167,40 @@ Try any of these commands!"""
             }
         
         try:
-            files = self.drive_service.list_files(page_size=10)
-            matching_files = [
-                file for file in files 
-                if query.lower() in file['name'].lower()
-            ]
+            # Files whose scanned content matches come first, with a snippet of the match
+            content_matches = get_content_index().search(query)
             
-            if not matching_files:
+            # Ranked substring and fuzzy name matches, once a fresh root sync has filled the
+            # name index; a partly filled index would silently miss files
+            name_index = get_name_index()
+            if self.inventory and await self.inventory.is_fresh('root'):
+                if name_index.covers_drive:
+                    matching_files = name_index.search(query)
+                else:
+                    matching_files = [record.to_dict() for record in await self.inventory.find(query)]
+            else:
+                files = self.drive_service.list_files(page_size=10)
+                matching_files = [
+                    file for file in files 
+                    if query.lower() in file['name'].lower()
+                ]
+            content_ids = {match['id'] for match in content_matches}
+            matching_files = [file for file in matching_files if file['id'] not in content_ids]
+            
+            if not matching_files and not content_matches:
                 return {
                     "type": "text",
                     "content": f"No files found matching '{query}'"
                 }
             
-            response = f"Found {len(matching_files)} matching files:\n"
+            response = f"Found {len(content_matches) + len(matching_files)} matching files:\n"
+            for match in content_matches:
+                response += f"- {match['name']}: {match['snippet']}\n"
             for file in matching_files:
-                response += f"- {file['name']} (Last modified: {file['modifiedTime']})\n"
+                if file.get('modifiedTime'):
+                    response += f"- {file['name']} (Last modified: {file['modifiedTime']})\n"
+                else:
+                    response += f"- {file['name']}\n"
             
             return {
                 "type": "text",
@@ -238,7 +267,13 @@ Try any of these commands!"""
             }
             
         try:
-            categories = self.drive_service.categorize_directory(folder_id)
+            if self.inventory and await self.inventory.is_fresh(folder_id):
+                categories = await self.inventory.categorize_directory(folder_id)
+            else:
+                # Categories come from the listing rather than a scan and are cached as their own view
+                categories = await self.scan_cache.get_or_scan(
+                    view_key('categorize', folder_id), lambda: self.drive_service.categorize_directory(folder_id)
+                )
             summary = categories.get('summary', {})
             
             if not summary or summary.get('total_files', 0) == 0:
@@ -300,31 +335,30 @@ Try any of these commands!"""
         try:
             logger.info("Fetching files from Google Drive")
             # Get all files
-            files = await self.drive_service.list_files(page_size=1000)
-            logger.info(f"Retrieved {len(files)} files from Google Drive")
+            files_response = await self.drive_service.list_files(page_size=1000)
+            records = [FileRecord.from_drive(f) for f in files_response.get('files', [])]
+            logger.info(f"Retrieved {len(records)} files from Google Drive")
             
             # Calculate statistics
-            total_files = len(files)
+            total_files = len(records)
             sensitive_files = 0
             old_files = 0
             total_size = 0
             
-            # Calculate cutoff date for old files (3 years)
-            cutoff_date = datetime.utcnow() - timedelta(days=3*365)
+            # Calculate cutoff for old files (3 years), in epoch seconds
+            cutoff_ts = time.time() - 3 * 365 * SECONDS_PER_DAY
             
             logger.info("Processing files for statistics")
-            for file in files:
+            for record in records:
                 # Calculate total size
-                if 'size' in file:
-                    total_size += int(file.get('size', 0))
+                total_size += record.size
                 
                 # Check for old files
-                modified_time = datetime.fromisoformat(file['modifiedTime'].rstrip('Z'))
-                if modified_time < cutoff_date:
+                if record.modified_ts < cutoff_ts:
                     old_files += 1
                 
                 # Check for sensitive files (placeholder - implement actual detection)
-                if any(keyword in file['name'].lower() for keyword in ['password', 'secret', 'confidential']):
+                if any(keyword in record.name.lower() for keyword in ['password', 'secret', 'confidential']):
                     sensitive_files += 1
             
             # Calculate storage usage percentage (placeholder - implement actual calculation)
@@ -345,131 +379,78 @@ Try any of these commands!"""
     async def analyze_directory(self, directory: str) -> Dict:
         """Analyze a directory for file types and sensitive information."""
         try:
-            # Check cache first
-            cached_result = self.scan_cache.get_cached_result(directory)
-            if cached_result:
-                logger.info(f"Using cached result for directory {directory}")
-                return cached_result
-
-            # Get files in directory
-            files = await self.drive_service.list_directory(directory, recursive=True)
-            
-            # Process files using the scanner
-            results = await scan_files(source='gdrive', path_or_drive_id=directory)
-            
-            # Cache the results
-            self.scan_cache.update_cache(directory, results)
-            logger.info(f"Cached scan results for directory {directory}")
-            
-            return results
+            # Use the cache, or scan once however many callers ask at the same time
+            return await self.scan_cache.get_or_scan(
+                directory, lambda: scan_files(source='gdrive', path_or_drive_id=directory)
+            )
         except Exception as e:
             logger.error(f"Error analyzing directory: {str(e)}", exc_info=True)
             raise
 
-    def _calculate_storage_percentage(self, files: List[Dict]) -> float:
+    def _calculate_storage_percentage(self, total_size: int) -> float:
         """Calculate storage usage percentage."""
-        total_size = sum(int(f.get('size', 0)) for f in files)
         # Assuming 15GB free tier limit for Google Drive
         storage_limit = 15 * 1024 * 1024 * 1024  
         return min(round((total_size / storage_limit) * 100, 2), 100)
 
-    def _is_old_file(self, file: Dict) -> bool:
-        """Check if a file is older than 3 years."""
-        modified_time = datetime.fromisoformat(file['modifiedTime'].rstrip('Z'))
-        return (datetime.utcnow() - modified_time).days > 1095  # 3 years in days
-
-    def _summarize_file_types(self, results: Dict) -> Dict:
+    def _summarize_file_types(self, aggregates: ScanAggregates) -> Dict:
         """Summarize file types across all age categories."""
-        summary = {}
-        for file_type in results['moreThanThreeYears']['file_types'].keys():
-            total = (len(results['moreThanThreeYears']['file_types'][file_type]) +
-                    len(results['oneToThreeYears']['file_types'][file_type]) +
-                    len(results['lessThanOneYear']['file_types'][file_type]))
-            if total > 0:
-                summary[file_type] = total
-        return summary
+        return {file_type: count for file_type, count in aggregates.by_type.items() if count > 0}
 
     async def get_summary_stats(self, directory: str = None) -> Dict:
         """Get summary statistics for a directory or entire drive."""
         try:
-            # Check cache first
+            # Derived from the cached scan of the target, so a summary never triggers a second scan
             target_id = directory if directory else 'drive'
-            cached_result = self.scan_cache.get_cached_result(target_id)
-            if cached_result:
-                logger.info(f"Using cached result for {target_id}")
-                return cached_result
-
-            # Get files either from specific directory or entire drive
-            if directory:
-                files = await self.drive_service.list_directory(directory, recursive=True)
-            else:
-                # For entire drive, use list_files
-                files_response = await self.drive_service.list_files(page_size=1000)
-                files = files_response.get('files', [])
-
-            logger.info(f"Retrieved {len(files)} files for analysis")
-
-            # Process files using the scanner
-            results = await scan_files(source='gdrive', path_or_drive_id=directory if directory else 'drive')
-            
-            # Create a summary of the results
-            summary = {
-                'total_files': results['total_files'],
-                'sensitive_files': results['total_sensitive_files'],
-                'storage_used_percentage': self._calculate_storage_percentage(files),
-                'old_files': len([f for f in files if self._is_old_file(f)]),
-                'file_types': self._summarize_file_types(results),
-                'age_distribution': {
-                    'moreThanThreeYears': results['moreThanThreeYears']['total_documents'],
-                    'oneToThreeYears': results['oneToThreeYears']['total_documents'],
-                    'lessThanOneYear': results['lessThanOneYear']['total_documents']
-                },
-                'sensitive_info': {
-                    'pii': len(results['moreThanThreeYears']['sensitive_info']['pii'] +
-                              results['oneToThreeYears']['sensitive_info']['pii'] +
-                              results['lessThanOneYear']['sensitive_info']['pii']),
-                    'financial': len(results['moreThanThreeYears']['sensitive_info']['financial'] +
-                                   results['oneToThreeYears']['sensitive_info']['financial'] +
-                                   results['lessThanOneYear']['sensitive_info']['financial']),
-                    'legal': len(results['moreThanThreeYears']['sensitive_info']['legal'] +
-                               results['oneToThreeYears']['sensitive_info']['legal'] +
-                               results['lessThanOneYear']['sensitive_info']['legal']),
-                    'confidential': len(results['moreThanThreeYears']['sensitive_info']['confidential'] +
-                                      results['oneToThreeYears']['sensitive_info']['confidential'] +
-                                      results['lessThanOneYear']['sensitive_info']['confidential'])
-                }
-            }
-
-            # Cache the results
-            self.scan_cache.update_cache(target_id, summary)
-            logger.info(f"Cached summary stats for {target_id}")
-            
-            return summary
-
+            return await self.scan_cache.get_view(
+                'summary', target_id, lambda: scan_files(source='gdrive', path_or_drive_id=target_id),
+                self._summarize_scan
+            )
         except Exception as e:
             logger.error(f"Error getting summary stats: {str(e)}", exc_info=True)
             raise
 
+    def _summarize_scan(self, results) -> Dict:
+        """Create a summary from the counters the scanner kept while it ran."""
+        aggregates = results.aggregates
+        return {
+            'total_files': results['total_files'],
+            'sensitive_files': results['total_sensitive_files'],
+            'storage_used_percentage': self._calculate_storage_percentage(aggregates.total_size),
+            'old_files': aggregates.by_age['moreThanThreeYears'],
+            'file_types': self._summarize_file_types(aggregates),
+            'age_distribution': {age_group: aggregates.by_age[age_group] for age_group in age_groups},
+            'sensitive_info': {
+                category: aggregates.by_sensitivity[category]
+                for category in ('pii', 'financial', 'legal', 'confidential')
+            }
+        }
+
     async def analyze_risks(self, directory: str) -> Dict:
         """Analyze risks in a directory."""
         try:
-            # Check cache first
-            cached_result = self.scan_cache.get_cached_result(directory)
-            if cached_result:
-                logger.info(f"Using cached result for directory {directory}")
-                return cached_result
-
-            # Get files in directory
-            files = await self.drive_service.list_directory(directory, recursive=True)
-            
-            # Process files for risk analysis
-            results = await scan_files(source='gdrive', path_or_drive_id=directory)
-            
-            # Cache the results
-            self.scan_cache.update_cache(directory, results)
-            logger.info(f"Cached risk analysis for directory {directory}")
-            
-            return results
+            # Derived from the same cached scan as analyze_directory
+            return await self.scan_cache.get_view(
+                'risks', directory, lambda: scan_files(source='gdrive', path_or_drive_id=directory),
+                self._assess_risks
+            )
         except Exception as e:
             logger.error(f"Error analyzing risks: {str(e)}", exc_info=True)
-            raise 
\ No newline at end of file
+            raise
+
+    def _assess_risks(self, results) -> Dict:
+        """Rate sensitive files by age: the longer sensitive data sits untouched, the higher the risk."""
+        aggregates = results.aggregates
+        top_concerns = [
+            f"{count} files with {category} information"
+            for category, count in aggregates.by_sensitivity.most_common() if count > 0
+        ]
+        if results.total_duplicates:
+            top_concerns.append(f"{results.total_duplicates} duplicate files")
+        return {
+            'sensitive_files': results.total_sensitive_files,
+            'high_risk': results.buckets['moreThanThreeYears'].total_sensitive,
+            'medium_risk': results.buckets['oneToThreeYears'].total_sensitive,
+            'low_risk': results.buckets['lessThanOneYear'].total_sensitive,
+            'top_concerns': top_concerns
+        }
@@ -0,0 +1,123 @@
+import sqlite3
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_TOKENS = 12
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every term.
+    Terms are quoted so punctuation such as 'report.pdf' is not parsed as query syntax;
+    a trailing '*' is kept as a prefix search.
+    """
+    terms = []
+    for term in text.split():
+        prefix = term.endswith('*')
+        term = term.rstrip('*').replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+class ContentIndex:
+    """
+    Full-text index of text extracted during scans, stored in an SQLite FTS5 table.
+
+    Each file is keyed by its id and a version string (the Drive modifiedTime);
+    re-indexing an unchanged version is a no-op, a new version replaces the old text.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS indexed_files (
+                rowid INTEGER PRIMARY KEY,
+                file_id TEXT NOT NULL UNIQUE,
+                version TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(
+                name, content, tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+
+    def is_current(self, file_id: str, version: Optional[str]) -> bool:
+        """Whether the indexed text of a file is already at this version."""
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM indexed_files WHERE file_id = ?", (file_id,)).fetchone()
+        return row is not None and row[0] == version
+
+    def add(self, file_id: str, name: str, content: str, version: Optional[str] = None) -> bool:
+        """
+        Index the text of a file, replacing an older version.
+        Returns False when this version was already indexed. Call commit() to persist.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT rowid, version FROM indexed_files WHERE file_id = ?", (file_id,)).fetchone()
+            if row is not None:
+                if row[1] == version:
+                    return False
+                self._conn.execute("DELETE FROM content_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute("UPDATE indexed_files SET version = ? WHERE rowid = ?", (version, row[0]))
+                rowid = row[0]
+            else:
+                rowid = self._conn.execute(
+                    "INSERT INTO indexed_files (file_id, version) VALUES (?, ?)", (file_id, version)
+                ).lastrowid
+            self._conn.execute("INSERT INTO content_fts (rowid, name, content) VALUES (?, ?, ?)", (rowid, name, content))
+        return True
+
+    def remove(self, file_id: str) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT rowid FROM indexed_files WHERE file_id = ?", (file_id,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM content_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute("DELETE FROM indexed_files WHERE rowid = ?", (row[0],))
+
+    def commit(self) -> None:
+        with self._lock:
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM indexed_files").fetchone()[0]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Files whose name or content match every term of the query, best match first.
+        Name matches weigh twice as much as content matches; each hit has a content snippet.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT f.file_id, c.name,
+                       snippet(content_fts, 1, '[', ']', '...', {SNIPPET_TOKENS}),
+                       bm25(content_fts, 2.0, 1.0) AS score
+                FROM content_fts c JOIN indexed_files f ON f.rowid = c.rowid
+                WHERE content_fts MATCH ?
+                ORDER BY score
+                LIMIT ?
+                """,
+                (match, limit)
+            ).fetchall()
+        return [
+            {"id": file_id, "name": name, "snippet": snippet, "score": -score}
+            for file_id, name, snippet, score in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+@lru_cache()
+def get_content_index() -> ContentIndex:
+    """The application's content index, opened on first use."""
+    return ContentIndex(settings.data_path(settings.CONTENT_INDEX_PATH))
@@ -0,0 +1,241 @@
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+from ..db.database import SessionLocal
+from ..core.config import settings
+from ..db.models import DriveFile, DriveFileParent, InventorySync
+from .file_record import FileRecord, SECONDS_PER_DAY
+from .google_drive import GoogleDriveService
+from .name_index import get_name_index
+from .scan_result import age_groups
+
+logger = logging.getLogger(__name__)
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+# Rows per statement when writing the inventory; keeps IN lists under SQLite's variable limit
+SYNC_BATCH_SIZE = 500
+
+def _chunks(items: List, size: int = SYNC_BATCH_SIZE) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class DriveInventoryService:
+    """
+    Indexed copy of Drive file metadata in the application database.
+
+    sync() crawls a folder tree once and stores every file and folder; inactive
+    files, name search, folder listings, categorization and age buckets are then
+    answered by SQL queries instead of paged Drive API calls. Callers check
+    is_fresh() first: only folders under a tree synced within max_age are answered
+    from the inventory, anything else goes to the Drive API. Database work runs in
+    a worker thread, like the Drive client calls, so it never blocks the event loop.
+    """
+
+    def __init__(self, drive_service: GoogleDriveService, session_factory: Callable[[], Session] = SessionLocal,
+                 max_age: Optional[timedelta] = None):
+        self.drive_service = drive_service
+        self.session_factory = session_factory
+        self.max_age = max_age if max_age is not None else timedelta(seconds=settings.INVENTORY_MAX_AGE)
+
+    # Crawling
+
+    async def sync(self, folder_id: str = 'root', page_size: int = 1000,
+                   pace: Optional[Callable[[], Awaitable[None]]] = None) -> int:
+        """
+        Crawl a folder tree and replace its inventory rows. Returns the number of entries stored.
+        pace(), if given, is awaited before each folder is listed, so background syncs can ration API calls.
+        """
+        logger.info(f"Syncing metadata inventory for folder {folder_id}")
+        # file id -> (record, parent ids)
+        crawled: Dict[str, tuple] = {}
+        pending = [folder_id]
+        while pending:
+            current = pending.pop()
+            if pace is not None:
+                await pace()
+            for record in await self.drive_service.list_file_records(current, page_size):
+                # Keep the id the folder was listed under too, so aliases such as 'root' resolve
+                parents = set(record.parents) | {current}
+                if record.id in crawled:
+                    crawled[record.id][1].update(parents)
+                    continue
+                crawled[record.id] = (record, parents)
+                if record.is_folder:
+                    pending.append(record.id)
+
+        await asyncio.to_thread(self._store, folder_id, crawled)
+        if folder_id == 'root':
+            # A root crawl saw every file, so the name index can now answer whole-drive searches
+            name_index = get_name_index()
+            name_index.add_records(record for record, _ in crawled.values())
+            name_index.mark_covers_drive()
+        logger.info(f"Stored {len(crawled)} inventory entries for folder {folder_id}")
+        return len(crawled)
+
+    def _store(self, folder_id: str, crawled: Dict[str, tuple]) -> None:
+        """Replace the rows under folder_id with the crawled entries and mark the tree synced."""
+        with self.session_factory() as db:
+            stale_ids = set(db.scalars(select(self._subtree(folder_id).c.file_id)).all())
+            for ids in _chunks(list(stale_ids | crawled.keys())):
+                db.execute(delete(DriveFileParent).where(DriveFileParent.file_id.in_(ids)))
+                db.execute(delete(DriveFile).where(DriveFile.id.in_(ids)))
+            for batch in _chunks(list(crawled.values())):
+                db.execute(insert(DriveFile), [self._row(record) for record, _ in batch])
+                db.execute(insert(DriveFileParent), [
+                    {'file_id': record.id, 'parent_id': parent_id}
+                    for record, parents in batch for parent_id in parents
+                ])
+            db.merge(InventorySync(folder_id=folder_id, synced_at=datetime.utcnow()))
+            db.commit()
+
+    @staticmethod
+    def _row(record: FileRecord) -> Dict:
+        return {
+            'id': record.id,
+            'name': record.name,
+            'mime_type': record.mime_type,
+            'size': record.size,
+            'modified_time': record.modified_time,
+            'modified_ts': record.modified_ts,
+            'created_ts': record.created_ts,
+            'owner_email': record.owner_email,
+            'owner_name': record.owner_name,
+            'md5': record.md5
+        }
+
+    @staticmethod
+    def _record(row: DriveFile) -> FileRecord:
+        return FileRecord(
+            id=row.id,
+            name=row.name,
+            mime_type=row.mime_type,
+            modified_time=row.modified_time,
+            modified_ts=row.modified_ts,
+            created_ts=row.created_ts,
+            size=row.size or 0,
+            owner_email=row.owner_email or '',
+            owner_name=row.owner_name or 'Unknown',
+            md5=row.md5,
+            parents=tuple(parent.parent_id for parent in row.parents)
+        )
+
+    @staticmethod
+    def _subtree(folder_id: str):
+        """Recursive CTE with the ids of every entry below a folder."""
+        tree = (
+            select(DriveFileParent.file_id)
+            .where(DriveFileParent.parent_id == folder_id)
+            .cte(name='subtree', recursive=True)
+        )
+        return tree.union(
+            select(DriveFileParent.file_id).join(tree, DriveFileParent.parent_id == tree.c.file_id)
+        )
+
+    # Queries
+
+    async def covers(self, folder_id: str) -> bool:
+        """Whether a folder's contents have been synced into the inventory."""
+        return await asyncio.to_thread(self._covers, folder_id)
+
+    def _covers(self, folder_id: str) -> bool:
+        with self.session_factory() as db:
+            return db.scalar(
+                select(DriveFileParent.file_id).where(DriveFileParent.parent_id == folder_id).limit(1)
+            ) is not None
+
+    async def is_fresh(self, folder_id: str = 'root') -> bool:
+        """
+        Whether a folder can be answered from the inventory: it, or a folder above it,
+        was synced within max_age. Whole-drive queries ask about 'root'.
+        """
+        return await asyncio.to_thread(self._is_fresh, folder_id)
+
+    def _is_fresh(self, folder_id: str) -> bool:
+        cutoff = datetime.utcnow() - self.max_age
+        with self.session_factory() as db:
+            synced = db.scalars(select(InventorySync.folder_id).where(InventorySync.synced_at >= cutoff)).all()
+            if folder_id in synced:
+                return True
+            # A folder lies under a synced tree when its children were crawled as part of that tree
+            for synced_id in synced:
+                subtree = self._subtree(synced_id)
+                covered = db.scalar(
+                    select(DriveFileParent.file_id)
+                    .where(DriveFileParent.parent_id == folder_id, DriveFileParent.file_id.in_(select(subtree.c.file_id)))
+                    .limit(1)
+                )
+                if covered is not None:
+                    return True
+        return False
+
+    def _rows(self, statement) -> List[FileRecord]:
+        with self.session_factory() as db:
+            return [self._record(row) for row in db.scalars(statement).all()]
+
+    async def _query(self, statement) -> List[FileRecord]:
+        return await asyncio.to_thread(self._rows, statement)
+
+    async def list_directory(self, folder_id: str, recursive: bool = False) -> List[FileRecord]:
+        """Files in a folder; recursive listings return files only, like the live listing."""
+        if recursive:
+            statement = select(DriveFile).where(
+                DriveFile.id.in_(select(self._subtree(folder_id).c.file_id)),
+                DriveFile.mime_type != FOLDER_MIME_TYPE
+            )
+        else:
+            statement = select(DriveFile).join(DriveFileParent).where(DriveFileParent.parent_id == folder_id)
+        return await self._query(statement.order_by(DriveFile.name))
+
+    async def get_inactive_files(self, months_threshold: int = 12) -> List[FileRecord]:
+        """Files not modified in the given number of months, most recently modified first."""
+        cutoff_ts = time.time() - months_threshold * 30 * SECONDS_PER_DAY
+        return await self._query(
+            select(DriveFile)
+            .where(DriveFile.modified_ts < cutoff_ts, DriveFile.mime_type != FOLDER_MIME_TYPE)
+            .order_by(DriveFile.modified_ts.desc())
+        )
+
+    async def find(self, query: str, limit: int = 50) -> List[FileRecord]:
+        """Files whose name contains the query, case-insensitively, most recently modified first."""
+        return await self._query(
+            select(DriveFile)
+            .where(DriveFile.name.icontains(query, autoescape=True))
+            .order_by(DriveFile.modified_ts.desc())
+            .limit(limit)
+        )
+
+    async def categorize_directory(self, folder_id: str) -> Dict:
+        """Categorize a folder from the inventory; same shape as GoogleDriveService.categorize_directory."""
+        return self.drive_service.categorize_records(folder_id, await self.list_directory(folder_id))
+
+    async def age_buckets(self, folder_id: Optional[str] = None, now_ts: Optional[float] = None) -> Dict[str, Dict[str, int]]:
+        """
+        File count and total size per age group, computed with one GROUP BY.
+        Boundaries match age_group_for: at most 365 whole days, at most 1095, older.
+        """
+        now_ts = int(time.time() if now_ts is None else now_ts)
+        age_group = case(
+            (DriveFile.modified_ts > now_ts - 366 * SECONDS_PER_DAY, 'lessThanOneYear'),
+            (DriveFile.modified_ts > now_ts - 1096 * SECONDS_PER_DAY, 'oneToThreeYears'),
+            else_='moreThanThreeYears'
+        ).label('age_group')
+        statement = (
+            select(age_group, func.count(), func.coalesce(func.sum(DriveFile.size), 0))
+            .where(DriveFile.mime_type != FOLDER_MIME_TYPE)
+            .group_by(age_group)
+        )
+        if folder_id:
+            statement = statement.where(DriveFile.id.in_(select(self._subtree(folder_id).c.file_id)))
+
+        return await asyncio.to_thread(self._buckets, statement)
+
+    def _buckets(self, statement) -> Dict[str, Dict[str, int]]:
+        buckets = {name: {'count': 0, 'size': 0} for name in age_groups}
+        with self.session_factory() as db:
+            for name, count, size in db.execute(statement):
+                buckets[name] = {'count': count, 'size': int(size)}
+        return buckets
@@ -0,0 +1,82 @@
+import os
+import hashlib
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+from .file_record import FileRecord
+
+logger = logging.getLogger(__name__)
+
+# Bytes hashed in the second stage; only files that still collide get a full hash
+HEAD_SIZE = 4096
+CHUNK_SIZE = 1024 * 1024
+
+def find_drive_duplicates(records: List[FileRecord]) -> Dict[str, List[FileRecord]]:
+    """
+    Group Drive files by the md5Checksum reported in the listing.
+    Google Workspace files have no checksum and are never reported as duplicates.
+    Each group is ordered oldest first, so the first entry is treated as the original.
+    """
+    groups = defaultdict(list)
+    for record in records:
+        if record.md5:
+            groups[record.md5].append(record)
+
+    return {
+        checksum: sorted(group, key=lambda r: r.modified_ts)
+        for checksum, group in groups.items()
+        if len(group) > 1
+    }
+
+def _hash_file(path: str, limit: int = None) -> str:
+    """MD5 of a file (or of its first `limit` bytes), read in chunks."""
+    digest = hashlib.md5()
+    remaining = limit
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+def _group_by(paths: Iterable[str], key_func) -> Dict[str, List[str]]:
+    """Group paths by key_func, dropping unreadable files and singleton groups."""
+    groups = defaultdict(list)
+    for path in paths:
+        try:
+            groups[key_func(path)].append(path)
+        except OSError as e:
+            logger.error(f"Error hashing file {path}: {str(e)}")
+    return {key: group for key, group in groups.items() if len(group) > 1}
+
+def find_local_duplicates(entries: Iterable[Tuple[str, int]]) -> Dict[str, List[str]]:
+    """
+    Find byte-identical local files from (path, size) pairs in three stages:
+    group by size, then hash the first 4 KB of each size collision, then do a
+    full streaming hash only for files whose heads still collide.
+    Returns {md5: [paths]} for every group with more than one file.
+    """
+    by_size = defaultdict(list)
+    for path, size in entries:
+        # Empty files are trivially identical and not worth reporting
+        if size > 0:
+            by_size[size].append(path)
+
+    duplicates = defaultdict(list)
+    for size, paths in by_size.items():
+        if len(paths) < 2:
+            continue
+        for head_hash, head_group in _group_by(paths, lambda p: _hash_file(p, HEAD_SIZE)).items():
+            if size <= HEAD_SIZE:
+                # The head hash already covered the whole file
+                duplicates[head_hash].extend(head_group)
+                continue
+            for checksum, group in _group_by(head_group, _hash_file).items():
+                duplicates[checksum].extend(group)
+
+    logger.info(f"Found {len(duplicates)} groups of duplicate local files")
+    return dict(duplicates)
@@ -0,0 +1,96 @@
+import time
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+import numpy as np
+from .file_record import SECONDS_PER_DAY
+
+# Age group of each age code; bucket i holds files at most age_limits_days[i] days old
+age_groups_by_code = ("lessThanOneYear", "oneToThreeYears", "moreThanThreeYears")
+age_limits_days = np.array([365, 1095], dtype=np.int64)
+
+# Type code of a MIME type that does not decide the file type; the file name does
+UNRESOLVED = 255
+
+class BatchClassification(NamedTuple):
+    """Per-file codes plus counts and byte totals as (age code, type code) matrices."""
+    age_codes: np.ndarray
+    type_codes: np.ndarray
+    counts: np.ndarray
+    sizes: np.ndarray
+
+def age_codes(modified_ts: np.ndarray, now_ts: Optional[float] = None) -> np.ndarray:
+    """
+    Age codes (indexes into age_groups_by_code) for an array of modification times
+    in epoch seconds. Matches age_group_for: whole days, with inclusive limits.
+    """
+    now_ts = time.time() if now_ts is None else now_ts
+    age_days = (now_ts - np.asarray(modified_ts)).astype(np.int64) // SECONDS_PER_DAY
+    return np.searchsorted(age_limits_days, age_days, side='left').astype(np.uint8)
+
+def name_extension(name: str) -> Optional[str]:
+    """Lowercase extension of a Drive file name, as the scanner derives it."""
+    return name.split('.')[-1].lower() if '.' in name else None
+
+class FileClassifier:
+    """
+    Maps extensions and MIME types to file type categories.
+
+    Extensions are looked up in a precomputed extension -> type code dict.
+    MIME types are interned into small integer codes as they are seen, each with
+    a precomputed type code, so a whole listing is classified with one array lookup.
+    """
+
+    def __init__(self, type_map: Dict[str, List[str]], mime_map: Dict[str, str]):
+        self.type_names = tuple(type_map) + ("others",)
+        self.others_code = len(type_map)
+        self.extension_codes = {ext: code for code, extensions in enumerate(type_map.values()) for ext in extensions}
+        self.mime_map = mime_map
+        self.mime_codes: Dict[str, int] = {}
+        self._mime_type_codes = array('B')
+
+    def extension_type_code(self, ext: Optional[str]) -> int:
+        return self.extension_codes.get(ext, self.others_code)
+
+    def file_type(self, ext: Optional[str]) -> str:
+        """File type category of an extension, "others" when it is unknown."""
+        return self.type_names[self.extension_type_code(ext)]
+
+    def mime_code(self, mime_type: str) -> int:
+        """The code of a MIME type, assigning one the first time it is seen."""
+        code = self.mime_codes.get(mime_type)
+        if code is None:
+            code = len(self._mime_type_codes)
+            ext = self.mime_map.get(mime_type)
+            self._mime_type_codes.append(self.extension_type_code(ext) if ext else UNRESOLVED)
+            self.mime_codes[mime_type] = code
+        return code
+
+    def encode_mime_types(self, mime_types: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.mime_code(m) for m in mime_types), dtype=np.int32)
+
+    def type_codes(self, mime_codes: np.ndarray, names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Type codes for an array of MIME codes. Files whose MIME type is not mapped
+        fall back to the extension of their name, or "others" without names.
+        """
+        lookup = np.frombuffer(self._mime_type_codes, dtype=np.uint8)
+        codes = lookup[mime_codes] if len(lookup) else np.zeros(len(mime_codes), dtype=np.uint8)
+        unresolved = np.flatnonzero(codes == UNRESOLVED)
+        if len(unresolved):
+            if names is None:
+                codes[unresolved] = self.others_code
+            else:
+                codes[unresolved] = [self.extension_type_code(name_extension(names[i])) for i in unresolved]
+        return codes
+
+    def classify(self, modified_ts: np.ndarray, sizes: np.ndarray, mime_codes: np.ndarray,
+                 now_ts: Optional[float] = None, names: Optional[Sequence[str]] = None) -> BatchClassification:
+        """Bucket a whole inventory by age and type in one call."""
+        ages = age_codes(modified_ts, now_ts)
+        types = self.type_codes(mime_codes, names)
+        num_types = len(self.type_names)
+        cells = ages.astype(np.int64) * num_types + types
+        shape = (len(age_groups_by_code), num_types)
+        counts = np.bincount(cells, minlength=shape[0] * num_types).reshape(shape)
+        size_totals = np.bincount(cells, weights=sizes, minlength=shape[0] * num_types).reshape(shape)
+        return BatchClassification(ages, types, counts, size_totals.astype(np.int64))
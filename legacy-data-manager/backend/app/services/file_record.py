@@ -0,0 +1,96 @@
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+SECONDS_PER_DAY = 86400
+
+def parse_drive_time(value: Optional[str]) -> Optional[int]:
+    """Parse a Drive RFC 3339 timestamp ('2024-01-31T10:00:00.000Z') into epoch seconds."""
+    if not value:
+        return None
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+
+def age_group_for(modified_ts: float, now_ts: Optional[float] = None) -> str:
+    """
+    Age bucket of a file from its modification time in epoch seconds.
+    Returns one of: "lessThanOneYear", "oneToThreeYears", "moreThanThreeYears"
+    """
+    now_ts = time.time() if now_ts is None else now_ts
+    age_days = int(now_ts - modified_ts) // SECONDS_PER_DAY
+    if age_days <= 365:
+        return "lessThanOneYear"
+    elif age_days <= 1095:
+        return "oneToThreeYears"
+    else:
+        return "moreThanThreeYears"
+
+class FileRecord:
+    """
+    Drive file metadata parsed once at listing time.
+    Timestamps are epoch seconds, size is an int and the owner is flattened,
+    so loops over files never re-parse the raw API strings.
+    """
+    __slots__ = ('id', 'name', 'mime_type', 'modified_time', 'modified_ts', 'created_ts',
+                 'size', 'owner_email', 'owner_name', 'md5', 'parents')
+
+    def __init__(self, id: str, name: str, mime_type: str, modified_time: str, modified_ts: int,
+                 created_ts: Optional[int] = None, size: int = 0, owner_email: str = '',
+                 owner_name: str = 'Unknown', md5: Optional[str] = None, parents: Tuple[str, ...] = ()):
+        self.id = id
+        self.name = name
+        self.mime_type = mime_type
+        # The raw string is kept for responses; comparisons use modified_ts
+        self.modified_time = modified_time
+        self.modified_ts = modified_ts
+        self.created_ts = created_ts
+        self.size = size
+        self.owner_email = owner_email
+        self.owner_name = owner_name
+        self.md5 = md5
+        self.parents = parents
+
+    @classmethod
+    def from_drive(cls, file: Dict[str, Any]) -> 'FileRecord':
+        """Build a record from a Drive API files resource."""
+        owner = (file.get('owners') or [{}])[0]
+        return cls(
+            id=file['id'],
+            name=file.get('name', ''),
+            # Only a few dozen distinct MIME types exist, so share one string per type
+            mime_type=sys.intern(file.get('mimeType', '')),
+            modified_time=file.get('modifiedTime', ''),
+            modified_ts=parse_drive_time(file.get('modifiedTime')) or 0,
+            created_ts=parse_drive_time(file.get('createdTime')),
+            size=int(file.get('size', 0)),
+            owner_email=owner.get('emailAddress', '').lower(),
+            owner_name=owner.get('displayName', 'Unknown'),
+            md5=file.get('md5Checksum'),
+            parents=tuple(file.get('parents', ()))
+        )
+
+    @property
+    def is_folder(self) -> bool:
+        return self.mime_type == 'application/vnd.google-apps.folder'
+
+    def age_group(self, now_ts: Optional[float] = None) -> str:
+        return age_group_for(self.modified_ts, now_ts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Render the record back into Drive API field names for JSON responses."""
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'mimeType': self.mime_type,
+            'modifiedTime': self.modified_time,
+            'size': str(self.size),
+            'owners': [{'emailAddress': self.owner_email, 'displayName': self.owner_name}]
+        }
+        if self.md5:
+            data['md5Checksum'] = self.md5
+        if self.parents:
+            data['parents'] = list(self.parents)
+        return data
+
+    def __repr__(self) -> str:
+        return f"FileRecord(id={self.id!r}, name={self.name!r}, mime_type={self.mime_type!r})"
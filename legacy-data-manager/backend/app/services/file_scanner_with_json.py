@@ -1,9 +1,13 @@
 import os
 import io
 import re
+import mmap
 import json
 import hashlib
-from datetime import datetime
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from PIL import Image
 import pytesseract
 from docx import Document
@@ -11,6 +15,17 @@ from pptx import Presentation
 from openpyxl import load_workbook
 from pdfminer.high_level import extract_text_to_fp
 from .google_drive import GoogleDriveService
+from .duplicate_detector import find_drive_duplicates, find_local_duplicates
+from .near_duplicate_index import NearDuplicateIndex
+from .local_walker import walk_local_files
+from .scan_result import ScanResult, age_groups
+from .file_record import age_group_for
+from .file_classifier import FileClassifier, age_groups_by_code
+from .content_index import get_content_index
+from .findings_store import FindingsStore, get_findings_store
+from .folder_partials import FolderPartial, FolderPartialCache
+from .scan_cache_service import ScanCacheService
+from ..core.config import settings
 import asyncio
 import logging
 
@@ -111,6 +126,9 @@ mime_type_map = {
     'text/x-swift': 'swift'
 }
 
+# Extension -> category dict and MIME type codes for batch classification
+file_classifier = FileClassifier(file_type_map, mime_type_map)
+
 sensitive_keywords = {
     "pii": [
         "dob", "email", "phone", "address", "ssn", "personal", "pii", 
@@ -159,28 +177,48 @@ patterns = {
     "address_like": r"(?:Address|Location|Street)(?:[^0-9])*\d{1,5}\s[\w\s.]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Circle|Cir|Court|Ct|Way|Place|Pl|Square|Sq)\b"
 }
 
-now = datetime.now()
+# Fingerprint of the rules findings come from; findings stored under other rules are rescanned
+scan_rules_version = hashlib.sha1(json.dumps([sensitive_keywords, patterns], sort_keys=True).encode()).hexdigest()[:16]
+
+# Drive file types whose content is downloaded and scanned
+content_scanned_types = {'documents', 'spreadsheets', 'presentations', 'pdfs'}
 
-def classify_by_age(modified_time):
-    age_days = (now - modified_time).days
-    if age_days <= 365:
-        return "lessThanOneYear"
-    elif age_days <= 1095:
-        return "oneToThreeYears"
-    else:
-        return "moreThanThreeYears"
+# Plain-text extensions that are scanned as raw bytes over an mmap instead of being decoded
+bytes_scan_extensions = {'txt', 'md', 'csv', 'log'}
 
-def initialize_structure():
-    """Initialize the structure for file categorization."""
+def _compile_byte_keyword_pattern():
+    """
+    Compile all sensitive keywords into one case-insensitive byte pattern.
+    Longer keywords come first so a phrase wins over a keyword it starts with.
+    """
+    keywords = {k.lower() for kws in sensitive_keywords.values() for k in kws}
+    alternation = b'|'.join(re.escape(k.encode()) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(rb'\b(?:' + alternation + rb')\b', re.IGNORECASE)
+
+def _nested_keywords():
+    """Map each keyword to the other keywords it contains as whole words (e.g. 'trade secret' -> 'secret')."""
+    keywords = {k.lower() for kws in sensitive_keywords.values() for k in kws}
     return {
-        "total_documents": 0,
-        "total_sensitive": 0,
-        "total_duplicates": 0,
-        "file_types": {k: [] for k in file_type_map.keys() | {"others"}},
-        "sensitive_info": {k: [] for k in sensitive_keywords.keys()},
-        "duplicate_files": []
+        k: {other for other in keywords if other != k and re.search(r'\b' + re.escape(other) + r'\b', k)}
+        for k in keywords
     }
 
+# Extensions extract_text_from_file (or the bytes scanner) can get text from; other files are never opened
+extractable_extensions = {'docx', 'pptx', 'xlsx', 'xls', 'pdf', 'jpg', 'jpeg', 'png', 'webp', 'txt'} | bytes_scan_extensions
+
+byte_keyword_pattern = _compile_byte_keyword_pattern()
+nested_keywords = _nested_keywords()
+byte_patterns = {label: re.compile(pattern.encode()) for label, pattern in patterns.items()}
+
+# Local files handed to a worker process at a time in multi-core mode
+LOCAL_SCAN_BATCH_SIZE = 64
+# Batches queued per worker process; the walk pauses once this many are in flight
+LOCAL_SCAN_BATCHES_PER_WORKER = 2
+
+def initialize_results():
+    """Initialize an empty compact scan result with every file type and sensitivity category."""
+    return ScanResult(file_type_map.keys() | {"others"}, sensitive_keywords.keys())
+
 def scan_text(text):
     """
     Scan text for sensitive information using keywords and patterns.
@@ -204,6 +242,45 @@ def scan_text(text):
     # Only return categories that have findings
     return {k: v for k, v in findings.items() if v}
 
+def scan_bytes(buffer):
+    """
+    Bytes-mode counterpart of scan_text.
+    Works on any buffer (bytes, mmap) without decoding or lowercasing a copy of it,
+    and returns findings in the same shape as scan_text.
+    """
+    all_keywords = len(nested_keywords)
+    found = set()
+    for match in byte_keyword_pattern.finditer(buffer):
+        keyword = match.group().lower().decode()
+        found.add(keyword)
+        found.update(nested_keywords[keyword])
+        if len(found) == all_keywords:
+            break
+
+    findings = {cat: [] for cat in sensitive_keywords}
+    for cat, keywords in sensitive_keywords.items():
+        findings[cat].extend(k for k in keywords if k.lower() in found)
+
+    for label, pattern in byte_patterns.items():
+        if pattern.search(buffer):
+            findings["pii"].append(label)
+
+    return {k: v for k, v in findings.items() if v}
+
+def scan_file_bytes(filepath, near_duplicates=None):
+    """
+    Scan a local plain-text file through a read-only mmap.
+    If a NearDuplicateIndex is given, the file is also indexed from the same mapping.
+    Returns None for empty files (mirroring the empty-content skip in scan_files).
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if near_duplicates is not None:
+                near_duplicates.add(filepath, buffer)
+            return scan_bytes(buffer)
+
 def extract_text_from_file(stream, file_type):
     try:
         if file_type == 'docx':
@@ -228,53 +305,202 @@ def extract_text_from_file(stream, file_type):
         return ""
     return ""
 
-async def scan_files(source='local', path_or_drive_id='.', output_json='scan_report.json'):
-    results = {
-        "moreThanThreeYears": initialize_structure(),
-        "oneToThreeYears": initialize_structure(),
-        "lessThanOneYear": initialize_structure(),
-        "scan_complete": False,
-        "processed_files": 0,
-        "total_files": 0,
-        "total_duplicates": 0,
-        "total_sensitive_files": 0,
-        "failed_files": [],
-        "content_hashes": {}
+def scan_local_file(entry, age_group, results, near_duplicates):
+    """Extract and scan one local file into `results`. Files without any text are skipped."""
+    filepath, ext = entry.path, entry.ext
+    try:
+        file_type = file_classifier.file_type(ext)
+        if ext in bytes_scan_extensions:
+            # Plain text is scanned straight off an mmap: no decode, no lowercased copy
+            findings = scan_file_bytes(filepath, near_duplicates)
+            if findings is None:
+                return
+        else:
+            with open(filepath, 'rb') as f:
+                content = extract_text_from_file(f, ext)
+            if not content:
+                return
+            near_duplicates.add(filepath, content)
+            findings = scan_text(content)
+        row = results.add_file(age_group, file_type, filepath, size=entry.size)
+        results.add_findings(age_group, row, findings)
+        results.processed_files += 1
+    except Exception as e:
+        logger.error(f"Error processing file {filepath}: {str(e)}")
+        results.failed_files.append(filepath)
+
+def scan_local_batch(batch, near_duplicate_threshold):
+    """
+    Worker-process entry point for multi-core local scans.
+    Scans (entry, age_group) pairs into a fresh partial result and returns it
+    together with the MinHash signatures of the extracted texts.
+    """
+    results = initialize_results()
+    near_duplicates = NearDuplicateIndex(threshold=near_duplicate_threshold)
+    for entry, age_group in batch:
+        scan_local_file(entry, age_group, results, near_duplicates)
+    return results, list(near_duplicates.items())
+
+async def scan_drive_folder(drive_service, folder_id, near_duplicates, content_index, findings_store: FindingsStore):
+    """
+    List one Drive folder and scan the text-based files directly in it.
+    Files whose version was scanned before reuse the stored findings instead of being downloaded.
+    Subfolders are only recorded; their contents belong to their own partials.
+    """
+    partial = FolderPartial(folder_id)
+    entries = await drive_service.list_file_records(folder_id)
+    records = [record for record in entries if not record.is_folder]
+    partial.subfolders = [record.id for record in entries if record.is_folder]
+
+    type_codes = file_classifier.type_codes(
+        file_classifier.encode_mime_types(r.mime_type for r in records), names=[r.name for r in records]
+    )
+    file_types = [file_classifier.type_names[code] for code in type_codes]
+    # The checksum only changes with the content; Google Workspace files have none and use modifiedTime
+    versions = {
+        record.id: record.md5 or record.modified_time
+        for record, file_type in zip(records, file_types) if file_type in content_scanned_types
     }
+    rules = f"{scan_rules_version}:{near_duplicates.num_perm}:{near_duplicates.shingle_size}"
+    stored = findings_store.lookup(versions, rules)
+
+    for record, file_type in zip(records, file_types):
+        name = record.name
+        try:
+            # Log file type categorization
+            logger.info(f"Processing file: {name} (mime_type: {record.mime_type})")
+
+            # Only scan content for text-based files
+            if file_type in content_scanned_types:
+                previous = stored.get(record.id)
+                if previous is not None:
+                    found, signature = previous.findings, previous.signature
+                else:
+                    found, signature = {}, None
+                    try:
+                        content = await drive_service.get_file_content(record.id)
+                        if content:
+                            signature = near_duplicates.signature(content)
+                            found = {category: keywords for category, keywords in scan_text(content).items() if keywords}
+                            # Unchanged versions are skipped by the index
+                            content_index.add(record.id, name, content, version=record.modified_time)
+                            findings_store.put(record.id, versions[record.id], rules, found, signature)
+                        # Failed downloads also come back empty; they are not stored so the next scan retries them
+                    except Exception as e:
+                        logger.error(f"Error processing file content {name}: {str(e)}")
+                if signature is not None:
+                    partial.signatures[record.id] = signature
+                if found:
+                    partial.findings[record.id] = found
+            partial.records.append(record)
+        except Exception as e:
+            logger.error(f"Error processing file {name}: {str(e)}")
+            partial.failed_files.append(name)
+
+    # Commit per folder so an interrupted scan keeps what it already downloaded
+    findings_store.commit()
+    logger.info(f"Reused stored findings for {len(stored)} of {len(versions)} scanned files in folder {folder_id}")
+    return partial
+
+async def collect_folder_partials(drive_service, folder_id, folder_partials: FolderPartialCache, near_duplicates,
+                                  content_index, findings_store: FindingsStore):
+    """
+    Partial results for a folder and every folder below it, in listing order.
+    Folders with a partial from a recent scan (of this folder or of one inside it)
+    are not listed or downloaded again; the rest are scanned and cached.
+    """
+    partials, pending, seen = [], [folder_id], set()
+    reused = 0
+    while pending:
+        current = pending.pop()
+        # Drive folders can have several parents, so a folder may be reached twice
+        if current in seen:
+            continue
+        seen.add(current)
+        partial = folder_partials.get(current)
+        if partial is None:
+            partial = await scan_drive_folder(drive_service, current, near_duplicates, content_index, findings_store)
+            folder_partials.put(partial)
+        else:
+            reused += 1
+        partials.append(partial)
+        pending.extend(reversed(partial.subfolders))
+    logger.info(f"Collected {len(partials)} folders under {folder_id}, {reused} from earlier scans")
+    return partials
+
+async def scan_files(source='local', path_or_drive_id='.', output_json='scan_report.json', near_duplicate_threshold=None, workers=None):
+    """
+    Scan local files or a Google Drive folder for file types, sensitive content and duplicates.
+    Returns a compact ScanResult that reads like the scan dict; call to_dict() to render it.
+    For local scans, `workers` > 1 spreads extraction and scanning over that many processes
+    (defaults to the LOCAL_SCAN_WORKERS setting).
+    """
+    results = initialize_results()
+    # Every file in a scan is bucketed against the same moment
+    now_ts = time.time()
+    near_duplicates = NearDuplicateIndex(threshold=near_duplicate_threshold or settings.NEAR_DUPLICATE_THRESHOLD)
 
     # Add logging for file type mapping
     logger.info(f"Using file type mapping: {file_type_map}")
-    type_counts = {k: 0 for k in file_type_map.keys() | {"others"}}
 
     if source == 'local':
-        all_files = []
-        for root, _, files in os.walk(path_or_drive_id):
-            for f in files:
-                all_files.append(os.path.join(root, f))
-        results["total_files"] = len(all_files)
-
-        for filepath in all_files:
-            try:
-                ext = filepath.split('.')[-1].lower()
-                modified_time = datetime.fromtimestamp(os.path.getmtime(filepath))
-                age_group = classify_by_age(modified_time)
-                file_type = next((k for k, v in file_type_map.items() if ext in v), "others")
-                with open(filepath, 'rb') as f:
-                    content = extract_text_from_file(f, ext)
-                if not content:
+        # path -> (age_group, size, mtime), kept for duplicate detection
+        local_files = {}
+        workers = settings.LOCAL_SCAN_WORKERS if workers is None else workers
+        # Spawned workers start clean instead of forking the server's threads and open connections
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+        ) if workers > 1 else None
+        loop = asyncio.get_running_loop()
+        in_flight, batch = set(), []
+
+        async def drain(limit):
+            # Merge batches as they finish until at most `limit` are in flight,
+            # so neither queued work nor finished results pile up in memory
+            nonlocal in_flight
+            while len(in_flight) > limit:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    partial, signatures = future.result()
+                    results.merge(partial)
+                    for key, signature in signatures:
+                        near_duplicates.add_signature(key, signature)
+
+        async def submit(batch):
+            await drain(workers * LOCAL_SCAN_BATCHES_PER_WORKER - 1)
+            in_flight.add(loop.run_in_executor(pool, scan_local_batch, batch, near_duplicates.threshold))
+
+        try:
+            # Entries stream in from the walker with their stat already taken
+            for entry in walk_local_files(path_or_drive_id):
+                results.total_files += 1
+                age_group = age_group_for(entry.mtime, now_ts)
+                local_files[entry.path] = (age_group, entry.size, entry.mtime)
+                if entry.ext not in extractable_extensions:
                     continue
-                results[age_group]["total_documents"] += 1
-                results[age_group]["file_types"][file_type].append(filepath)
-                findings = scan_text(content)
-                if findings:
-                    results[age_group]["total_sensitive"] += 1
-                    results["total_sensitive_files"] += 1
-                    for k, v in findings.items():
-                        results[age_group]["sensitive_info"][k].extend(v)
-                results["processed_files"] += 1
-            except Exception as e:
-                logger.error(f"Error processing file {filepath}: {str(e)}")
-                results["failed_files"].append(filepath)
+
+                if pool is None:
+                    scan_local_file(entry, age_group, results, near_duplicates)
+                    continue
+                batch.append((entry, age_group))
+                if len(batch) == LOCAL_SCAN_BATCH_SIZE:
+                    await submit(batch)
+                    batch = []
+
+            if batch:
+                await submit(batch)
+            await drain(0)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        duplicates = find_local_duplicates((path, info[1]) for path, info in local_files.items())
+        for content_hash, paths in duplicates.items():
+            results.add_duplicates(content_hash, [
+                (local_files[path][0], path)
+                for path in sorted(paths, key=lambda p: local_files[p][2])
+            ])
+        results.near_duplicates = near_duplicates.clusters()
 
     elif source == 'gdrive' and HAS_GOOGLE_API:
         drive_service = GoogleDriveService()
@@ -282,88 +508,67 @@ async def scan_files(source='local', path_or_drive_id='.', output_json='scan_rep
             raise ValueError("Not authenticated with Google Drive")
 
         try:
-            files = await drive_service.list_directory(path_or_drive_id, recursive=True)
-            results["total_files"] = len(files)
-            logger.info(f"*** Total files found: {len(files)}")
+            content_index = get_content_index()
+            # Only folders without a recent partial result are listed and scanned again
+            partials = await collect_folder_partials(
+                drive_service, path_or_drive_id, ScanCacheService().folder_partials, near_duplicates,
+                content_index, get_findings_store()
+            )
+            content_index.commit()
+            # The result is only as fresh as the oldest folder it reuses
+            results.scanned_at = min(partial.scanned_at for partial in partials)
+
+            # A file with several parents is listed in each of them but counted once
+            records, findings, signatures, seen = [], {}, {}, set()
+            for partial in partials:
+                for record in partial.records:
+                    if record.id not in seen:
+                        seen.add(record.id)
+                        records.append(record)
+                findings.update(partial.findings)
+                signatures.update(partial.signatures)
+                results.failed_files.extend(partial.failed_files)
+            results.total_files = len(records) + len(results.failed_files)
+            logger.info(f"*** Total files found: {results.total_files}")
             
-            # Track unique sensitive files
-            sensitive_file_ids = set()
-
-            for file in files:
-                try:
-                    file_id = file['id']
-                    name = file['name']
-                    mime_type = file['mimeType']
-                    
-                    # Log file type categorization
-                    logger.info(f"Processing file: {name} (mime_type: {mime_type})")
-                    
-                    # Get file extension from mime type or name
-                    ext = mime_type_map.get(mime_type, None)
-                    if not ext and '.' in name:
-                        ext = name.split('.')[-1].lower()
-                    
-                    if not ext:
-                        ext = 'others'
-
-                    modified_time = datetime.fromisoformat(file['modifiedTime'].rstrip("Z"))
-                    age_group = classify_by_age(modified_time)
-
-                    # Determine file type category
-                    file_type = 'others'
-                    for category, extensions in file_type_map.items():
-                        if ext in extensions:
-                            file_type = category
-                            break
-                    
-                    # Update type counts
-                    type_counts[file_type] += 1
-                    
-                    # Add file to appropriate category
-                    results[age_group]["total_documents"] += 1
-                    results[age_group]["file_types"][file_type].append({
-                        "id": file_id,
-                        "name": name,
-                        "mimeType": mime_type,
-                        "modifiedTime": file['modifiedTime']
-                    })
-
-                    # Only scan content for text-based files
-                    if file_type in ['documents', 'spreadsheets', 'presentations', 'pdfs']:
-                        try:
-                            content = await drive_service.get_file_content(file_id)
-                            if content:
-                                findings = scan_text(content)
-                                if findings:  # If any sensitive content was found
-                                    if file_id not in sensitive_file_ids:  # Only count each file once
-                                        results[age_group]["total_sensitive"] += 1
-                                        sensitive_file_ids.add(file_id)
-                                        results["total_sensitive_files"] += 1
-                                    
-                                    for k, v in findings.items():
-                                        if v:  # Only add if there are findings
-                                            results[age_group]["sensitive_info"][k].append({
-                                                "file": {
-                                                    "id": file_id,
-                                                    "name": name,
-                                                    "mimeType": mime_type,
-                                                    "modifiedTime": file['modifiedTime']
-                                                },
-                                                "confidence": 0.8,
-                                                "explanation": f"Found {', '.join(v)}",
-                                                "categories": v
-                                            })
-                        except Exception as e:
-                            logger.error(f"Error processing file content {name}: {str(e)}")
-                    
-                    results["processed_files"] += 1
-                except Exception as e:
-                    logger.error(f"Error processing file {name}: {str(e)}")
-                    results["failed_files"].append(name)
-
-            logger.info(f"Completed processing {results['processed_files']} files")
-            logger.info(f"Found {len(sensitive_file_ids)} sensitive files")
-            results["scan_complete"] = True
+            # file_id -> age group, kept for duplicate detection
+            file_age_groups = {}
+
+            # Bucket the whole listing by age and type in one vectorized pass:
+            # the file type comes from the MIME type, or the name extension when it is not mapped
+            classification = file_classifier.classify(
+                np.fromiter((r.modified_ts for r in records), dtype=np.int64, count=len(records)),
+                np.fromiter((r.size for r in records), dtype=np.int64, count=len(records)),
+                file_classifier.encode_mime_types(r.mime_type for r in records),
+                now_ts,
+                names=[r.name for r in records]
+            )
+
+            for index, record in enumerate(records):
+                age_group = age_groups_by_code[classification.age_codes[index]]
+                file_type = file_classifier.type_names[classification.type_codes[index]]
+                file_age_groups[record.id] = age_group
+
+                # Add file to appropriate category; the result keeps running aggregates
+                row = results.add_file(age_group, file_type, record.id, record.name, record.mime_type,
+                                       record.modified_time, size=record.size)
+                # Each file is counted as sensitive only once
+                results.add_findings(age_group, row, findings.get(record.id))
+                signature = signatures.get(record.id)
+                if signature is not None:
+                    near_duplicates.add_signature(record.id, signature)
+                results.processed_files += 1
+
+            # Exact duplicates come straight from the listing checksums, nothing is downloaded
+            duplicates = find_drive_duplicates(records)
+            for checksum, group in duplicates.items():
+                results.add_duplicates(checksum, [(file_age_groups[r.id], r.id) for r in group])
+            logger.info(f"Found {results.total_duplicates} duplicate files")
+            results.near_duplicates = near_duplicates.clusters()
+
+            logger.info(f"Completed processing {results.processed_files} files")
+            logger.info(f"Found {results.total_sensitive_files} sensitive files")
+            results.scan_complete = True
             
         except Exception as e:
             logger.error(f"Error scanning files: {str(e)}")
@@ -0,0 +1,95 @@
+import json
+import sqlite3
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps the number of bound parameters per statement
+LOOKUP_CHUNK_SIZE = 500
+
+class StoredFindings:
+    """What scanning one version of a file found: its sensitive findings and near-duplicate signature."""
+    __slots__ = ('findings', 'signature')
+
+    def __init__(self, findings: Dict[str, List[str]], signature: Optional[np.ndarray]):
+        self.findings = findings
+        self.signature = signature
+
+class FindingsStore:
+    """
+    Scan findings per file, stored in SQLite and keyed by the file's version
+    (its md5Checksum when Drive reports one, otherwise its modifiedTime).
+
+    Rescans look up a whole folder's files at once and only download the files
+    whose version, or the scan rules, changed since they were stored.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_findings (
+                file_id TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                rules TEXT NOT NULL,
+                findings TEXT NOT NULL,
+                signature BLOB
+            )
+        """)
+        self._conn.commit()
+
+    def lookup(self, versions: Dict[str, str], rules: str) -> Dict[str, StoredFindings]:
+        """Stored findings for the files in `versions` (file id -> version) whose version and rules still match."""
+        found = {}
+        file_ids = list(versions)
+        with self._lock:
+            for start in range(0, len(file_ids), LOOKUP_CHUNK_SIZE):
+                chunk = file_ids[start:start + LOOKUP_CHUNK_SIZE]
+                rows = self._conn.execute(
+                    f"SELECT file_id, version, rules, findings, signature FROM file_findings "
+                    f"WHERE file_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for file_id, version, stored_rules, findings, signature in rows:
+                    if version == versions[file_id] and stored_rules == rules:
+                        found[file_id] = StoredFindings(
+                            json.loads(findings),
+                            np.frombuffer(signature, dtype=np.uint32) if signature is not None else None
+                        )
+        return found
+
+    def put(self, file_id: str, version: str, rules: str, findings: Dict[str, List[str]],
+            signature: Optional[np.ndarray]) -> None:
+        """Store the findings for a file version, replacing older ones. Call commit() to persist."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_findings (file_id, version, rules, findings, signature) VALUES (?, ?, ?, ?, ?)",
+                (file_id, version, rules, json.dumps(findings), signature.tobytes() if signature is not None else None)
+            )
+
+    def remove(self, file_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM file_findings WHERE file_id = ?", ((file_id,) for file_id in file_ids))
+
+    def commit(self) -> None:
+        with self._lock:
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM file_findings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+@lru_cache()
+def get_findings_store() -> FindingsStore:
+    """The application's findings store, opened on first use."""
+    return FindingsStore(settings.data_path(settings.FINDINGS_STORE_PATH))
@@ -0,0 +1,102 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from .file_record import FileRecord
+from .scan_cache_backend import estimate_size
+
+logger = logging.getLogger(__name__)
+
+class FolderPartial:
+    """
+    What scanning one Drive folder produced, without its subfolders' contents:
+    the files directly in it, the ids of its subfolders, and for each scanned file
+    its sensitive-content findings and near-duplicate signature.
+
+    Age groups, duplicate groups and near-duplicate clusters depend on the moment
+    and on the other files in a scan, so they are worked out when partials are
+    combined into a ScanResult rather than stored here.
+    """
+    __slots__ = ('folder_id', 'records', 'subfolders', 'findings', 'signatures', 'failed_files', 'scanned_at')
+
+    def __init__(self, folder_id: str):
+        self.folder_id = folder_id
+        self.records: List[FileRecord] = []
+        self.subfolders: List[str] = []
+        # file id -> {category: [matched keywords]}, only for files with findings
+        self.findings: Dict[str, Dict[str, List[str]]] = {}
+        # file id -> MinHash signature of the file's text
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.failed_files: List[str] = []
+        # When the folder was listed; set by FolderPartialCache from the entry's last_scan
+        self.scanned_at: Optional[datetime] = None
+
+    def approximate_size(self) -> int:
+        """Estimated memory use in bytes, for cache accounting."""
+        # Records are slotted objects of a dozen short fields; a signature is a small uint32 array
+        return (len(self.records) * 600 + len(self.subfolders) * 80
+                + sum(signature.nbytes + 120 for signature in self.signatures.values())
+                + estimate_size(self.findings))
+
+class FolderPartialCache:
+    """
+    Folder partials kept in a cache backend, so a scan of a parent folder reuses
+    what earlier scans of its subfolders found. A partial is trusted for `ttl`;
+    after that the folder is listed and scanned again.
+
+    Reuse is by age only: files added to a folder after its partial was taken are
+    missed until the partial expires, since checking would mean listing the folder
+    again. Results built from partials therefore carry the scan time of the oldest
+    partial they used, so their own TTL runs out no later than that partial's.
+    """
+
+    def __init__(self, backend, ttl: timedelta):
+        self.backend = backend
+        self.ttl = ttl
+
+    def __len__(self) -> int:
+        return len(self.backend.metadata())
+
+    def get(self, folder_id: str) -> Optional[FolderPartial]:
+        """The partial for a folder, or None if it was never scanned or is older than the TTL."""
+        entry = self.backend.get(folder_id)
+        if entry is None:
+            return None
+        if datetime.utcnow() - entry['last_scan'] > self.ttl:
+            self.backend.delete(folder_id)
+            return None
+        partial = entry['data']
+        partial.scanned_at = entry['last_scan']
+        return partial
+
+    def put(self, partial: FolderPartial) -> None:
+        partial.scanned_at = datetime.utcnow()
+        self.backend.set(partial.folder_id, {
+            'last_scan': partial.scanned_at,
+            'data': partial,
+            # Versions only have to differ between writes, for backends that keep loaded copies
+            'version': time.time_ns(),
+            'size': partial.approximate_size()
+        })
+
+    def sweep(self) -> int:
+        """Remove partials older than the TTL and return how many were removed."""
+        now = datetime.utcnow()
+        expired = [folder_id for folder_id, (last_scan, _, _) in self.backend.metadata().items() if now - last_scan > self.ttl]
+        for folder_id in expired:
+            self.backend.delete(folder_id)
+        return len(expired)
+
+    def invalidate(self, folder_id: Optional[str] = None) -> None:
+        """Drop a folder's partial and those of every subfolder below it, or every partial."""
+        if folder_id is None:
+            self.backend.clear()
+            return
+        pending = [folder_id]
+        while pending:
+            current = pending.pop()
+            entry = self.backend.get(current)
+            if entry is not None:
+                pending.extend(entry['data'].subfolders)
+                self.backend.delete(current)
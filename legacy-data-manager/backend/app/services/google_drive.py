@@ -6,6 +6,8 @@ from googleapiclient.errors import HttpError
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 from ..core.config import settings
+from .file_record import FileRecord
+from .name_index import get_name_index
 import logging
 import io
 import PyPDF2
@@ -13,6 +15,7 @@ import os
 import json
 import pickle
 import asyncio
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -108,7 +111,7 @@ class GoogleDriveService:
                     lambda: self.service.files().list(
                         pageSize=page_size,
                         pageToken=page_token,
-                        fields="nextPageToken,files(id, name, mimeType, modifiedTime, owners, lastModifyingUser, size)"
+                        fields="nextPageToken,files(id, name, mimeType, modifiedTime, owners, lastModifyingUser, size, md5Checksum)"
                     ).execute()
                 )
             return results
@@ -290,19 +293,42 @@ class GoogleDriveService:
             return await self._recursive_list_directory(folder_id, page_size)
         
         query = f"'{folder_id}' in parents and trashed = false"
+        files = []
+        page_token = None
         try:
-            results = await asyncio.to_thread(
-                lambda: self.service.files().list(
-            q=query,
-            pageSize=page_size,
-            fields="files(id, name, mimeType, modifiedTime, owners, lastModifyingUser, createdTime, size)"
-        ).execute()
-            )
-            return results.get('files', [])
+            # page_size is the size of each request; folders larger than one page are followed to the end
+            while True:
+                results = await asyncio.to_thread(
+                    lambda: self.service.files().list(
+                        q=query,
+                        pageSize=page_size,
+                        pageToken=page_token,
+                        fields="nextPageToken, files(id, name, mimeType, modifiedTime, owners, lastModifyingUser, createdTime, size, md5Checksum, parents)"
+                    ).execute()
+                )
+                files.extend(results.get('files', []))
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    return files
         except HttpError as error:
             logger.error(f"Google Drive API error listing directory {folder_id}: {error}")
             raise
 
+    async def list_file_records(self, folder_id: str, page_size: int = 100, recursive: bool = False) -> List[FileRecord]:
+        """
+        List files in a directory as FileRecords, parsing each file's metadata once.
+        Entries with unparseable metadata are logged and skipped.
+        """
+        records = []
+        for file in await self.list_directory(folder_id, page_size, recursive=recursive):
+            try:
+                records.append(FileRecord.from_drive(file))
+            except (KeyError, ValueError) as e:
+                logger.error(f"Error parsing metadata for file {file.get('id', 'N/A')}: {e}")
+        # Keep the name index current with everything that has been listed
+        get_name_index().add_records(records)
+        return records
+
     async def _recursive_list_directory(self, folder_id: str, page_size: int = 100) -> List[Dict]:
         """Recursively list all files in a directory and its subdirectories."""
         all_files = []
@@ -471,24 +497,29 @@ class GoogleDriveService:
             logger.error(f"Error getting file size: {str(e)}")
             raise 
 
-    def categorize_directory(self, folder_id: str, page_size: int = 100) -> Dict:
+    async def categorize_directory(self, folder_id: str, page_size: int = 100) -> Dict:
         """
         List and categorize files in a specific directory.
         Returns a dictionary with categorized files.
         """
         logger.info(f"Starting categorization for folder ID: {folder_id}")
-        if not self.service:
-            self.build_service()
         
         try:
             # Get all files in the directory
-            logger.info(f"Calling list_directory for folder ID: {folder_id}")
-            files = self.list_directory(folder_id, page_size)
-            logger.info(f"list_directory returned {len(files)} files for folder ID: {folder_id}")
+            logger.info(f"Calling list_file_records for folder ID: {folder_id}")
+            records = await self.list_file_records(folder_id, page_size)
+            logger.info(f"list_file_records returned {len(records)} files for folder ID: {folder_id}")
         except Exception as e:
-            logger.error(f"Error occurred during list_directory call within categorize_directory for folder ID {folder_id}: {e}", exc_info=True)
+            logger.error(f"Error occurred during list_file_records call within categorize_directory for folder ID {folder_id}: {e}", exc_info=True)
             raise 
 
+        return self.categorize_records(folder_id, records)
+
+    def categorize_records(self, folder_id: str, records: List[FileRecord]) -> Dict:
+        """
+        Categorize already listed files by type, recency, size, owner and department.
+        Used for live listings and for files read from the metadata inventory.
+        """
         # Initialize categories
         categories = {
             'documents': [],
@@ -511,24 +542,19 @@ class GoogleDriveService:
             }
         }
         
-        # --- Make timestamp comparison timezone-aware --- 
-        logger.debug(f"Starting categorization loop for {len(files)} files in folder {folder_id}") # Log before loop
+        # --- Compare modification times against a 30 day cutoff ---
+        logger.debug(f"Starting categorization loop for {len(records)} files in folder {folder_id}") # Log before loop
         
-        # Use timezone.utc to make current_time offset-aware
-        current_time = datetime.utcnow().replace(tzinfo=timezone.utc) 
-        thirty_days_ago = current_time - timedelta(days=30)
-        logger.debug(f"Comparison timestamp (30 days ago, UTC): {thirty_days_ago}")
+        # Records carry epoch-second timestamps, so compare against an epoch cutoff
+        thirty_days_ago = time.time() - 30 * 86400
+        logger.debug(f"Comparison timestamp (30 days ago, epoch): {thirty_days_ago}")
         
-        for index, file in enumerate(files):
+        for index, record in enumerate(records):
             try:
-                # Get file metadata
-                mime_type = file.get('mimeType', '')
-                # modified_time is already offset-aware due to .replace('Z', '+00:00')
-                modified_time = datetime.fromisoformat(file.get('modifiedTime', '').replace('Z', '+00:00')) 
-                file_size = int(file.get('size', 0))
-                owner = file.get('owners', [{}])[0]
-                owner_email = owner.get('emailAddress', '').lower()
-                owner_name = owner.get('displayName', 'Unknown')
+                file = record.to_dict()
+                mime_type = record.mime_type
+                owner_email = record.owner_email
+                owner_name = record.owner_name
                 
                 # Categorize by file type
                 if mime_type == 'application/vnd.google-apps.document':
@@ -544,12 +570,12 @@ class GoogleDriveService:
                 else:
                     categories['others'].append(file)
                 
-                # Categorize by modification time (NOW COMPARING aware vs aware)
-                if modified_time > thirty_days_ago:
+                # Categorize by modification time; both sides are UTC epoch seconds, so no timezone handling is needed
+                if record.modified_ts > thirty_days_ago:
                     categories['recent'].append(file)
                 
                 # Categorize by size
-                if file_size > 10 * 1024 * 1024:  # 10MB
+                if record.size > 10 * 1024 * 1024:  # 10MB
                     categories['large_files'].append(file)
                 
                 # Categorize by owner
@@ -578,20 +604,20 @@ class GoogleDriveService:
                 else:
                     categories['by_department']['other'].append(file)
                 
-                logger.debug(f"Categorized file {index + 1}/{len(files)}: {file.get('name', 'N/A')}") # Log inside loop
+                logger.debug(f"Categorized file {index + 1}/{len(records)}: {record.name}") # Log inside loop
             except Exception as loop_error:
-                logger.error(f"Error categorizing file {file.get('id', 'N/A')} ({file.get('name', 'N/A')}) in folder {folder_id}: {loop_error}", exc_info=True)
+                logger.error(f"Error categorizing file {record.id} ({record.name}) in folder {folder_id}: {loop_error}", exc_info=True)
                 # Optionally add the problematic file to an 'errors' category
                 if 'errors' not in categories:
                     categories['errors'] = []
-                categories['errors'].append({'file_id': file.get('id'), 'name': file.get('name'), 'error': str(loop_error)}) 
+                categories['errors'].append({'file_id': record.id, 'name': record.name, 'error': str(loop_error)}) 
                 # Continue to the next file instead of stopping the whole categorization
                 continue
         
         # Add summary statistics
         categories['summary'] = {
-            'total_files': len(files),
-            'total_size': sum(int(f.get('size', 0)) for f in files),
+            'total_files': len(records),
+            'total_size': sum(record.size for record in records),
             'by_type': {
                 'documents': len(categories['documents']),
                 'spreadsheets': len(categories['spreadsheets']),
@@ -606,8 +632,9 @@ class GoogleDriveService:
             'internal_files': len(categories['internal']),
             'external_files': len(categories['external']),
             'by_department': {
-                dept: len(files) for dept, files in categories['by_department'].items()
+                dept: len(dept_files) for dept, dept_files in categories['by_department'].items()
             }
         }
         
-        logger.info(f"Finished categorization for folder ID: {folder_id}")
\ No newline at end of file
+        logger.info(f"Finished categorization for folder ID: {folder_id}")
+        return categories
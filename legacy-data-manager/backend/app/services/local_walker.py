@@ -0,0 +1,59 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterator, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Directory listing is I/O bound (especially on NAS shares), so threads overlap the round trips
+DEFAULT_WALKER_THREADS = 8
+
+class LocalFileEntry(NamedTuple):
+    path: str
+    ext: str
+    size: int
+    mtime: float
+
+def file_extension(name: str) -> str:
+    """Lowercased extension of a file name, or '' when it has none."""
+    return name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+
+def _scan_directory(path: str, extensions: Optional[Set[str]]) -> Tuple[List[LocalFileEntry], List[str]]:
+    """List one directory: matching files (with their stat) and the subdirectories to descend into."""
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        ext = file_extension(entry.name)
+                        # Filter on the name before paying for a stat
+                        if extensions is not None and ext not in extensions:
+                            continue
+                        stat = entry.stat()
+                        files.append(LocalFileEntry(entry.path, ext, stat.st_size, stat.st_mtime))
+                except OSError as e:
+                    logger.error(f"Error reading directory entry {entry.path}: {str(e)}")
+    except OSError as e:
+        logger.error(f"Error listing directory {path}: {str(e)}")
+    return files, subdirs
+
+def walk_local_files(root: str, extensions: Optional[Set[str]] = None,
+                     max_workers: int = DEFAULT_WALKER_THREADS) -> Iterator[LocalFileEntry]:
+    """
+    Walk a directory tree with os.scandir on a thread pool, yielding files as
+    each directory is listed instead of building the full path list first.
+    If `extensions` is given, only files with those extensions are yielded (and stat'ed).
+    Symlinked directories are not followed, matching os.walk.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_scan_directory, root, extensions)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                for subdir in subdirs:
+                    pending.add(pool.submit(_scan_directory, subdir, extensions))
+                yield from files
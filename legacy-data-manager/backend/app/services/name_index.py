@@ -0,0 +1,254 @@
+import logging
+import threading
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .file_record import FileRecord
+
+logger = logging.getLogger(__name__)
+
+# Share of the query's trigrams a name needs for a fuzzy (non-substring) match
+FUZZY_THRESHOLD = 0.5
+# Match kinds, best first
+PREFIX, WORD_START, INSIDE = 0, 1, 2
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def word_starts(text: str) -> List[int]:
+    """Positions where a word starts: the beginning and after any non-alphanumeric character."""
+    return [i for i, c in enumerate(text) if c.isalnum() and (i == 0 or not text[i - 1].isalnum())]
+
+def _head(text: str) -> int:
+    """The first three characters of a lowered name packed into 21 bits each."""
+    code = 0
+    for i in range(3):
+        code = (code << 21) | (ord(text[i]) if i < len(text) else 0)
+    return code
+
+class NameIndex:
+    """
+    In-memory trigram index over file names for substring and fuzzy lookup.
+
+    Each name gets a slot; every trigram maps to a growing array of the slots
+    that contain it, plus a second array
+    for trigrams and 1-2 character prefixes that start a word. Queries narrow the
+    candidates with NumPy and only confirm the best few in Python.
+    Renamed or removed files leave a dead slot behind, and the postings are
+    rebuilt once dead slots outnumber live ones.
+    The index only holds what this process has listed, so covers_drive stays False
+    until a full crawl from the drive root has been added.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.covers_drive = False
+        self._reset()
+
+    def _reset(self):
+        self.ids: List[Optional[str]] = []
+        self.names: List[str] = []
+        self._lowered: List[str] = []
+        self._lengths = array('I')
+        self._heads = array('Q')
+        self._trigram_counts = array('H')
+        self._postings: Dict[str, array] = defaultdict(lambda: array('I'))
+        self._word_postings: Dict[str, array] = defaultdict(lambda: array('I'))
+        self._slots: Dict[str, int] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, file_id: str, name: str) -> None:
+        """Index a file name, replacing the previous name of the same file."""
+        with self._lock:
+            self._add(file_id, name)
+
+    def add_records(self, records: Iterable[FileRecord]) -> None:
+        with self._lock:
+            for record in records:
+                self._add(record.id, record.name)
+
+    def _add(self, file_id: str, name: str) -> None:
+        slot = self._slots.get(file_id)
+        if slot is not None:
+            if self.names[slot] == name:
+                return
+            self._kill(slot)
+        slot = len(self.ids)
+        lowered = name.lower()
+        grams = trigrams(lowered)
+        self.ids.append(file_id)
+        self.names.append(name)
+        self._lowered.append(lowered)
+        self._lengths.append(len(lowered))
+        self._heads.append(_head(lowered))
+        self._trigram_counts.append(min(len(grams), 0xFFFF))
+        postings = self._postings
+        for gram in grams:
+            postings[gram].append(slot)
+        # Word-start trigrams and short prefixes, for ranking and for 1-2 character queries
+        starts = set()
+        for i in word_starts(lowered):
+            starts.update((lowered[i:i + 1], lowered[i:i + 2], lowered[i:i + 3]))
+        word_postings = self._word_postings
+        for start in starts:
+            word_postings[start].append(slot)
+        self._slots[file_id] = slot
+
+    def mark_covers_drive(self) -> None:
+        """Record that every file in the drive has been added, e.g. by a root inventory sync."""
+        self.covers_drive = True
+
+    def remove(self, file_id: str) -> None:
+        with self._lock:
+            slot = self._slots.get(file_id)
+            if slot is not None:
+                self._kill(slot)
+
+    def _kill(self, slot: int) -> None:
+        del self._slots[self.ids[slot]]
+        self.ids[slot] = None
+        self._dead += 1
+        if self._dead > len(self._slots):
+            self._compact()
+
+    def _compact(self) -> None:
+        live = [(self.ids[slot], self.names[slot]) for slot in range(len(self.ids)) if self.ids[slot] is not None]
+        logger.debug(f"Compacting name index: {self._dead} dead slots, {len(live)} live")
+        self._reset()
+        for file_id, name in live:
+            self._add(file_id, name)
+
+    @staticmethod
+    def _array(postings: Dict[str, array], key: str) -> np.ndarray:
+        values = postings.get(key)
+        return np.frombuffer(values, dtype=np.uint32) if values is not None else np.empty(0, dtype=np.uint32)
+
+    def _member_mask(self, candidates: np.ndarray, slots: np.ndarray) -> np.ndarray:
+        """Which candidates also appear in a (sorted) slot array."""
+        if not len(candidates) or not len(slots):
+            return np.zeros(len(candidates), dtype=bool)
+        if len(candidates) * 16 < len(slots):
+            # Few candidates: binary search is cheaper than building a bitmap
+            positions = np.minimum(np.searchsorted(slots, candidates), len(slots) - 1)
+            return slots[positions] == candidates
+        bitmap = np.zeros(len(self.ids), dtype=bool)
+        bitmap[slots] = True
+        return bitmap[candidates]
+
+    @staticmethod
+    def _shortest_first(slots: np.ndarray, lengths: np.ndarray, batch: int) -> Iterable[int]:
+        """Slots in order of name length; only the first `batch` are sorted up front."""
+        keys = lengths[slots]
+        if len(slots) <= batch:
+            yield from slots[np.argsort(keys, kind='stable')].tolist()
+            return
+        parts = np.argpartition(keys, batch)
+        for part in (parts[:batch], parts[batch:]):
+            yield from slots[part[np.argsort(keys[part], kind='stable')]].tolist()
+
+    def search(self, query: str, limit: int = 20, fuzzy: bool = True) -> List[Dict]:
+        """
+        Files whose name contains the query, best first: the name starts with the query,
+        then a word starts with it, then any position, shorter names first.
+        Queries shorter than three characters only match the start of words.
+        With fuzzy=True the remaining places go to names sharing most of the query's trigrams.
+        """
+        needle = query.lower().strip()
+        if not needle:
+            return []
+        with self._lock:
+            hits = [(slot, 1.0) for slot in self._substring_matches(needle, limit)]
+            if fuzzy and len(hits) < limit and len(needle) >= 3:
+                found = {slot for slot, _ in hits}
+                hits.extend(self._fuzzy_matches(needle, found, limit - len(hits)))
+            return [{"id": self.ids[slot], "name": self.names[slot], "score": round(score, 3)} for slot, score in hits]
+
+    def _substring_matches(self, needle: str, limit: int) -> List[int]:
+        head = needle[:3]
+        word_candidates = self._array(self._word_postings, head)
+        if len(needle) < 3:
+            candidates = word_candidates
+        else:
+            grams = trigrams(needle)
+            postings = sorted((self._array(self._postings, gram) for gram in grams), key=len)
+            candidates = postings[0]
+            for posting in postings[1:]:
+                candidates = candidates[self._member_mask(candidates, posting)]
+        if not len(candidates):
+            return []
+
+        # Rank proxies: the name starts with the query's head, a word starts with it, anything else
+        # Compare only as many characters of the packed heads as the query has
+        shift = np.uint64(21 * (3 - len(head)))
+        heads = np.frombuffer(self._heads, dtype=np.uint64)
+        is_prefix = (heads[candidates] >> shift) == np.uint64(_head(head) >> int(shift))
+        is_word = self._member_mask(candidates, word_candidates) & ~is_prefix
+        tiers = (candidates[is_prefix], candidates[is_word], candidates[~(is_prefix | is_word)])
+
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+        found = []
+        for tier, slots in enumerate(tiers):
+            # Shortest names first; a tier can stop once it has `limit` matches of its own kind,
+            # since every later name in it is longer
+            own_kind = 0
+            for slot in self._shortest_first(slots, lengths, 4 * limit):
+                kind = self._kind(needle, slot)
+                if kind is None:
+                    continue
+                found.append((kind, self._lengths[slot], slot))
+                if kind == tier:
+                    own_kind += 1
+                    if own_kind == limit:
+                        break
+            if sum(1 for kind, _, _ in found if kind <= tier) >= limit:
+                break
+        return [slot for _, _, slot in sorted(found)[:limit]]
+
+    def _kind(self, needle: str, slot: int) -> Optional[int]:
+        """Confirm a candidate and classify the match; None for dead slots and false positives."""
+        if self.ids[slot] is None:
+            return None
+        name = self._lowered[slot]
+        if name.startswith(needle):
+            return PREFIX
+        position = name.find(needle)
+        while position > 0 and name[position - 1].isalnum():
+            position = name.find(needle, position + 1)
+        if position > 0:
+            return WORD_START
+        if len(needle) < 3:
+            return None
+        return INSIDE if needle in name else None
+
+    def _fuzzy_matches(self, needle: str, exclude: set, limit: int) -> List[Tuple[int, float]]:
+        grams = trigrams(needle)
+        postings = [self._array(self._postings, gram) for gram in grams]
+        postings = [posting for posting in postings if len(posting)]
+        if not postings:
+            return []
+        slots, shared = np.unique(np.concatenate(postings), return_counts=True)
+        # Share of the query's trigrams found in the name; ties go to names with fewer extra trigrams
+        coverage = shared / len(grams)
+        keep = coverage >= FUZZY_THRESHOLD
+        slots, coverage = slots[keep], coverage[keep]
+        extra = np.frombuffer(self._trigram_counts, dtype=np.uint16)[slots]
+        order = np.lexsort((extra, -coverage))
+        hits = []
+        for index in order.tolist():
+            slot = int(slots[index])
+            if slot in exclude or self.ids[slot] is None:
+                continue
+            hits.append((slot, float(coverage[index])))
+            if len(hits) == limit:
+                break
+        return hits
+
+@lru_cache()
+def get_name_index() -> NameIndex:
+    """The application's name index, filled as Drive folders are listed."""
+    return NameIndex()
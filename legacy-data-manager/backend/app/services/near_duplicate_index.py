@@ -0,0 +1,192 @@
+import re
+import zlib
+import logging
+from collections import defaultdict, deque
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Largest prime below 2**32: (a * h + b) stays below 2**64 for a, b, h < PRIME
+PRIME = 4294967291
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+_TOKEN_BYTES_PATTERN = re.compile(rb'\w+')
+# Shingles permuted at once; bounds the num_perm-wide temporaries of a signature to a few MB whatever the text size
+SIGNATURE_CHUNK_SIZE = 4096
+
+def _choose_bands(threshold: float, num_perm: int, min_recall: float = 0.9) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows <= num_perm. Uses the most rows per band
+    (fewest false candidates) for which a pair exactly at `threshold` still
+    becomes a candidate with probability >= min_recall: 1 - (1 - s**rows) ** bands.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= min_recall:
+            best = (bands, rows)
+    return best
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures over word shingles, bucketed in a banded LSH table.
+
+    Documents whose estimated Jaccard similarity is at or above the threshold
+    land in a common bucket with high probability, so clustering only compares
+    candidates that share a bucket instead of every pair of documents.
+    Signatures live in one growable uint32 matrix to keep per-document
+    overhead low at the million-document scale.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _choose_bands(threshold, num_perm)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+
+        self._keys: List[Hashable] = []
+        self._rows_by_key: Dict[Hashable, int] = {}
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self._tables = [defaultdict(list) for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows_by_key
+
+    def _shingle_hashes(self, text: Union[str, bytes, memoryview]) -> Iterator[np.ndarray]:
+        """
+        Hash the word shingles of a text (str or any bytes-like buffer, e.g. an mmap),
+        in chunks of at most SIGNATURE_CHUNK_SIZE. Tokens are read one at a time, so a
+        mmapped file is never copied or split into a full token list.
+        """
+        if isinstance(text, str):
+            tokens = (match.group().encode() for match in _TOKEN_PATTERN.finditer(text.lower()))
+        else:
+            tokens = (match.group().lower() for match in _TOKEN_BYTES_PATTERN.finditer(text))
+
+        window = deque(maxlen=self.shingle_size)
+        chunk = []
+        for token in tokens:
+            window.append(token)
+            if len(window) == self.shingle_size:
+                chunk.append(zlib.crc32(b' '.join(window)))
+                if len(chunk) == SIGNATURE_CHUNK_SIZE:
+                    yield np.array(chunk, dtype=np.uint64) % PRIME
+                    chunk = []
+        # Texts shorter than one shingle are a single shingle of all their words
+        if window and len(window) < self.shingle_size:
+            chunk.append(zlib.crc32(b' '.join(window)))
+        if chunk:
+            yield np.array(chunk, dtype=np.uint64) % PRIME
+
+    def signature(self, text: Union[str, bytes, memoryview]) -> Optional[np.ndarray]:
+        """MinHash signature of a text, or None when it has no words."""
+        signature = None
+        # Repeated shingles do not change a minimum, so chunks are folded in without deduplicating
+        for hashes in self._shingle_hashes(text):
+            chunk_min = ((hashes[:, None] * self._a + self._b) % PRIME).min(axis=0)
+            signature = chunk_min if signature is None else np.minimum(signature, chunk_min, out=signature)
+        return None if signature is None else signature.astype(np.uint32)
+
+    def add(self, key: Hashable, text: Union[str, bytes, memoryview]) -> bool:
+        """
+        Index a document under `key`.
+        Returns False when the key is already indexed or the text has no words.
+        """
+        if key in self._rows_by_key:
+            return False
+        signature = self.signature(text)
+        if signature is None:
+            return False
+        return self.add_signature(key, signature)
+
+    def add_signature(self, key: Hashable, signature: np.ndarray) -> bool:
+        """
+        Index a precomputed signature, e.g. one computed in a worker process by an
+        index built with the same threshold, num_perm and seed.
+        """
+        if key in self._rows_by_key:
+            return False
+
+        row = len(self._keys)
+        if row == len(self._signatures):
+            self._signatures = np.resize(self._signatures, (row * 2, self.num_perm))
+        self._signatures[row] = signature
+        self._keys.append(key)
+        self._rows_by_key[key] = row
+
+        for band, table in enumerate(self._tables):
+            start = band * self.rows
+            table[hash(signature[start:start + self.rows].tobytes())].append(row)
+        return True
+
+    def items(self) -> Iterator[Tuple[Hashable, np.ndarray]]:
+        """Indexed keys with their signatures, in insertion order."""
+        for row, key in enumerate(self._keys):
+            yield key, self._signatures[row]
+
+    def similarity(self, key_a: Hashable, key_b: Hashable) -> float:
+        """Estimated Jaccard similarity of two indexed documents."""
+        a = self._signatures[self._rows_by_key[key_a]]
+        b = self._signatures[self._rows_by_key[key_b]]
+        return float(np.mean(a == b))
+
+    def clusters(self, threshold: Optional[float] = None) -> List[List[Hashable]]:
+        """
+        Group documents whose estimated similarity is at or above `threshold`
+        (defaults to the index threshold). Thresholds below the one the index
+        was built for may miss pairs, since buckets were tuned for the latter.
+        Returns clusters of two or more keys, in insertion order.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        parent = list(range(len(self._keys)))
+
+        def find(row):
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+
+        for table in self._tables:
+            for rows in table.values():
+                if len(rows) < 2:
+                    continue
+                signatures = self._signatures[rows]
+                # Current root of each row in the bucket, kept in step with the unions below
+                roots = np.array([find(row) for row in rows])
+                for i in range(1, len(rows)):
+                    # Rows already in this row's cluster cannot join it again. The first row of each
+                    # other cluster is tried first, so a match joins a whole group of copies with one
+                    # comparison; the remaining rows are only compared if their cluster is still apart.
+                    others = np.nonzero(roots[:i] != roots[i])[0]
+                    if not len(others):
+                        continue
+                    _, first = np.unique(roots[others], return_index=True)
+                    for candidates in (others[first], np.delete(others, first)):
+                        candidates = candidates[roots[candidates] != roots[i]]
+                        if not len(candidates):
+                            continue
+                        similar = candidates[np.mean(signatures[candidates] == signatures[i], axis=1) >= threshold]
+                        for j in similar:
+                            root_a, root_b = find(rows[i]), find(rows[j])
+                            if root_a != root_b:
+                                low, high = min(root_a, root_b), max(root_a, root_b)
+                                parent[high] = low
+                                roots[roots == high] = low
+
+        groups = defaultdict(list)
+        for row, key in enumerate(self._keys):
+            groups[find(row)].append(key)
+        clusters = [group for group in groups.values() if len(group) > 1]
+        logger.info(f"Found {len(clusters)} near-duplicate clusters among {len(self._keys)} documents")
+        return clusters
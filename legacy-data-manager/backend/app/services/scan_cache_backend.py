@@ -0,0 +1,294 @@
+import logging
+import pickle
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Optional: zstd compresses and decompresses scan results several times faster than zlib
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+logger = logging.getLogger(__name__)
+
+# zlib level for stored scan results; scan results are repetitive and shrink well at a cheap level
+COMPRESSION_LEVEL = 6
+ZSTD_LEVEL = 3
+# Every zstd frame starts with these bytes, so blobs written by either codec can be read back
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+def compress_data(data: Any) -> bytes:
+    """Pickle a cached value and compress it with zstd when available, zlib otherwise."""
+    pickled = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    if HAS_ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(pickled)
+    return zlib.compress(pickled, COMPRESSION_LEVEL)
+
+def decompress_data(blob: bytes) -> Any:
+    if blob[:4] == ZSTD_MAGIC:
+        if not HAS_ZSTD:
+            raise ValueError("Cached entry is zstd-compressed but zstandard is not installed")
+        return pickle.loads(zstandard.ZstdDecompressor().decompress(blob))
+    return pickle.loads(zlib.decompress(blob))
+
+def estimate_size(data: Any) -> int:
+    """Approximate memory use of a cached value: scan results estimate themselves, anything else is pickled."""
+    if hasattr(data, 'approximate_size'):
+        return data.approximate_size()
+    return len(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+class LRUEntries:
+    """
+    Entries in least-recently-used order with a ceiling on their total size.
+    Each entry carries its approximate size under 'size'; adding past the ceiling
+    evicts from the least recently used end (the newest entry is always kept),
+    calling on_evict with each evicted id.
+    """
+
+    def __init__(self, max_bytes: int, on_evict: Optional[Callable[[str], None]] = None):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.total_bytes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, target_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(target_id)
+            if entry is not None:
+                self._entries.move_to_end(target_id)
+            return entry
+
+    def put(self, target_id: str, entry: Dict[str, Any]) -> List[str]:
+        """Add or replace an entry; returns the ids evicted to make room."""
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(target_id, None)
+            if old is not None:
+                self.total_bytes -= old.get('size', 0)
+            self._entries[target_id] = entry
+            self.total_bytes += entry.get('size', 0)
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                evicted_id, evicted_entry = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_entry.get('size', 0)
+                evicted.append(evicted_id)
+            self.evictions += len(evicted)
+        for evicted_id in evicted:
+            logger.info(f"Evicted {evicted_id} from the scan cache to stay under {self.max_bytes} bytes")
+            if self.on_evict is not None:
+                self.on_evict(evicted_id)
+        return evicted
+
+    def pop(self, target_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.pop(target_id, None)
+            if entry is not None:
+                self.total_bytes -= entry.get('size', 0)
+            return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            return list(self._entries.items())
+
+class MemoryCacheBackend:
+    """
+    Cache entries held in this process, evicted least recently used first once
+    they outgrow max_bytes. Entries are dicts with 'last_scan', 'data', 'version'
+    and 'size' keys.
+
+    Entries of compress_threshold bytes or more are kept compressed, which takes
+    a fraction of the memory of the live objects. They are decompressed when read,
+    and the most recently read ones are kept decompressed in a separate LRU bounded
+    by hot_bytes, so repeated reads of a busy folder do not pay for it again.
+    """
+
+    def __init__(self, max_bytes: int, compress_threshold: Optional[int] = None, hot_bytes: int = 0,
+                 on_evict: Optional[Callable[[str, str], None]] = None):
+        # Entries pushed out of memory are gone from the cache
+        self._entries = LRUEntries(max_bytes, (lambda key: on_evict(key, 'lru')) if on_evict else None)
+        self.compress_threshold = compress_threshold
+        self._hot = LRUEntries(hot_bytes)
+
+    def get(self, target_id: str) -> Optional[Dict[str, Any]]:
+        stored = self._entries.get(target_id)
+        if stored is None:
+            self._hot.pop(target_id)
+            return None
+        if 'blob' not in stored:
+            return stored
+        entry = self._hot.get(target_id)
+        if entry is not None and entry['version'] == stored['version']:
+            return entry
+        try:
+            data = decompress_data(stored['blob'])
+        except Exception as e:
+            logger.error(f"Error loading cached result for {target_id}: {str(e)}")
+            return None
+        entry = {'last_scan': stored['last_scan'], 'data': data, 'version': stored['version'], 'size': stored['raw_size']}
+        self._hot.put(target_id, entry)
+        return entry
+
+    def set(self, target_id: str, entry: Dict[str, Any]) -> None:
+        if self.compress_threshold is None or entry.get('size', 0) < self.compress_threshold:
+            self._hot.pop(target_id)
+            self._entries.put(target_id, entry)
+            return
+        blob = compress_data(entry['data'])
+        self._entries.put(target_id, {
+            'last_scan': entry['last_scan'],
+            'version': entry['version'],
+            'blob': blob,
+            'size': len(blob),
+            'raw_size': entry.get('size', 0)
+        })
+        # The writer is usually about to read it back
+        self._hot.put(target_id, entry)
+
+    def delete(self, target_id: str) -> None:
+        self._entries.pop(target_id)
+        self._hot.pop(target_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._hot.clear()
+
+    def metadata(self) -> Dict[str, Tuple[datetime, int, int]]:
+        """last_scan, version and size of every entry, without loading the data."""
+        return {
+            target_id: (entry['last_scan'], entry['version'], entry.get('raw_size', entry.get('size', 0)))
+            for target_id, entry in self._entries.items()
+        }
+
+    def memory_usage(self) -> Dict[str, int]:
+        return {
+            'entries_in_memory': len(self._entries),
+            'memory_bytes': self._entries.total_bytes + self._hot.total_bytes,
+            'max_memory_bytes': self._entries.max_bytes + self._hot.max_bytes,
+            'lru_evictions': self._entries.evictions,
+            'compressed_entries': sum(1 for _, entry in self._entries.items() if 'blob' in entry),
+            'decompressed_entries': len(self._hot)
+        }
+
+class SQLiteCacheBackend:
+    """
+    Cache entries stored in an SQLite file as compressed pickles, shared by every
+    worker pointing at the same path and kept across restarts.
+
+    Unpickling a large scan result is the expensive part of a hit, so each process
+    keeps the entries it loaded in an LRU bounded by max_bytes and reuses them while
+    the stored version is unchanged; only a version lookup goes to disk.
+    """
+
+    def __init__(self, path: str, max_bytes: int, table: str = "scan_cache",
+                 on_evict: Optional[Callable[[str, str], None]] = None):
+        self.path = path
+        # Table names come from code, never from requests
+        self.table = table
+        self._lock = threading.Lock()
+        # Dropping a loaded copy only frees memory; the entry stays on disk and is still served
+        self._loaded = LRUEntries(max_bytes, (lambda key: on_evict(key, 'unload')) if on_evict else None)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # WAL lets other workers read while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                target_id TEXT PRIMARY KEY,
+                last_scan TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if 'size' not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def get(self, target_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT last_scan, version, size FROM {self.table} WHERE target_id = ?", (target_id,)
+            ).fetchone()
+            if row is None:
+                self._loaded.pop(target_id)
+                return None
+            entry = self._loaded.get(target_id)
+            if entry is not None and entry['version'] == row[1]:
+                return entry
+            blob = self._conn.execute(f"SELECT data FROM {self.table} WHERE target_id = ?", (target_id,)).fetchone()
+        if blob is None:
+            return None
+        try:
+            data = decompress_data(blob[0])
+        except Exception as e:
+            logger.error(f"Error loading cached result for {target_id}: {str(e)}")
+            return None
+        entry = {'last_scan': datetime.fromisoformat(row[0]), 'data': data, 'version': row[1], 'size': row[2]}
+        self._loaded.put(target_id, entry)
+        return entry
+
+    def set(self, target_id: str, entry: Dict[str, Any]) -> None:
+        blob = compress_data(entry['data'])
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (target_id, last_scan, version, data, size) VALUES (?, ?, ?, ?, ?)",
+                (target_id, entry['last_scan'].isoformat(), entry['version'], blob, entry.get('size', 0))
+            )
+            self._conn.commit()
+        self._loaded.put(target_id, entry)
+
+    def delete(self, target_id: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE target_id = ?", (target_id,))
+            self._conn.commit()
+        self._loaded.pop(target_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+        self._loaded.clear()
+
+    def metadata(self) -> Dict[str, Tuple[datetime, int, int]]:
+        """last_scan, version and size of every entry, without loading the data."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT target_id, last_scan, version, size FROM {self.table}").fetchall()
+        return {target_id: (datetime.fromisoformat(last_scan), version, size) for target_id, last_scan, version, size in rows}
+
+    def memory_usage(self) -> Dict[str, int]:
+        # Evicting a loaded entry only frees memory; it is read back from disk on the next hit
+        return {
+            'entries_in_memory': len(self._loaded),
+            'memory_bytes': self._loaded.total_bytes,
+            'max_memory_bytes': self._loaded.max_bytes,
+            'lru_evictions': self._loaded.evictions
+        }
+
+def create_cache_backend(kind: str, path: str, max_bytes: int, table: str = "scan_cache",
+                         compress_threshold: Optional[int] = None, hot_bytes: int = 0,
+                         on_evict: Optional[Callable[[str, str], None]] = None):
+    """
+    The backend named by the SCAN_CACHE_BACKEND setting: 'sqlite' or 'memory'.
+    compress_threshold and hot_bytes only apply to 'memory'; SQLite always stores entries compressed.
+    on_evict is called with the id of every entry the memory ceiling pushes out and a reason:
+    'lru' when the entry left the cache, 'unload' when only its in-memory copy was dropped.
+    """
+    if kind == "memory":
+        return MemoryCacheBackend(max_bytes, compress_threshold, hot_bytes, on_evict)
+    if kind == "sqlite":
+        return SQLiteCacheBackend(path, max_bytes, table, on_evict)
+    raise ValueError(f"Unknown scan cache backend: {kind}")
@@ -1,9 +1,32 @@
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Awaitable, Callable, Tuple
+import asyncio
+import itertools
 import logging
+import threading
+import time
+from ..core.config import settings
+from .scan_cache_backend import create_cache_backend, estimate_size
+from .single_flight import SingleFlight
+from .folder_partials import FolderPartialCache
+from .cache_metrics import CacheMetrics
 
 logger = logging.getLogger(__name__)
 
+# Views cached next to a target's raw scan result, each under its own key
+views = ('summary', 'risks', 'categorize')
+
+def view_key(view: str, target_id: str) -> str:
+    """The cache key of a view of a target, e.g. 'summary:<folder id>'; raw scans are keyed by the bare target id."""
+    return f"{view}:{target_id}"
+
+def is_view_key(key: str) -> bool:
+    return key.split(':', 1)[0] in views
+
+def namespace_of(key: str) -> str:
+    """The metrics namespace of a cache key: its view, or 'scan' for raw scan results."""
+    return key.split(':', 1)[0] if is_view_key(key) else 'scan'
+
 class ScanCacheService:
     _instance = None
 
@@ -17,34 +40,63 @@ class ScanCacheService:
         if self._initialized:
             return
             
-        self.cache = {
-            'drive': {
-                'last_scan': None,
-                'data': None
-            },
-            'directories': {}
-        }
+        # Hits, misses, evictions and scan times per namespace, to tune the TTL and memory settings from
+        self.metrics = CacheMetrics()
+        self.backend = create_cache_backend(
+            settings.SCAN_CACHE_BACKEND, settings.data_path(settings.SCAN_CACHE_PATH),
+            settings.SCAN_CACHE_MAX_MEMORY_BYTES,
+            compress_threshold=settings.SCAN_CACHE_COMPRESS_THRESHOLD, hot_bytes=settings.SCAN_CACHE_HOT_BYTES,
+            on_evict=lambda key, reason: self.metrics.record_eviction(namespace_of(key), reason)
+        )
         self.cache_ttl = timedelta(minutes=60)
+        # What each Drive folder's own files produced, so parent scans only scan folders not seen within the TTL.
+        # Partials are small next to whole results and get a quarter of the memory ceiling;
+        # large ones are compressed like scan results
+        self.folder_partials = FolderPartialCache(
+            create_cache_backend(settings.SCAN_CACHE_BACKEND, settings.data_path(settings.SCAN_CACHE_PATH),
+                                 settings.SCAN_CACHE_MAX_MEMORY_BYTES // 4, table="folder_partials",
+                                 compress_threshold=settings.SCAN_CACHE_COMPRESS_THRESHOLD,
+                                 hot_bytes=settings.SCAN_CACHE_HOT_BYTES,
+                                 on_evict=lambda _, reason: self.metrics.record_eviction('folder_partials', reason)),
+            self.cache_ttl
+        )
+        # Expired entries younger than cache_ttl + stale_grace are still served while they are refreshed
+        self.stale_grace = timedelta(seconds=settings.SCAN_CACHE_STALE_GRACE)
+        # Entry versions start from the clock so ETags from a previous process never match
+        self._versions = itertools.count(time.time_ns())
+        self.expired_evictions = 0
+        # Scans in progress, so concurrent requests for one target share a single scan
+        self.flights = SingleFlight()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
         self._initialized = True
 
-    def get_cached_result(self, target_id: str) -> Optional[Dict[str, Any]]:
+    def get_cached_result(self, target_id: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
         """
         Get cached scan result for a target (drive or directory).
-        Returns None if no cache exists or if cache is expired.
+        Returns None if no cache exists or if cache is expired. With allow_stale,
+        expired results are still returned until the stale grace period is over too.
         """
         try:
-            if target_id == 'drive':
-                cache_entry = self.cache['drive']
-            else:
-                cache_entry = self.cache['directories'].get(target_id)
+            cache_entry = self.backend.get(target_id)
 
             if not cache_entry or not cache_entry['last_scan']:
                 return None
 
-            # Check if cache is expired
-            if datetime.utcnow() - cache_entry['last_scan'] > self.cache_ttl:
+            # Check if cache is expired; entries past the grace period are freed rather than kept around
+            age = datetime.utcnow() - cache_entry['last_scan']
+            if age > self.cache_ttl + self.stale_grace:
                 logger.info(f"Cache expired for {target_id}")
+                self.backend.delete(target_id)
+                self.expired_evictions += 1
+                self.metrics.record_eviction(namespace_of(target_id), 'expired')
                 return None
+            if age > self.cache_ttl:
+                if not allow_stale:
+                    logger.info(f"Cache expired for {target_id}")
+                    return None
+                logger.info(f"Using stale cached result for {target_id}")
+                return cache_entry['data']
 
             logger.info(f"Using cached result for {target_id}")
             return cache_entry['data']
@@ -53,21 +105,123 @@ class ScanCacheService:
             logger.error(f"Error getting cached result: {str(e)}", exc_info=True)
             return None
 
+    def lookup(self, target_id: str) -> Tuple[Optional[Any], str]:
+        """
+        Get a target's result for serving a request: the cached result, stale ones included,
+        and 'hit', 'stale' or 'miss'. Each lookup is counted in the metrics; inspecting the
+        cache with get_cached_result() is not.
+        """
+        cached_result = self.get_cached_result(target_id, allow_stale=True)
+        if not cached_result:
+            status = 'miss'
+        elif self.is_stale(target_id):
+            status = 'stale'
+        else:
+            status = 'hit'
+        self.metrics.record_lookup(namespace_of(target_id), status)
+        return cached_result, status
+
+    def is_stale(self, target_id: str) -> bool:
+        """
+        Check if a target's cached result is past its TTL but still inside the stale grace period.
+        """
+        cache_entry = self.get_cache_entry(target_id)
+        if not cache_entry or not cache_entry['last_scan']:
+            return False
+        age = datetime.utcnow() - cache_entry['last_scan']
+        return self.cache_ttl < age <= self.cache_ttl + self.stale_grace
+
+    def refresh_in_background(self, key: str, work: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Start work() as a background task unless work under the same key is already running.
+        work() is responsible for updating the cache; errors are logged and the stale entry stays.
+        """
+        if self.flights.in_flight(key):
+            return
+
+        def log_result(task: asyncio.Task) -> None:
+            if task.cancelled():
+                return
+            if task.exception() is not None:
+                logger.error(f"Error refreshing stale cache entry {key}: {str(task.exception())}")
+            else:
+                logger.info(f"Refreshed stale cache entry {key}")
+
+        self.flights.start(key, work).add_done_callback(log_result)
+
+    def _scan_and_cache(self, target_id: str, scan: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        async def scan_and_cache():
+            started = time.monotonic()
+            result = await scan()
+            self.metrics.observe_scan(namespace_of(target_id), time.monotonic() - started)
+            self.update_cache(target_id, result)
+            return result
+        return scan_and_cache
+
+    def revalidate(self, target_id: str, scan: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Rescan a target in the background and cache the result.
+        """
+        self.refresh_in_background(target_id, self._scan_and_cache(target_id, scan))
+
+    async def get_or_scan(self, target_id: str, scan: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get the cached result for a target, or run scan() and cache what it returns.
+        Callers arriving while a scan of the same target runs wait for it instead of scanning again.
+        A stale result is returned immediately and refreshed in the background.
+        """
+        cached_result, status = self.lookup(target_id)
+        if cached_result:
+            if status == 'stale':
+                self.revalidate(target_id, scan)
+            return cached_result
+
+        return await self.rescan(target_id, scan)
+
+    async def rescan(self, target_id: str, scan: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run scan() and cache what it returns, whatever is cached now.
+        Joins a scan of the same target that is already running.
+        """
+        return await self.flights.do(target_id, self._scan_and_cache(target_id, scan))
+
+    async def get_view(self, view: str, target_id: str, scan: Callable[[], Awaitable[Any]],
+                       derive: Callable[[Any], Any]) -> Any:
+        """
+        Get a view of a target's scan, computed by derive() from the cached raw scan result.
+        scan() only runs when no raw result is cached. The derived view is cached under its
+        own key and derived again once the raw result it came from has been replaced.
+        """
+        raw_result = await self.get_or_scan(target_id, scan)
+        raw_entry = self.get_cache_entry(target_id)
+        source_version = raw_entry['version'] if raw_entry else None
+
+        key = view_key(view, target_id)
+        cache_entry = self.get_cache_entry(key)
+        if cache_entry and source_version is not None and cache_entry['data']['source_version'] == source_version:
+            logger.info(f"Using cached {view} view for {target_id}")
+            self.metrics.record_lookup(view, 'hit')
+            return cache_entry['data']['view']
+
+        self.metrics.record_lookup(view, 'miss')
+        data = derive(raw_result)
+        if source_version is not None:
+            self.update_cache(key, {'source_version': source_version, 'view': data})
+        return data
+
     def update_cache(self, target_id: str, data: Dict[str, Any]) -> None:
         """
-        Update cache with new scan result.
+        Update cache with new scan result. Results assembled from older parts
+        (see ScanResult.scanned_at) are dated by their oldest part.
         """
         try:
-            if target_id == 'drive':
-                self.cache['drive'] = {
-                    'last_scan': datetime.utcnow(),
-                    'data': data
-                }
-            else:
-                self.cache['directories'][target_id] = {
-                    'last_scan': datetime.utcnow(),
-                    'data': data
-                }
+            entry = {
+                'last_scan': getattr(data, 'scanned_at', None) or datetime.utcnow(),
+                'data': data,
+                'version': next(self._versions),
+                'size': estimate_size(data)
+            }
+            self.backend.set(target_id, entry)
             logger.info(f"Updated cache for {target_id}")
         except Exception as e:
             logger.error(f"Error updating cache: {str(e)}", exc_info=True)
@@ -78,49 +232,91 @@ class ScanCacheService:
         If target_id is None, invalidate all caches.
         """
         try:
+            # Folder partials go too, or the next scan would reuse what was just invalidated
             if target_id is None:
                 # Invalidate all caches
-                self.cache['drive'] = {'last_scan': None, 'data': None}
-                self.cache['directories'] = {}
+                self.backend.clear()
+                self.folder_partials.invalidate()
                 logger.info("Invalidated all caches")
             elif target_id == 'drive':
-                self.cache['drive'] = {'last_scan': None, 'data': None}
+                self._delete_target('drive')
+                self.folder_partials.invalidate()
                 logger.info("Invalidated drive cache")
             else:
-                self.cache['directories'].pop(target_id, None)
+                self._delete_target(target_id)
+                self.folder_partials.invalidate(target_id)
                 logger.info(f"Invalidated cache for directory {target_id}")
         except Exception as e:
             logger.error(f"Error invalidating cache: {str(e)}", exc_info=True)
 
+    def _delete_target(self, target_id: str) -> None:
+        self.backend.delete(target_id)
+        for view in views:
+            self.backend.delete(view_key(view, target_id))
+
     def get_cache_status(self) -> Dict[str, Any]:
         """
         Get current cache status.
         """
         try:
+            metadata = self.backend.metadata()
+            view_entries = [key for key in metadata if is_view_key(key)]
+            for key in view_entries:
+                del metadata[key]
+            drive_scan = metadata.pop('drive', (None, None))[0]
             status = {
                 'drive': {
-                    'cached': self.cache['drive']['last_scan'] is not None,
-                    'last_scan': self.cache['drive']['last_scan'].isoformat() if self.cache['drive']['last_scan'] else None
+                    'cached': drive_scan is not None,
+                    'last_scan': drive_scan.isoformat() if drive_scan else None
                 },
                 'directories': {}
             }
 
-            for dir_id, cache_entry in self.cache['directories'].items():
+            for dir_id, (last_scan, _, size) in metadata.items():
                 status['directories'][dir_id] = {
-                    'cached': cache_entry['last_scan'] is not None,
-                    'last_scan': cache_entry['last_scan'].isoformat() if cache_entry['last_scan'] else None
+                    'cached': True,
+                    'last_scan': last_scan.isoformat(),
+                    'size_bytes': size
                 }
 
+            usage = self.backend.memory_usage()
+            status['memory'] = {
+                'entries': usage['entries_in_memory'],
+                'bytes': usage['memory_bytes'],
+                'max_bytes': usage['max_memory_bytes'],
+                'compressed_entries': usage.get('compressed_entries', 0)
+            }
+            status['views'] = len(view_entries)
+            status['folder_partials'] = len(self.folder_partials)
+            status['evictions'] = {
+                'lru': usage['lru_evictions'],
+                'expired': self.expired_evictions
+            }
+            status['metrics'] = self.metrics.snapshot(self.bytes_held())
+
             return status
         except Exception as e:
             logger.error(f"Error getting cache status: {str(e)}", exc_info=True)
             return {'error': str(e)}
 
+    def bytes_held(self) -> Dict[str, int]:
+        """Approximate size of the cached entries per metrics namespace."""
+        held = {}
+        for key, (_, _, size) in self.backend.metadata().items():
+            namespace = namespace_of(key)
+            held[namespace] = held.get(namespace, 0) + size
+        held['folder_partials'] = sum(size for _, _, size in self.folder_partials.backend.metadata().values())
+        return held
+
+    def get_metrics_text(self) -> str:
+        """The cache metrics in the Prometheus text format."""
+        return self.metrics.to_prometheus(self.bytes_held())
+
     def get_cached_directories(self) -> List[str]:
         """
         Get list of directory IDs that are currently cached.
         """
-        return list(self.cache['directories'].keys())
+        return [target_id for target_id in self.backend.metadata() if target_id != 'drive' and not is_view_key(target_id)]
 
     def is_cached(self, target_id: str) -> bool:
         """
@@ -134,10 +330,59 @@ class ScanCacheService:
         Returns None if no cache exists.
         """
         try:
-            if target_id == 'drive':
-                return self.cache['drive']
-            else:
-                return self.cache['directories'].get(target_id)
+            return self.backend.get(target_id)
         except Exception as e:
             logger.error(f"Error getting cache entry: {str(e)}", exc_info=True)
-            return None 
\ No newline at end of file
+            return None
+
+    def get_etag(self, target_id: str) -> Optional[str]:
+        """
+        Get the ETag of a target's cache entry; it changes whenever the entry is replaced.
+        Returns None if nothing is cached.
+        """
+        cache_entry = self.get_cache_entry(target_id)
+        if not cache_entry or not cache_entry.get('version'):
+            return None
+        return f'W/"{cache_entry["version"]:x}"'
+
+    def sweep(self) -> int:
+        """
+        Remove every entry past its TTL and stale grace period and return how many were removed.
+        """
+        now = datetime.utcnow()
+        expired = [
+            target_id for target_id, (last_scan, _, _) in self.backend.metadata().items()
+            if now - last_scan > self.cache_ttl + self.stale_grace
+        ]
+        for target_id in expired:
+            self.backend.delete(target_id)
+            self.metrics.record_eviction(namespace_of(target_id), 'expired')
+        swept_partials = self.folder_partials.sweep()
+        self.metrics.record_eviction('folder_partials', 'expired', swept_partials)
+        swept = len(expired) + swept_partials
+        self.expired_evictions += swept
+        if swept:
+            logger.info(f"Swept {swept} expired scan cache entries")
+        return swept
+
+    def start_sweeper(self, interval_seconds: float) -> None:
+        """
+        Sweep expired entries every interval_seconds on a daemon thread.
+        Calling it again while the sweeper runs does nothing.
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop_sweeper.clear()
+
+        def run():
+            while not self._stop_sweeper.wait(interval_seconds):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"Error sweeping scan cache: {str(e)}", exc_info=True)
+
+        self._sweeper = threading.Thread(target=run, name="scan-cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop_sweeper.set()
@@ -0,0 +1,401 @@
+import sys
+import json
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+age_groups = ("moreThanThreeYears", "oneToThreeYears", "lessThanOneYear")
+# Per-bucket lists that can be paged through
+sections = ("file_types", "sensitive_info", "duplicate_files")
+# Items per line of the NDJSON rendering
+NDJSON_CHUNK_SIZE = 500
+
+class FileTable:
+    """
+    Column store for the files referenced by a scan result.
+    Each file is stored once; categories refer to it by row number.
+    Local files only have an id (their path) and are rendered as that path.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.names: List[Optional[str]] = []
+        self.mime_types: List[Optional[str]] = []
+        self.modified_times: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, file_id: str, name: Optional[str] = None, mime_type: Optional[str] = None,
+            modified_time: Optional[str] = None) -> int:
+        """Return the row for a file, adding it if it is not in the table yet."""
+        row = self._rows.get(file_id)
+        if row is not None:
+            return row
+        row = len(self.ids)
+        self.ids.append(file_id)
+        self.names.append(name)
+        # Only a few dozen distinct MIME types exist, so share one string per type
+        self.mime_types.append(sys.intern(mime_type) if mime_type else mime_type)
+        self.modified_times.append(modified_time)
+        self._rows[file_id] = row
+        return row
+
+    def approximate_size(self, sample: int = 1000) -> int:
+        """Estimated memory use in bytes, from the string sizes of an evenly spaced sample of rows."""
+        if not self.ids:
+            return 0
+        step = max(1, len(self.ids) // sample)
+        rows = range(0, len(self.ids), step)
+        strings = sum(sys.getsizeof(self.ids[row]) + sys.getsizeof(self.names[row]) +
+                      sys.getsizeof(self.modified_times[row]) for row in rows)
+        # Four list slots and a lookup dict entry per row on top of the strings
+        return len(self.ids) * (strings // len(rows) + 4 * 8 + 50)
+
+    def ref(self, row: int) -> Any:
+        """The JSON file reference for a row: a Drive file dict, or the path of a local file."""
+        if self.names[row] is None:
+            return self.ids[row]
+        return {
+            "id": self.ids[row],
+            "name": self.names[row],
+            "mimeType": self.mime_types[row],
+            "modifiedTime": self.modified_times[row]
+        }
+
+class ScanAggregates:
+    """
+    Running totals for a scan, updated as files are added.
+    Summaries read these counters instead of walking the per-bucket file lists,
+    and aggregates from several folders can be merged into one.
+    """
+
+    def __init__(self):
+        self.total_documents = 0
+        self.total_size = 0
+        self.sensitive_files = 0
+        self.duplicate_files = 0
+        self.by_type: Counter = Counter()
+        self.by_age: Counter = Counter()
+        self.size_by_type: Counter = Counter()
+        self.size_by_age: Counter = Counter()
+        # category -> number of files with findings in that category
+        self.by_sensitivity: Counter = Counter()
+
+    def add_file(self, age_group: str, file_type: str, size: int = 0) -> None:
+        self.total_documents += 1
+        self.total_size += size
+        self.by_type[file_type] += 1
+        self.by_age[age_group] += 1
+        self.size_by_type[file_type] += size
+        self.size_by_age[age_group] += size
+
+    def merge(self, other: 'ScanAggregates') -> 'ScanAggregates':
+        """Add another scan's totals into this one and return self."""
+        self.total_documents += other.total_documents
+        self.total_size += other.total_size
+        self.sensitive_files += other.sensitive_files
+        self.duplicate_files += other.duplicate_files
+        self.by_type.update(other.by_type)
+        self.by_age.update(other.by_age)
+        self.size_by_type.update(other.size_by_type)
+        self.size_by_age.update(other.size_by_age)
+        self.by_sensitivity.update(other.by_sensitivity)
+        return self
+
+    @classmethod
+    def combine(cls, aggregates: Iterable['ScanAggregates']) -> 'ScanAggregates':
+        """Totals across several scans, e.g. one per folder."""
+        combined = cls()
+        for item in aggregates:
+            combined.merge(item)
+        return combined
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_documents": self.total_documents,
+            "total_size": self.total_size,
+            "sensitive_files": self.sensitive_files,
+            "duplicate_files": self.duplicate_files,
+            "by_type": dict(self.by_type),
+            "by_age": dict(self.by_age),
+            "size_by_type": dict(self.size_by_type),
+            "size_by_age": dict(self.size_by_age),
+            "by_sensitivity": dict(self.by_sensitivity)
+        }
+
+class _Bucket:
+    """Per-age-group counters and row references."""
+    __slots__ = ('total_documents', 'total_sensitive', 'total_duplicates',
+                 'file_types', 'sensitive_info', 'duplicate_files')
+
+    def __init__(self, file_types: Iterable[str], sensitive_categories: Iterable[str]):
+        self.total_documents = 0
+        self.total_sensitive = 0
+        self.total_duplicates = 0
+        self.file_types = {k: array('I') for k in file_types}
+        # category -> [(row, matched keywords)]
+        self.sensitive_info = {k: [] for k in sensitive_categories}
+        # [(row, content hash, row of the original)]
+        self.duplicate_files = []
+
+class ScanResult(Mapping):
+    """
+    Compact scan result: one FileTable plus integer references per category.
+
+    It reads like the scan dict `scan_files` used to return (result['total_files'],
+    result['lessThanOneYear']['file_types'], ...), but file objects are only built
+    when a key is accessed or the whole result is rendered with to_dict().
+    """
+
+    _keys = age_groups + ("scan_complete", "processed_files", "total_files", "total_duplicates",
+                          "total_sensitive_files", "failed_files", "content_hashes", "near_duplicates",
+                          "aggregates")
+
+    def __init__(self, file_types: Iterable[str], sensitive_categories: Iterable[str]):
+        file_types, sensitive_categories = list(file_types), list(sensitive_categories)
+        self.files = FileTable()
+        self.buckets = {age_group: _Bucket(file_types, sensitive_categories) for age_group in age_groups}
+        self.scan_complete = False
+        self.processed_files = 0
+        self.total_files = 0
+        self.total_duplicates = 0
+        self.total_sensitive_files = 0
+        self.failed_files: List[str] = []
+        # content hash -> rows, original first
+        self.content_hashes: Dict[str, array] = {}
+        self.near_duplicates: List[List[str]] = []
+        self.aggregates = ScanAggregates()
+        # When the oldest data in the result was gathered, if older than the result itself
+        self.scanned_at: Optional[datetime] = None
+        self._sensitive_rows = set()
+
+    # Building
+
+    def add_file(self, age_group: str, file_type: str, file_id: str, name: Optional[str] = None,
+                 mime_type: Optional[str] = None, modified_time: Optional[str] = None, size: int = 0) -> int:
+        """Count a document in an age group under a file type and return its row."""
+        row = self.files.add(file_id, name, mime_type, modified_time)
+        bucket = self.buckets[age_group]
+        bucket.total_documents += 1
+        bucket.file_types[file_type].append(row)
+        self.aggregates.add_file(age_group, file_type, size)
+        return row
+
+    def add_findings(self, age_group: str, row: int, findings: Dict[str, List[str]]) -> None:
+        """Record scan_text findings for a file; each file counts as sensitive once."""
+        if not findings:
+            return
+        bucket = self.buckets[age_group]
+        if row not in self._sensitive_rows:
+            self._sensitive_rows.add(row)
+            bucket.total_sensitive += 1
+            self.total_sensitive_files += 1
+            self.aggregates.sensitive_files += 1
+        for category, keywords in findings.items():
+            if keywords:
+                bucket.sensitive_info[category].append((row, tuple(keywords)))
+                self.aggregates.by_sensitivity[category] += 1
+
+    def add_duplicates(self, content_hash: str, members: List[Tuple[str, str]]) -> None:
+        """
+        Record a group of identical files given as (age_group, file_id), oldest first.
+        Every member after the first counts as a redundant copy of the first.
+        """
+        rows = array('I', (self.files.add(file_id) for _, file_id in members))
+        self.content_hashes[content_hash] = rows
+        for (age_group, _), row in zip(members[1:], rows[1:]):
+            bucket = self.buckets[age_group]
+            bucket.duplicate_files.append((row, content_hash, rows[0]))
+            bucket.total_duplicates += 1
+            self.total_duplicates += 1
+            self.aggregates.duplicate_files += 1
+
+    def merge(self, other: 'ScanResult') -> None:
+        """
+        Merge a partial result (e.g. from a worker process) into this one.
+        total_files, content_hashes and near_duplicates span the whole scan and are left to the caller.
+        """
+        row_map = array('I', (
+            self.files.add(other.files.ids[row], other.files.names[row],
+                           other.files.mime_types[row], other.files.modified_times[row])
+            for row in range(len(other.files))
+        ))
+        for age_group in age_groups:
+            target, source = self.buckets[age_group], other.buckets[age_group]
+            target.total_documents += source.total_documents
+            target.total_sensitive += source.total_sensitive
+            target.total_duplicates += source.total_duplicates
+            for file_type, rows in source.file_types.items():
+                target.file_types[file_type].extend(row_map[row] for row in rows)
+            for category, entries in source.sensitive_info.items():
+                target.sensitive_info[category].extend((row_map[row], keywords) for row, keywords in entries)
+            target.duplicate_files.extend(
+                (row_map[row], content_hash, row_map[original])
+                for row, content_hash, original in source.duplicate_files
+            )
+        self._sensitive_rows.update(row_map[row] for row in other._sensitive_rows)
+        self.processed_files += other.processed_files
+        self.total_duplicates += other.total_duplicates
+        self.total_sensitive_files += other.total_sensitive_files
+        self.failed_files.extend(other.failed_files)
+        self.aggregates.merge(other.aggregates)
+
+    def approximate_size(self) -> int:
+        """Estimated memory use in bytes, for cache accounting."""
+        size = self.files.approximate_size()
+        for bucket in self.buckets.values():
+            size += sum(rows.itemsize * len(rows) for rows in bucket.file_types.values())
+            # Tuples of a row and a keyword tuple, and of a row, a hash and the original row
+            size += sum(len(entries) for entries in bucket.sensitive_info.values()) * 120
+            size += len(bucket.duplicate_files) * 160
+        size += sum(len(rows) * rows.itemsize + 150 for rows in self.content_hashes.values())
+        return size
+
+    # Rendering
+
+    def _render_sensitive(self, row: int, keywords: Tuple[str, ...]) -> List[Any]:
+        if self.files.names[row] is None:
+            # Local scans list the matched keywords themselves
+            return list(keywords)
+        return [{
+            "file": self.files.ref(row),
+            "confidence": 0.8,
+            "explanation": f"Found {', '.join(keywords)}",
+            "categories": list(keywords)
+        }]
+
+    def _render_bucket(self, age_group: str) -> Dict[str, Any]:
+        bucket = self.buckets[age_group]
+        ref = self.files.ref
+        return {
+            "total_documents": bucket.total_documents,
+            "total_sensitive": bucket.total_sensitive,
+            "total_duplicates": bucket.total_duplicates,
+            "file_types": {k: [ref(row) for row in rows] for k, rows in bucket.file_types.items()},
+            "sensitive_info": {
+                k: [item for row, keywords in entries for item in self._render_sensitive(row, keywords)]
+                for k, entries in bucket.sensitive_info.items()
+            },
+            "duplicate_files": [
+                {"file": ref(row), "hash": content_hash, "duplicate_of": self.files.ids[original]}
+                for row, content_hash, original in bucket.duplicate_files
+            ]
+        }
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.buckets:
+            return self._render_bucket(key)
+        if key == "aggregates":
+            return self.aggregates.to_dict()
+        if key == "content_hashes":
+            return {h: [self.files.ids[row] for row in rows] for h, rows in self.content_hashes.items()}
+        if key in self._keys:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Render the full scan dict."""
+        return {key: self[key] for key in self._keys}
+
+    # Partial views
+
+    def summary(self) -> Dict[str, Any]:
+        """The scan dict with every file list replaced by its length."""
+        data = {}
+        for age_group, bucket in self.buckets.items():
+            data[age_group] = {
+                "total_documents": bucket.total_documents,
+                "total_sensitive": bucket.total_sensitive,
+                "total_duplicates": bucket.total_duplicates,
+                "file_types": {k: len(rows) for k, rows in bucket.file_types.items()},
+                "sensitive_info": {k: len(entries) for k, entries in bucket.sensitive_info.items()},
+                "duplicate_files": len(bucket.duplicate_files)
+            }
+        data.update({
+            "scan_complete": self.scan_complete,
+            "processed_files": self.processed_files,
+            "total_files": self.total_files,
+            "total_duplicates": self.total_duplicates,
+            "total_sensitive_files": self.total_sensitive_files,
+            "failed_files": len(self.failed_files),
+            "content_hashes": len(self.content_hashes),
+            "near_duplicates": len(self.near_duplicates),
+            "aggregates": self.aggregates.to_dict()
+        })
+        return data
+
+    def _section_entries(self, age_group: str, section: str, key: Optional[str]) -> Tuple[List, Any]:
+        """The raw entries of one per-bucket list and a function rendering one entry to items."""
+        bucket = self.buckets.get(age_group)
+        if bucket is None:
+            raise ValueError(f"Unknown age group: {age_group}")
+        if section == "duplicate_files":
+            return bucket.duplicate_files, lambda entry: [
+                {"file": self.files.ref(entry[0]), "hash": entry[1], "duplicate_of": self.files.ids[entry[2]]}
+            ]
+        lists = {"file_types": bucket.file_types, "sensitive_info": bucket.sensitive_info}.get(section)
+        if lists is None:
+            raise ValueError(f"Unknown section: {section}")
+        if key not in lists:
+            raise ValueError(f"Unknown {section} key: {key}")
+        if section == "file_types":
+            return lists[key], lambda row: [self.files.ref(row)]
+        return lists[key], lambda entry: self._render_sensitive(*entry)
+
+    def page(self, age_group: str, section: str, key: Optional[str] = None,
+             cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        """
+        One page of a per-bucket list, e.g. ("lessThanOneYear", "file_types", "documents").
+        Pass the returned next_cursor to get the following page; it is None on the last page.
+        """
+        entries, render = self._section_entries(age_group, section, key)
+        # Cursors are offsets this method handed out; anything else (negative, signed, spaced) is rejected
+        if cursor and not (cursor.isascii() and cursor.isdigit()):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        start = int(cursor) if cursor else 0
+        end = start + max(limit, 1)
+        items = [item for entry in entries[start:end] for item in render(entry)]
+        return {
+            "age_group": age_group,
+            "section": section,
+            "key": key,
+            "total": len(entries),
+            "items": items,
+            "next_cursor": str(end) if end < len(entries) else None
+        }
+
+    def iter_ndjson(self, chunk_size: int = NDJSON_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Render the result as newline-delimited JSON: a summary line first, then the
+        per-bucket lists in chunks, then the scan-wide lists. Nothing is rendered ahead.
+        """
+        yield json.dumps({"type": "summary", **self.summary()}) + "\n"
+        for age_group, bucket in self.buckets.items():
+            keyed = [("file_types", k) for k in bucket.file_types] + [("sensitive_info", k) for k in bucket.sensitive_info]
+            for section, key in keyed + [("duplicate_files", None)]:
+                entries, render = self._section_entries(age_group, section, key)
+                for start in range(0, len(entries), chunk_size):
+                    yield json.dumps({
+                        "type": "items",
+                        "age_group": age_group,
+                        "section": section,
+                        "key": key,
+                        "items": [item for entry in entries[start:start + chunk_size] for item in render(entry)]
+                    }) + "\n"
+        for key in ("content_hashes", "near_duplicates", "failed_files"):
+            yield json.dumps({"type": key, key: self[key]}) + "\n"
+        yield json.dumps({"type": "end"}) + "\n"
+
+def render_result(data: Any) -> Any:
+    """Render a value for a response: ScanResults are expanded, anything else is returned as is."""
+    return data.to_dict() if isinstance(data, ScanResult) else data
@@ -0,0 +1,34 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller starts the work,
+    later callers wait for it and share its result or exception.
+
+    The work runs as its own task, so a caller that disconnects or is cancelled
+    does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start fn() for a key, or return the task already running for it."""
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            logger.info(f"Joining work already in progress for {key}")
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await asyncio.shield(self.start(key, fn))
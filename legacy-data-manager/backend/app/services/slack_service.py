@@ -54,7 +54,17 @@ class SlackMessageTemplates:
         ]
         
         # Add cache status if applicable
-        if summary.get('is_cached'):
+        if summary.get('is_stale'):
+            blocks.append({
+                "type": "context",
+                "elements": [
+                    {
+                        "type": "mrkdwn",
+                        "text": "ℹ️ Showing results from an earlier analysis while a fresh scan runs"
+                    }
+                ]
+            })
+        elif summary.get('is_cached'):
             blocks.append({
                 "type": "context",
                 "elements": [
@@ -360,11 +370,12 @@ class SlackService:
 
         directory = " ".join(args)
         try:
-            # Start analysis in chat service
-            analysis_results = await self.chat_service.analyze_directory(directory)
+            # The summary view of the directory's scan has the fields the message reads
+            analysis_results = await self.chat_service.get_summary_stats(directory)
             
             # Create summary from results
             summary = self._create_analysis_summary(analysis_results)
+            summary['is_stale'] = self.chat_service.scan_cache.is_stale(directory)
             
             # Just point to the main dashboard
             dashboard_url = f"{self.dashboard_base_url}"
@@ -516,7 +527,7 @@ class SlackService:
         total_files = results.get('total_files', 0)
         sensitive_files = results.get('sensitive_files', 0)
         old_files = results.get('old_files', 0)
-        storage_used = results.get('storage_used', 0)
+        storage_used = results.get('storage_used_percentage', 0)
         
         # File type distribution
         file_types = results.get('file_types', {})
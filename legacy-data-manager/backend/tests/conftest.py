@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+import os
 import sys
 from pathlib import Path
 
@@ -7,6 +8,9 @@ from pathlib import Path
 backend_dir = Path(__file__).parent.parent
 sys.path.append(str(backend_dir))
 
+# Keep cached scan results in memory so test runs do not share them through a file
+os.environ.setdefault("SCAN_CACHE_BACKEND", "memory")
+
 from app.main import app
 
 @pytest.fixture
@@ -0,0 +1,52 @@
+import pytest
+from pathlib import Path
+import sys
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.cache_metrics import CacheMetrics, Histogram
+
+def test_histogram_buckets_are_cumulative():
+    """Each bucket counts the observations at or below its bound"""
+    histogram = Histogram(buckets=(1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+    assert histogram.cumulative() == [2, 3, 4]
+    assert histogram.count == 4
+    assert histogram.sum == 56.5
+
+def test_snapshot_counts_per_namespace():
+    """Lookups, evictions and bytes are reported per namespace with a hit ratio"""
+    metrics = CacheMetrics()
+    for result in ('hit', 'hit', 'stale', 'miss'):
+        metrics.record_lookup('scan', result)
+    metrics.record_eviction('scan', 'lru')
+    metrics.record_eviction('folder_partials', 'expired', 3)
+    metrics.observe_scan('scan', 2.0)
+    snapshot = metrics.snapshot({'scan': 100, 'summary': 10})
+    assert snapshot['scan']['hits'] == 2
+    assert snapshot['scan']['hit_ratio'] == 0.75
+    assert snapshot['scan']['evictions'] == {'lru': 1, 'expired': 0, 'unload': 0}
+    assert snapshot['scan']['scan_seconds']['buckets']['2.5'] == 1
+    assert snapshot['folder_partials']['evictions']['expired'] == 3
+    assert snapshot['summary'] == {
+        'hits': 0, 'stale': 0, 'misses': 0, 'hit_ratio': None,
+        'evictions': {'lru': 0, 'expired': 0, 'unload': 0}, 'bytes': 10,
+        'scan_seconds': snapshot['summary']['scan_seconds']
+    }
+
+def test_prometheus_text_format():
+    """The scrape output has typed metric families with namespace labels"""
+    metrics = CacheMetrics()
+    metrics.record_lookup('scan', 'miss')
+    metrics.observe_scan('scan', 0.2)
+    text = metrics.to_prometheus({'scan': 42})
+    assert "# TYPE scan_cache_lookups_total counter" in text
+    assert 'scan_cache_lookups_total{namespace="scan",result="miss"} 1' in text
+    assert 'scan_cache_bytes{namespace="scan"} 42' in text
+    assert 'scan_cache_scan_duration_seconds_bucket{namespace="scan",le="0.5"} 1' in text
+    assert 'scan_cache_scan_duration_seconds_bucket{namespace="scan",le="+Inf"} 1' in text
+    assert 'scan_cache_scan_duration_seconds_count{namespace="scan"} 1' in text
+    assert text.endswith("\n")
@@ -0,0 +1,121 @@
+import pytest
+from pathlib import Path
+import sys
+import asyncio
+from datetime import datetime
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services import cache_warmer as cache_warmer_module
+from app.services.cache_warmer import CacheWarmer
+from app.services.scan_cache_service import ScanCacheService
+
+class FakeDrive:
+    async def is_authenticated(self):
+        return True
+
+    async def list_directories(self, page_size=100):
+        return [{"id": "top1"}, {"id": "hot"}, {"id": "top2"}]
+
+@pytest.fixture
+def scan_cache():
+    scan_cache = ScanCacheService()
+    scan_cache.invalidate_cache()
+    yield scan_cache
+    scan_cache.invalidate_cache()
+
+@pytest.fixture
+def scans(monkeypatch):
+    scans = {"started": [], "running": 0, "peak": 0}
+
+    async def scan_files(source, path_or_drive_id):
+        scans["started"].append(path_or_drive_id)
+        scans["running"] += 1
+        scans["peak"] = max(scans["peak"], scans["running"])
+        await asyncio.sleep(0.01)
+        scans["running"] -= 1
+        return {"total_files": 0}
+
+    monkeypatch.setattr(cache_warmer_module, "scan_files", scan_files)
+    return scans
+
+def _warmer(scan_cache, **kwargs):
+    options = dict(interval=900, start_hour=1, end_hour=7, hot_folders=["hot"], concurrency=2, min_spacing=0)
+    options.update(kwargs)
+    return CacheWarmer(FakeDrive(), scan_cache, **options)
+
+def test_off_peak_window(scan_cache):
+    """The warming window includes its start hour, excludes its end hour and may wrap past midnight"""
+    warmer = _warmer(scan_cache, start_hour=22, end_hour=5)
+    for hour, expected in ((22, True), (3, True), (5, False), (12, False)):
+        warmer.now = lambda: datetime(2024, 1, 1, hour)
+        assert warmer.in_window() is expected
+
+def test_warming_scans_uncached_folders_within_budget(scan_cache, scans):
+    """Hot folders go first, fresh cache entries are skipped and the run stays within its budget"""
+    scan_cache.update_cache("top2", {"total_files": 1})
+    warmer = _warmer(scan_cache, concurrency=1, max_folders=1)
+    assert asyncio.run(warmer.warm_once()) == 1
+    assert scans["started"] == ["hot"]
+
+    warmer = _warmer(scan_cache)
+    assert asyncio.run(warmer.warm_once()) == 1
+    assert scans["started"] == ["hot", "top1"]
+    assert scan_cache.get_cached_result("top1") == {"total_files": 0}
+
+def test_warming_respects_concurrency(scan_cache, scans):
+    """No more scans than the concurrency budget run at once"""
+    assert asyncio.run(_warmer(scan_cache, concurrency=2).warm_once()) == 3
+    assert scans["peak"] == 2
+
+class CountingDrive(FakeDrive):
+    def __init__(self, folder_count):
+        self.folder_count = folder_count
+        self.calls = {"is_authenticated": 0, "list_directories": 0}
+
+    async def is_authenticated(self):
+        self.calls["is_authenticated"] += 1
+        return True
+
+    async def list_directories(self, page_size=100):
+        self.calls["list_directories"] += 1
+        return [{"id": f"top{i}"} for i in range(self.folder_count)]
+
+class FakeInventory:
+    def __init__(self, folder_count):
+        self.folder_count = folder_count
+        self.listed = 0
+        self.pace = None
+
+    async def is_fresh(self, folder_id='root'):
+        return self.listed > 0
+
+    async def sync(self, folder_id='root', pace=None):
+        self.pace = pace
+        for _ in range(self.folder_count):
+            await pace()
+            self.listed += 1
+        return self.folder_count
+
+def test_a_run_makes_a_bounded_number_of_drive_calls(scan_cache, scans):
+    """However many folders there are, a run lists them once and scans at most max_folders"""
+    drive = CountingDrive(folder_count=40)
+    warmer = CacheWarmer(drive, scan_cache, interval=900, start_hour=1, end_hour=7, max_folders=3, min_spacing=0)
+    assert asyncio.run(warmer.warm_once()) == 3
+    assert drive.calls == {"is_authenticated": 1, "list_directories": 1}
+    assert len(scans["started"]) == 3
+
+def test_inventory_sync_is_paced_and_budgeted(scan_cache, scans):
+    """A stale inventory sync takes one folder of the budget and paces each listing"""
+    inventory = FakeInventory(folder_count=4)
+    warmer = _warmer(scan_cache, max_folders=2, inventory=inventory)
+    assert asyncio.run(warmer.warm_once()) == 1
+    assert inventory.listed == 4
+    assert inventory.pace == warmer._pace
+    assert scans["started"] == ["hot"]
+
+    # The inventory is fresh now, so the next run spends its whole budget on scans
+    assert asyncio.run(warmer.warm_once()) == 2
+    assert inventory.listed == 4
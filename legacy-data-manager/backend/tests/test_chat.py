@@ -3,12 +3,17 @@ from fastapi.testclient import TestClient
 import sys
 from pathlib import Path
 import json
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
 
 # Add the backend directory to the Python path
 backend_dir = Path(__file__).parent.parent
 sys.path.append(str(backend_dir))
 
 from app.main import app
+from app.services.chat_service import ChatService
+from app.services.file_record import FileRecord
+from app.services.name_index import NameIndex
 
 client = TestClient(app)
 
@@ -74,6 +79,30 @@ def test_chat_find():
     # The response will either show matching files or indicate not authenticated
     assert any(x in data["content"].lower() for x in ["found", "authenticate"])
 
+def test_chat_find_ignores_partial_name_index():
+    """A name index holding only some listed folders does not answer whole-drive searches"""
+    partial = NameIndex()
+    partial.add("seen", "report seen earlier.pdf")
+    drive = Mock(is_authenticated=Mock(return_value=True))
+    drive.list_files.return_value = [{"id": "live", "name": "report from drive.pdf", "modifiedTime": "2024-01-01T00:00:00Z"}]
+    stale_inventory = Mock(is_fresh=AsyncMock(return_value=False))
+    fresh_inventory = Mock(is_fresh=AsyncMock(return_value=True), find=AsyncMock(return_value=[
+        FileRecord(id="synced", name="report from inventory.pdf", mime_type="application/pdf",
+                   modified_time="2024-01-01T00:00:00Z", modified_ts=0)
+    ]))
+    content_index = Mock(search=Mock(return_value=[]))
+
+    with patch("app.services.chat_service.get_name_index", return_value=partial), \
+         patch("app.services.chat_service.get_content_index", return_value=content_index):
+        from_drive = asyncio.run(ChatService(drive, stale_inventory)._handle_find("report"))["content"]
+        from_inventory = asyncio.run(ChatService(drive, fresh_inventory)._handle_find("report"))["content"]
+        partial.mark_covers_drive()
+        from_index = asyncio.run(ChatService(drive, fresh_inventory)._handle_find("report"))["content"]
+
+    assert "report from drive.pdf" in from_drive and "seen earlier" not in from_drive
+    assert "report from inventory.pdf" in from_inventory and "seen earlier" not in from_inventory
+    assert "report seen earlier.pdf" in from_index
+
 def test_chat_find_empty():
     """Test the find command with empty query"""
     response = client.post(
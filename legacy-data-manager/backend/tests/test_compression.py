@@ -0,0 +1,71 @@
+import pytest
+from pathlib import Path
+import sys
+import json
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.core.compression import CompressionMiddleware, accepted_encodings, HAS_BROTLI
+from app.core.responses import FastJSONResponse
+
+@pytest.fixture
+def client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    def large():
+        return {"files": [{"id": str(i), "name": f"report {i}.pdf"} for i in range(200)]}
+
+    @app.get("/small")
+    def small():
+        return {"cached": False}
+
+    @app.get("/stream")
+    def stream():
+        lines = (json.dumps({"line": i}) + "\n" for i in range(50))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+def test_large_responses_are_gzipped(client):
+    """Bodies over the threshold are compressed with a matching Content-Length"""
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()["files"]) == 200
+
+def test_small_or_unaccepted_responses_are_plain(client):
+    """Small bodies and clients without a supported encoding get the plain body"""
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert len(response.json()["files"]) == 200
+
+def test_streamed_lines_are_compressed(client):
+    """NDJSON streams are compressed chunk by chunk and decode to every line"""
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert [json.loads(line)["line"] for line in response.text.splitlines()] == list(range(50))
+
+@pytest.mark.skipif(not HAS_BROTLI, reason="brotli not installed")
+def test_brotli_is_preferred(client):
+    """Brotli wins over gzip unless the client refuses it"""
+    assert client.get("/large", headers={"Accept-Encoding": "gzip, br"}).headers["content-encoding"] == "br"
+    assert client.get("/large", headers={"Accept-Encoding": "br;q=0, gzip"}).headers["content-encoding"] == "gzip"
+
+def test_accepted_encodings():
+    """Encodings with q=0 are treated as refused"""
+    assert accepted_encodings("gzip, deflate, br;q=0") == {"gzip", "deflate"}
+    assert accepted_encodings("") == set()
+
+def test_fast_json_response_renders_non_string_keys():
+    """Integer keys and nested values render like the standard JSON response"""
+    body = FastJSONResponse({"counts": {2023: 4}, "names": ["a", "b"]}).body
+    assert json.loads(body) == {"counts": {"2023": 4}, "names": ["a", "b"]}
@@ -24,6 +24,16 @@ def test_google_drive_settings():
     assert len(settings.GOOGLE_DRIVE_SCOPES) > 0
     assert all(scope.startswith("https://www.googleapis.com/auth/drive") for scope in settings.GOOGLE_DRIVE_SCOPES)
 
+def test_data_paths_resolve_under_data_dir(tmp_path):
+    """Relative database paths land in DATA_DIR whatever the working directory; absolute ones are kept"""
+    data_dir = tmp_path / "data"
+    configured = settings.model_copy(update={"DATA_DIR": str(data_dir)})
+    assert configured.data_path(configured.SCAN_CACHE_PATH) == str(data_dir / configured.SCAN_CACHE_PATH)
+    assert data_dir.is_dir()
+    assert configured.data_path(str(tmp_path / "findings.db")) == str(tmp_path / "findings.db")
+    assert configured.data_path(":memory:") == ":memory:"
+    assert Path(settings.DATA_DIR).is_absolute()
+
 def test_file_paths():
     """Test file paths"""
     assert Path(settings.GOOGLE_DRIVE_CREDENTIALS_FILE).parent.exists()
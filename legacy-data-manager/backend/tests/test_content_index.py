@@ -0,0 +1,47 @@
+import pytest
+from pathlib import Path
+import sys
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.content_index import ContentIndex, fts_query
+
+@pytest.fixture
+def index():
+    index = ContentIndex()
+    index.add("f1", "Q3 budget.docx", "The quarterly budget includes salary costs for the team.", version="v1")
+    index.add("f2", "notes.txt", "Meeting notes: discuss the budget later.", version="v1")
+    index.add("f3", "holiday.txt", "Plan the office party.", version="v1")
+    index.commit()
+    yield index
+    index.close()
+
+def test_search_ranks_and_snippets(index):
+    """Matches are ranked, name hits first, with highlighted snippets"""
+    results = index.search("budget")
+    assert [r["id"] for r in results] == ["f1", "f2"]
+    assert "[budget]" in results[1]["snippet"]
+
+def test_search_requires_every_term(index):
+    """Every query term has to match"""
+    assert [r["id"] for r in index.search("budget salary")] == ["f1"]
+    assert [r["id"] for r in index.search("sal*")] == ["f1"]
+    assert index.search("") == []
+
+def test_versions_update_incrementally(index):
+    """Re-indexing a known version is skipped; a new version replaces the text"""
+    assert index.is_current("f3", "v1")
+    assert not index.add("f3", "holiday.txt", "Plan the office party.", version="v1")
+    assert index.add("f3", "holiday.txt", "Budget for the office party.", version="v2")
+    assert [r["id"] for r in index.search("party")] == ["f3"]
+    assert "f3" in [r["id"] for r in index.search("budget")]
+    assert len(index) == 3
+    index.remove("f3")
+    assert index.search("party") == []
+
+def test_fts_query_quotes_terms():
+    """Punctuation in user input is not parsed as query syntax"""
+    assert fts_query('report.pdf "draft') == '"report.pdf" """draft"'
+    assert fts_query("fin*") == '"fin"*'
@@ -0,0 +1,119 @@
+import pytest
+from pathlib import Path
+import sys
+import asyncio
+import time
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.db.database import Base
+from app.services.drive_inventory import DriveInventoryService
+from app.services.file_record import FileRecord
+from app.services.google_drive import GoogleDriveService
+from app.services.name_index import NameIndex
+
+NOW = int(time.time())
+DAY = 86400
+
+def _file(id, name, parent, age_days, mime="application/pdf", size=100):
+    return {
+        "id": id,
+        "name": name,
+        "mimeType": mime,
+        "modifiedTime": datetime.fromtimestamp(NOW - age_days * DAY, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "size": str(size),
+        "parents": [parent]
+    }
+
+TREE = {
+    "root": [
+        _file("f1", "Budget 2019.pdf", "ROOT_ID", 2000),
+        _file("d1", "Projects", "ROOT_ID", 10, mime="application/vnd.google-apps.folder", size=0),
+    ],
+    "d1": [
+        _file("f2", "budget_draft.pdf", "d1", 500, size=300),
+        _file("f3", "notes.txt", "d1", 5, mime="text/plain"),
+    ],
+}
+
+class FakeDriveService(GoogleDriveService):
+    def __init__(self):
+        pass
+
+    async def list_file_records(self, folder_id, page_size=100, recursive=False):
+        return [FileRecord.from_drive(file) for file in TREE.get(folder_id, [])]
+
+@pytest.fixture
+def inventory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    service = DriveInventoryService(FakeDriveService(), sessionmaker(bind=engine))
+    with patch("app.services.drive_inventory.get_name_index", return_value=NameIndex()):
+        assert asyncio.run(service.sync("root")) == 4
+    return service
+
+def test_sync_resolves_folder_aliases(inventory):
+    """Entries listed under 'root' can be queried by the alias and the real id"""
+    assert asyncio.run(inventory.covers("root"))
+    assert asyncio.run(inventory.covers("ROOT_ID"))
+    assert [r.id for r in asyncio.run(inventory.list_directory("root"))] == ["f1", "d1"]
+    assert [r.id for r in asyncio.run(inventory.list_directory("root", recursive=True))] == ["f1", "f2", "f3"]
+
+def test_resync_replaces_rows(inventory):
+    """Syncing again does not duplicate entries"""
+    assert asyncio.run(inventory.sync("d1")) == 2
+    assert [r.id for r in asyncio.run(inventory.list_directory("d1"))] == ["f2", "f3"]
+    assert [r.id for r in asyncio.run(inventory.list_directory("root", recursive=True))] == ["f1", "f2", "f3"]
+
+def test_inactive_and_find(inventory):
+    """Inactive files and name search are answered from the inventory"""
+    assert [r.id for r in asyncio.run(inventory.get_inactive_files(months_threshold=12))] == ["f2", "f1"]
+    assert [r.id for r in asyncio.run(inventory.find("BUDGET"))] == ["f2", "f1"]
+    assert asyncio.run(inventory.find("%")) == []
+
+def test_age_buckets(inventory):
+    """Age buckets are counted with one grouped query"""
+    buckets = asyncio.run(inventory.age_buckets(now_ts=NOW))
+    assert buckets["lessThanOneYear"] == {"count": 1, "size": 100}
+    assert buckets["oneToThreeYears"] == {"count": 1, "size": 300}
+    assert buckets["moreThanThreeYears"] == {"count": 1, "size": 100}
+    assert asyncio.run(inventory.age_buckets("d1", now_ts=NOW))["moreThanThreeYears"]["count"] == 0
+
+def test_categorize_from_inventory(inventory):
+    """Folder categorization uses the stored records"""
+    summary = asyncio.run(inventory.categorize_directory("d1"))["summary"]
+    assert summary["total_files"] == 2
+    assert summary["total_size"] == 400
+
+def test_freshness_follows_the_synced_scope(inventory):
+    """Only folders under a recently synced tree are answered from the inventory"""
+    assert asyncio.run(inventory.is_fresh("root"))
+    assert asyncio.run(inventory.is_fresh("ROOT_ID"))
+    assert asyncio.run(inventory.is_fresh("d1"))
+    assert not asyncio.run(inventory.is_fresh("elsewhere"))
+
+    inventory.max_age = timedelta(0)
+    assert not asyncio.run(inventory.is_fresh("root"))
+
+def test_subfolder_sync_does_not_cover_the_drive():
+    """Syncing one subfolder leaves whole-drive queries on the Drive API"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    service = DriveInventoryService(FakeDriveService(), sessionmaker(bind=engine))
+    name_index = NameIndex()
+    with patch("app.services.drive_inventory.get_name_index", return_value=name_index):
+        asyncio.run(service.sync("d1"))
+        assert asyncio.run(service.is_fresh("d1"))
+        assert not asyncio.run(service.is_fresh("root"))
+        assert not name_index.covers_drive
+
+        asyncio.run(service.sync("root"))
+        assert name_index.covers_drive
+        assert len(name_index) == 4
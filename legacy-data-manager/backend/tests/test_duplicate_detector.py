@@ -0,0 +1,57 @@
+import pytest
+from pathlib import Path
+import sys
+import hashlib
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.duplicate_detector import find_drive_duplicates, find_local_duplicates
+from app.services.file_record import FileRecord
+
+def _entries(*paths):
+    return [(str(p), p.stat().st_size) for p in paths]
+
+def test_find_drive_duplicates():
+    """Drive files are grouped by md5Checksum, oldest first"""
+    files = [
+        {"id": "b", "md5Checksum": "abc", "modifiedTime": "2023-01-01T00:00:00.000Z"},
+        {"id": "a", "md5Checksum": "abc", "modifiedTime": "2020-01-01T00:00:00.000Z"},
+        {"id": "c", "md5Checksum": "def", "modifiedTime": "2021-01-01T00:00:00.000Z"},
+        {"id": "d", "modifiedTime": "2021-01-01T00:00:00.000Z"},  # Google Doc, no checksum
+    ]
+    groups = find_drive_duplicates([FileRecord.from_drive(f) for f in files])
+    assert list(groups) == ["abc"]
+    assert [r.id for r in groups["abc"]] == ["a", "b"]
+
+def test_find_local_duplicates_small_files(tmp_path):
+    """Small files are settled by the head hash"""
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    c = tmp_path / "c.txt"
+    a.write_bytes(b"same content")
+    b.write_bytes(b"same content")
+    c.write_bytes(b"diff content")  # Same size, different bytes
+    groups = find_local_duplicates(_entries(a, b, c))
+    assert groups == {hashlib.md5(b"same content").hexdigest(): [str(a), str(b)]}
+
+def test_find_local_duplicates_large_files(tmp_path):
+    """Files sharing size and head are separated by the full hash"""
+    head = b"x" * 8192
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    c = tmp_path / "c.bin"
+    a.write_bytes(head + b"tail-1")
+    b.write_bytes(head + b"tail-1")
+    c.write_bytes(head + b"tail-2")
+    groups = find_local_duplicates(_entries(a, b, c))
+    assert groups == {hashlib.md5(head + b"tail-1").hexdigest(): [str(a), str(b)]}
+
+def test_find_local_duplicates_ignores_empty_files(tmp_path):
+    """Empty files are never reported as duplicates"""
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    a.write_bytes(b"")
+    b.write_bytes(b"")
+    assert find_local_duplicates(_entries(a, b)) == {}
@@ -0,0 +1,49 @@
+import pytest
+from pathlib import Path
+import sys
+import numpy as np
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.file_classifier import FileClassifier, age_codes, age_groups_by_code
+from app.services.file_record import age_group_for
+
+DAY = 86400
+NOW = 1_700_000_000
+
+TYPE_MAP = {"documents": ["docx", "txt"], "images": ["png"]}
+MIME_MAP = {"text/plain": "txt", "image/png": "png", "application/vnd.google-apps.folder": "folder"}
+
+def test_age_codes_match_age_group_for():
+    """Vectorized age buckets agree with the per-file helper at every boundary"""
+    ages = np.array([0, 365, 366, 1095, 1096, 5000, -3])
+    modified = NOW - ages * DAY - 10
+    codes = age_codes(modified, NOW)
+    assert [age_groups_by_code[c] for c in codes] == [age_group_for(ts, NOW) for ts in modified]
+
+def test_extension_lookup():
+    """Extensions map to categories through a dict, unknown ones to others"""
+    classifier = FileClassifier(TYPE_MAP, MIME_MAP)
+    assert classifier.file_type("txt") == "documents"
+    assert classifier.file_type("exe") == "others"
+    assert classifier.file_type(None) == "others"
+
+def test_classify_batch():
+    """MIME codes decide the type, falling back to the name when the MIME type is unmapped"""
+    classifier = FileClassifier(TYPE_MAP, MIME_MAP)
+    mime_types = ["text/plain", "image/png", "application/octet-stream", "application/vnd.google-apps.folder"]
+    names = ["a", "b", "scan.PNG", "folder.docx"]
+    result = classifier.classify(
+        np.array([NOW, NOW - 400 * DAY, NOW - 2000 * DAY, NOW]),
+        np.array([10, 20, 30, 40]),
+        classifier.encode_mime_types(mime_types),
+        NOW,
+        names=names
+    )
+    assert [classifier.type_names[c] for c in result.type_codes] == ["documents", "images", "images", "others"]
+    assert result.counts.sum() == 4
+    images = classifier.type_names.index("images")
+    assert result.sizes[:, images].tolist() == [0, 20, 30]
+    assert classifier.mime_codes["image/png"] == 1
@@ -0,0 +1,49 @@
+import pytest
+from pathlib import Path
+import sys
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.file_record import FileRecord, age_group_for, parse_drive_time
+
+DAY = 86400
+
+def test_from_drive_parses_metadata_once():
+    """Timestamps, size and owner are parsed into typed fields"""
+    record = FileRecord.from_drive({
+        "id": "f1",
+        "name": "report.pdf",
+        "mimeType": "application/pdf",
+        "modifiedTime": "2024-01-31T10:00:00.000Z",
+        "size": "2048",
+        "owners": [{"emailAddress": "Jane@GRBG.com", "displayName": "Jane"}],
+        "md5Checksum": "abc",
+        "parents": ["root"]
+    })
+    assert record.modified_ts == parse_drive_time("2024-01-31T10:00:00Z") == 1706695200
+    assert record.size == 2048
+    assert record.owner_email == "jane@grbg.com"
+    assert record.parents == ("root",)
+    assert record.to_dict()["modifiedTime"] == "2024-01-31T10:00:00.000Z"
+
+def test_from_drive_defaults():
+    """Google Workspace files without size, checksum or owners still parse"""
+    record = FileRecord.from_drive({"id": "f2", "mimeType": "application/vnd.google-apps.folder"})
+    assert record.size == 0
+    assert record.md5 is None
+    assert record.owner_name == "Unknown"
+    assert record.is_folder
+
+@pytest.mark.parametrize("age_days, expected", [
+    (0, "lessThanOneYear"),
+    (365, "lessThanOneYear"),
+    (366, "oneToThreeYears"),
+    (1095, "oneToThreeYears"),
+    (1096, "moreThanThreeYears"),
+])
+def test_age_group_for(age_days, expected):
+    """Age buckets use whole days since modification"""
+    now = 1_700_000_000
+    assert age_group_for(now - age_days * DAY, now) == expected
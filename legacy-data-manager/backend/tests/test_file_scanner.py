@@ -0,0 +1,107 @@
+import pytest
+from pathlib import Path
+import sys
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services import file_scanner_with_json as file_scanner
+from app.services.file_scanner_with_json import scan_text, scan_bytes, scan_file_bytes, scan_files, age_groups
+
+SAMPLE_TEXT = (
+    "CONFIDENTIAL - Trade Secret\n"
+    "Employee salary review, SSN: 123-45-6789\n"
+    "Contact jane.doe@example.com about the Contract terms.\n"
+)
+
+def test_scan_bytes_matches_scan_text():
+    """Bytes-mode scanning should report the same findings as text scanning"""
+    assert scan_bytes(SAMPLE_TEXT.encode()) == scan_text(SAMPLE_TEXT)
+
+def test_scan_bytes_is_case_insensitive():
+    """Keywords should match regardless of case without lowercasing the buffer"""
+    findings = scan_bytes(b"PAYMENT overdue on INVOICE 42")
+    assert findings == {"financial": ["invoice", "payment"]}
+
+def test_scan_bytes_no_findings():
+    """Clean text should produce no findings"""
+    assert scan_bytes(b"nothing to see here") == {}
+
+def test_scan_file_bytes(tmp_path):
+    """Local plain-text files are scanned through an mmap"""
+    log_file = tmp_path / "server.log"
+    log_file.write_bytes(SAMPLE_TEXT.encode() * 1000)
+    assert scan_file_bytes(str(log_file)) == scan_text(SAMPLE_TEXT)
+
+def test_scan_file_bytes_empty_file(tmp_path):
+    """Empty files cannot be mapped and are reported as having no content"""
+    empty_file = tmp_path / "empty.txt"
+    empty_file.write_bytes(b"")
+    assert scan_file_bytes(str(empty_file)) is None
+
+def _sorted_result(results):
+    results = results.to_dict()
+    for age_group in age_groups:
+        for items in results[age_group]["file_types"].values():
+            items.sort()
+        for items in results[age_group]["sensitive_info"].values():
+            items.sort()
+    results["near_duplicates"] = sorted(sorted(cluster) for cluster in results["near_duplicates"])
+    return results
+
+def test_multi_core_scan_matches_sequential(tmp_path):
+    """Merged per-worker partial results equal an in-process scan"""
+    for i in range(10):
+        folder = tmp_path / f"folder{i % 3}"
+        folder.mkdir(exist_ok=True)
+        (folder / f"note{i}.txt").write_text(SAMPLE_TEXT if i % 2 else f"plain note number {i}")
+    (tmp_path / "picture.bin").write_bytes(b"not extracted")
+
+    sequential = asyncio.run(scan_files(source="local", path_or_drive_id=str(tmp_path), workers=1))
+    parallel = asyncio.run(scan_files(source="local", path_or_drive_id=str(tmp_path), workers=2))
+    assert _sorted_result(parallel) == _sorted_result(sequential)
+    assert sequential["total_files"] == 11
+    assert sequential["processed_files"] == 10
+    assert sequential["total_sensitive_files"] == 5
+
+class TrackingExecutor(ThreadPoolExecutor):
+    """Stands in for the process pool and records how many batches were queued at once."""
+    instances = []
+
+    def __init__(self, max_workers, mp_context):
+        super().__init__(max_workers=max_workers)
+        self.start_method = mp_context.get_start_method()
+        self.queued = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        TrackingExecutor.instances.append(self)
+
+    def submit(self, fn, *args, **kwargs):
+        with self.lock:
+            self.queued += 1
+            self.peak = max(self.peak, self.queued)
+        future = super().submit(fn, *args, **kwargs)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self.lock:
+            self.queued -= 1
+
+def test_multi_core_scan_bounds_batches_in_flight(tmp_path, monkeypatch):
+    """Workers are spawned and the walk waits once each worker has its share of batches queued"""
+    for i in range(30):
+        (tmp_path / f"note{i}.txt").write_text(SAMPLE_TEXT if i % 2 else f"plain note number {i}")
+    monkeypatch.setattr(file_scanner, "ProcessPoolExecutor", TrackingExecutor)
+    monkeypatch.setattr(file_scanner, "LOCAL_SCAN_BATCH_SIZE", 1)
+
+    results = asyncio.run(scan_files(source="local", path_or_drive_id=str(tmp_path), workers=2))
+    executor = TrackingExecutor.instances[-1]
+    assert executor.start_method == "spawn"
+    assert executor.peak <= 2 * file_scanner.LOCAL_SCAN_BATCHES_PER_WORKER
+    assert results["processed_files"] == 30
+    assert results["total_sensitive_files"] == 15
@@ -0,0 +1,42 @@
+import pytest
+from pathlib import Path
+import sys
+import numpy as np
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.findings_store import FindingsStore
+
+@pytest.fixture
+def store():
+    store = FindingsStore()
+    yield store
+    store.close()
+
+def test_lookup_returns_matching_versions(store):
+    """Stored findings are returned while the file version and rules are unchanged"""
+    signature = np.arange(4, dtype=np.uint32)
+    store.put("a", "v1", "rules", {"pii": ["ssn"]}, signature)
+    store.put("b", "v1", "rules", {}, None)
+    store.commit()
+    found = store.lookup({"a": "v1", "b": "v1", "c": "v1"}, "rules")
+    assert set(found) == {"a", "b"}
+    assert found["a"].findings == {"pii": ["ssn"]}
+    assert np.array_equal(found["a"].signature, signature)
+    assert found["b"].signature is None
+
+def test_changed_version_or_rules_miss(store):
+    """A new file version or new scan rules make the stored findings stale"""
+    store.put("a", "v1", "rules", {"pii": ["ssn"]}, None)
+    assert store.lookup({"a": "v2"}, "rules") == {}
+    assert store.lookup({"a": "v1"}, "other-rules") == {}
+
+def test_lookup_spans_chunks(store):
+    """Lookups larger than one query's parameter limit return every match"""
+    for i in range(1200):
+        store.put(str(i), "v", "rules", {}, None)
+    assert len(store.lookup({str(i): "v" for i in range(1200)}, "rules")) == 1200
+    store.remove(["0", "1"])
+    assert len(store) == 1198
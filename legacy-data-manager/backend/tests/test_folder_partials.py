@@ -0,0 +1,136 @@
+import pytest
+from pathlib import Path
+import sys
+import asyncio
+from datetime import timedelta
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.file_record import FileRecord
+from app.services.folder_partials import FolderPartialCache
+from app.services.scan_cache_backend import MemoryCacheBackend
+from app.services.content_index import ContentIndex
+from app.services.findings_store import FindingsStore
+from app.services.near_duplicate_index import NearDuplicateIndex
+from app.services.file_scanner_with_json import collect_folder_partials
+
+FOLDER = "application/vnd.google-apps.folder"
+DOC = "application/vnd.google-apps.document"
+
+def _entry(file_id, mime_type):
+    return {"id": file_id, "name": file_id, "mimeType": mime_type, "modifiedTime": "2020-01-01T00:00:00.000Z"}
+
+TREE = {
+    "parent": [_entry("child", FOLDER), _entry("p1", DOC)],
+    "child": [_entry("grandchild", FOLDER), _entry("c1", DOC)],
+    "grandchild": [_entry("g1", DOC)],
+}
+
+class FakeDrive:
+    def __init__(self, failing=()):
+        self.listed = []
+        self.downloaded = []
+        self.failing = set(failing)
+
+    async def list_file_records(self, folder_id, page_size=100, recursive=False):
+        self.listed.append(folder_id)
+        return [FileRecord.from_drive(entry) for entry in TREE[folder_id]]
+
+    async def get_file_content(self, file_id):
+        self.downloaded.append(file_id)
+        if file_id in self.failing:
+            # Like GoogleDriveService, download errors come back as empty content
+            return ""
+        return f"salary details for {file_id}"
+
+@pytest.fixture
+def folder_partials():
+    return FolderPartialCache(MemoryCacheBackend(max_bytes=1 << 20), ttl=timedelta(minutes=60))
+
+def _collect(drive, folder_id, folder_partials, findings_store=None):
+    content_index = ContentIndex()
+    if findings_store is None:
+        findings_store = FindingsStore()
+    try:
+        return asyncio.run(collect_folder_partials(
+            drive, folder_id, folder_partials, NearDuplicateIndex(), content_index, findings_store
+        ))
+    finally:
+        content_index.close()
+
+def test_parent_scan_reuses_child_partials(folder_partials):
+    """Scanning a parent only lists and downloads folders not scanned before"""
+    drive = FakeDrive()
+    _collect(drive, "child", folder_partials)
+    assert drive.listed == ["child", "grandchild"]
+
+    drive = FakeDrive()
+    partials = _collect(drive, "parent", folder_partials)
+    assert drive.listed == ["parent"]
+    assert drive.downloaded == ["p1"]
+    assert [record.id for partial in partials for record in partial.records] == ["p1", "c1", "g1"]
+    assert partials[2].findings["g1"] == {"financial": ["salary"]}
+    assert "g1" in partials[2].signatures
+
+def test_invalidation_covers_the_subtree(folder_partials):
+    """Invalidating a folder drops its partial and those of its subfolders"""
+    _collect(FakeDrive(), "parent", folder_partials)
+    folder_partials.invalidate("child")
+    drive = FakeDrive()
+    _collect(drive, "parent", folder_partials)
+    assert drive.listed == ["child", "grandchild"]
+
+def test_expired_partials_are_rescanned(folder_partials):
+    """Partials older than the TTL are scanned again"""
+    _collect(FakeDrive(), "grandchild", folder_partials)
+    folder_partials.backend.get("grandchild")['last_scan'] -= timedelta(hours=2)
+    drive = FakeDrive()
+    _collect(drive, "grandchild", folder_partials)
+    assert drive.listed == ["grandchild"]
+
+def test_reused_partials_keep_their_scan_time(folder_partials):
+    """Partials reused by a parent scan report when their folder was actually listed"""
+    _collect(FakeDrive(), "child", folder_partials)
+    folder_partials.backend.get("grandchild")['last_scan'] -= timedelta(minutes=30)
+    partials = _collect(FakeDrive(), "parent", folder_partials)
+    scanned_at = {partial.folder_id: partial.scanned_at for partial in partials}
+    assert scanned_at["grandchild"] == min(scanned_at.values())
+    assert scanned_at["parent"] - scanned_at["grandchild"] >= timedelta(minutes=30)
+
+def test_rescan_downloads_only_changed_files(folder_partials):
+    """A rescan reuses stored findings and only downloads files whose version changed"""
+    findings_store = FindingsStore()
+    _collect(FakeDrive(), "child", folder_partials, findings_store)
+    folder_partials.invalidate()
+    TREE["child"][1] = {**TREE["child"][1], "modifiedTime": "2021-01-01T00:00:00.000Z"}
+    try:
+        drive = FakeDrive()
+        partials = _collect(drive, "child", folder_partials, findings_store)
+    finally:
+        TREE["child"][1] = _entry("c1", DOC)
+    assert drive.downloaded == ["c1"]
+    assert partials[1].findings["g1"] == {"financial": ["salary"]}
+    assert "g1" in partials[1].signatures
+
+def test_failed_downloads_are_retried(folder_partials):
+    """A file whose download failed is fetched again by the next scan instead of being stored as clean"""
+    findings_store = FindingsStore()
+    _collect(FakeDrive(failing=["g1"]), "grandchild", folder_partials, findings_store)
+    assert len(findings_store) == 0
+    folder_partials.invalidate()
+    drive = FakeDrive()
+    partials = _collect(drive, "grandchild", folder_partials, findings_store)
+    assert drive.downloaded == ["g1"]
+    assert partials[0].findings["g1"] == {"financial": ["salary"]}
+
+def test_large_partials_are_kept_compressed():
+    """Partials over the compression threshold are stored compressed and read back intact"""
+    folder_partials = FolderPartialCache(
+        MemoryCacheBackend(max_bytes=1 << 20, compress_threshold=1, hot_bytes=1 << 20), ttl=timedelta(minutes=60)
+    )
+    _collect(FakeDrive(), "child", folder_partials)
+    assert folder_partials.backend.memory_usage()['compressed_entries'] == 2
+    folder_partials.backend._hot.clear()
+    assert folder_partials.get("grandchild").findings["g1"] == {"financial": ["salary"]}
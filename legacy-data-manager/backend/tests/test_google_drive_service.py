@@ -1,6 +1,7 @@
 import pytest
 from pathlib import Path
 import sys
+import asyncio
 from unittest.mock import Mock, patch
 
 # Add the backend directory to the Python path
@@ -46,6 +47,23 @@ def test_list_files(drive_service):
         # If not authenticated, should raise an exception
         assert "credentials" in str(e).lower()
 
+def test_list_directory_follows_page_tokens(drive_service):
+    """Folder listings keep requesting pages until there is no nextPageToken"""
+    pages = {
+        None: {"files": [{"id": "a"}], "nextPageToken": "p2"},
+        "p2": {"files": [{"id": "b"}], "nextPageToken": "p3"},
+        "p3": {"files": [{"id": "c"}]},
+    }
+    drive_service.service = Mock()
+    drive_service.service.files.return_value.list.side_effect = (
+        lambda **kwargs: Mock(execute=Mock(return_value=pages[kwargs["pageToken"]]))
+    )
+
+    files = asyncio.run(drive_service.list_directory("folder", page_size=1))
+
+    assert [file["id"] for file in files] == ["a", "b", "c"]
+    assert drive_service.service.files.return_value.list.call_count == 3
+
 def test_get_inactive_files(drive_service):
     """Test getting inactive files"""
     try:
@@ -0,0 +1,47 @@
+import pytest
+from pathlib import Path
+import sys
+import os
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.local_walker import walk_local_files, file_extension
+
+@pytest.fixture
+def tree(tmp_path):
+    """A small directory tree with nested folders"""
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "report.PDF").write_bytes(b"12345")
+    (tmp_path / "a" / "notes.txt").write_bytes(b"hello")
+    (tmp_path / "a" / "b" / "movie.mp4").write_bytes(b"")
+    (tmp_path / "a" / "b" / "Makefile").write_bytes(b"all:")
+    return tmp_path
+
+def test_walk_matches_os_walk(tree):
+    """The parallel walker finds the same files as os.walk"""
+    expected = {os.path.join(root, f) for root, _, files in os.walk(tree) for f in files}
+    assert {entry.path for entry in walk_local_files(str(tree), max_workers=2)} == expected
+
+def test_walk_reports_stat(tree):
+    """Entries carry the size and extension from the directory scan"""
+    entries = {Path(entry.path).name: entry for entry in walk_local_files(str(tree))}
+    assert entries["report.PDF"].size == 5
+    assert entries["report.PDF"].ext == "pdf"
+    assert entries["Makefile"].ext == ""
+
+def test_walk_filters_extensions(tree):
+    """Only files with the requested extensions are yielded"""
+    names = {Path(entry.path).name for entry in walk_local_files(str(tree), extensions={"txt", "pdf"})}
+    assert names == {"report.PDF", "notes.txt"}
+
+def test_walk_missing_directory(tmp_path):
+    """A missing root yields nothing instead of raising"""
+    assert list(walk_local_files(str(tmp_path / "missing"))) == []
+
+def test_file_extension():
+    """Extensions are lowercased and empty when there is no dot"""
+    assert file_extension("Budget.XLSX") == "xlsx"
+    assert file_extension("archive.tar.gz") == "gz"
+    assert file_extension("README") == ""
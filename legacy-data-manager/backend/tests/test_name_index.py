@@ -0,0 +1,61 @@
+import pytest
+from pathlib import Path
+import sys
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.name_index import NameIndex
+
+@pytest.fixture
+def index():
+    index = NameIndex()
+    for file_id, name in [
+        ("1", "Quarterly Report.pdf"),
+        ("2", "report.docx"),
+        ("3", "annual_report_2023.xlsx"),
+        ("4", "misreported figures.txt"),
+        ("5", "Budget.xlsx"),
+    ]:
+        index.add(file_id, name)
+    return index
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+def test_substring_matches_are_ranked(index):
+    """Prefix matches come first, then word starts, then matches inside a word"""
+    assert _ids(index.search("report", fuzzy=False)) == ["2", "1", "3", "4"]
+    assert _ids(index.search("REPORT", limit=2, fuzzy=False)) == ["2", "1"]
+
+def test_short_queries_match_word_starts(index):
+    """One and two character queries match the start of words only"""
+    assert _ids(index.search("bu")) == ["5"]
+    assert _ids(index.search("q")) == ["1"]
+    assert index.search("ep") == []
+
+def test_fuzzy_matches_fill_remaining_places(index):
+    """Names sharing most trigrams are returned after the substring matches"""
+    results = index.search("budgat.xlsx")
+    assert _ids(results)[0] == "5"
+    assert results[0]["score"] < 1.0
+
+def test_renames_and_removals(index):
+    """Renaming or removing a file updates its entry"""
+    index.add("2", "minutes.docx")
+    assert "2" not in _ids(index.search("report", fuzzy=False))
+    assert _ids(index.search("minutes")) == ["2"]
+    index.remove("5")
+    assert index.search("budget", fuzzy=False) == []
+    assert len(index) == 4
+
+def test_compaction_keeps_live_names():
+    """Rebuilding the postings after many renames keeps every live name"""
+    index = NameIndex()
+    for version in range(5):
+        for file_id in range(10):
+            index.add(str(file_id), f"draft {file_id} v{version}.txt")
+    assert len(index) == 10
+    assert len(index.ids) < 30
+    assert _ids(index.search("draft 3 v4", fuzzy=False)) == ["3"]
@@ -0,0 +1,60 @@
+import pytest
+from pathlib import Path
+import sys
+import random
+import time
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.near_duplicate_index import NearDuplicateIndex
+
+WORDS = [f"word{i}" for i in range(2000)]
+
+def _document(seed, length=400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+def test_near_duplicates_are_clustered():
+    """A lightly edited copy clusters with its original, unrelated documents do not"""
+    index = NearDuplicateIndex(threshold=0.8)
+    original = _document(1)
+    edited = original.replace(original.split()[10], "FINAL", 1)
+    index.add("v2_final", original)
+    index.add("v2_final_FINAL", edited)
+    index.add("unrelated", _document(2))
+    assert index.clusters() == [["v2_final", "v2_final_FINAL"]]
+    assert index.similarity("v2_final", "v2_final_FINAL") >= 0.8
+
+def test_bytes_and_text_share_signatures():
+    """Text and bytes buffers of the same content produce the same signature"""
+    index = NearDuplicateIndex()
+    text = _document(3)
+    assert (index.signature(text) == index.signature(text.upper().encode())).all()
+
+def test_add_skips_empty_and_repeated_documents():
+    """Documents without words and keys that are already indexed are ignored"""
+    index = NearDuplicateIndex()
+    assert index.add("a", _document(4))
+    assert not index.add("a", _document(5))
+    assert not index.add("empty", "  ...  ")
+    assert len(index) == 1
+    assert index.clusters() == []
+
+def test_many_identical_copies_form_one_cluster():
+    """Thousands of identical signatures are joined without comparing every pair"""
+    index = NearDuplicateIndex()
+    signature = index.signature(_document(6))
+    for i in range(3000):
+        index.add_signature(f"copy{i}", signature.copy())
+    index.add("other", _document(7))
+    start = time.perf_counter()
+    clusters = index.clusters()
+    assert clusters == [[f"copy{i}" for i in range(3000)]]
+    assert time.perf_counter() - start < 5
+
+def test_invalid_threshold():
+    """Thresholds outside (0, 1] are rejected"""
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(threshold=0)
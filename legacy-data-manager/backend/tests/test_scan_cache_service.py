@@ -0,0 +1,270 @@
+import pytest
+from pathlib import Path
+import sys
+import asyncio
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.scan_cache_service import ScanCacheService
+from app.services.scan_cache_backend import MemoryCacheBackend, SQLiteCacheBackend, create_cache_backend
+from app.services.single_flight import SingleFlight
+from app.services.scan_result import ScanResult
+from app.services.cache_metrics import CacheMetrics
+from app.core.responses import etag_matches
+
+@pytest.fixture
+def scan_cache():
+    scan_cache = ScanCacheService()
+    scan_cache.invalidate_cache()
+    yield scan_cache
+    scan_cache.invalidate_cache()
+
+def _result():
+    result = ScanResult(["documents"], ["pii"])
+    result.add_file("moreThanThreeYears", "documents", "1", "report.pdf", size=100)
+    return result
+
+def test_etag_changes_with_each_update(scan_cache):
+    """Every cache update gets a new ETag; invalidated targets have none"""
+    assert scan_cache.get_etag("folder") is None
+    scan_cache.update_cache("folder", _result())
+    first = scan_cache.get_etag("folder")
+    assert first.startswith('W/"')
+    assert scan_cache.get_etag("folder") == first
+    scan_cache.update_cache("folder", _result())
+    assert scan_cache.get_etag("folder") != first
+    scan_cache.invalidate_cache("folder")
+    assert scan_cache.get_etag("folder") is None
+
+def test_results_are_dated_by_their_oldest_part(scan_cache):
+    """A result assembled from earlier folder scans expires with the oldest of them"""
+    result = _result()
+    result.scanned_at = datetime.utcnow() - scan_cache.cache_ttl - timedelta(minutes=1)
+    scan_cache.update_cache("folder", result)
+    assert scan_cache.get_cache_entry("folder")["last_scan"] == result.scanned_at
+    assert scan_cache.lookup("folder")[1] == "stale"
+
+def test_etag_matching():
+    """If-None-Match uses weak comparison and accepts lists and *"""
+    assert etag_matches('W/"1a"', 'W/"1a"')
+    assert etag_matches('"1a"', 'W/"1a"')
+    assert etag_matches('W/"0f", W/"1a"', 'W/"1a"')
+    assert etag_matches("*", 'W/"1a"')
+    assert not etag_matches('W/"1b"', 'W/"1a"')
+
+def test_conditional_get_returns_304(client, scan_cache):
+    """Cache endpoints answer a matching If-None-Match with an empty 304"""
+    scan_cache.update_cache("folder", _result())
+    response = client.get("/api/v1/cache/debug/folder")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag == scan_cache.get_etag("folder")
+
+    unchanged = client.get("/api/v1/cache/check/folder", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    scan_cache.update_cache("folder", _result())
+    assert client.get("/api/v1/cache/debug/folder", headers={"If-None-Match": etag}).status_code == 200
+
+def test_sqlite_backend_survives_restarts(tmp_path):
+    """Entries written by one backend are read back by another on the same file"""
+    path = str(tmp_path / "scan_cache.db")
+    writer = SQLiteCacheBackend(path, max_bytes=1 << 20)
+    entry = {'last_scan': datetime.utcnow(), 'data': _result(), 'version': 7}
+    writer.set("folder", entry)
+
+    reader = SQLiteCacheBackend(path, max_bytes=1 << 20)
+    loaded = reader.get("folder")
+    assert loaded['version'] == 7
+    assert loaded['last_scan'] == entry['last_scan']
+    assert loaded['data'].to_dict() == entry['data'].to_dict()
+    assert reader.get("folder") is loaded
+    assert list(reader.metadata()) == ["folder"]
+
+    writer.delete("folder")
+    assert reader.get("folder") is None
+
+def test_lru_evicts_least_recently_used():
+    """Entries past the byte ceiling are evicted oldest-use first"""
+    backend = MemoryCacheBackend(max_bytes=250)
+    for target_id in ("a", "b"):
+        backend.set(target_id, {'last_scan': datetime.utcnow(), 'data': {}, 'version': 1, 'size': 100})
+    backend.get("a")
+    backend.set("c", {'last_scan': datetime.utcnow(), 'data': {}, 'version': 1, 'size': 100})
+    assert sorted(backend.metadata()) == ["a", "c"]
+    assert backend.memory_usage()['memory_bytes'] == 200
+    assert backend.memory_usage()['lru_evictions'] == 1
+
+def test_large_entries_are_kept_compressed():
+    """Entries over the threshold are stored compressed and decompressed once into the hot LRU"""
+    backend = MemoryCacheBackend(max_bytes=1 << 20, compress_threshold=1000, hot_bytes=1 << 20)
+    result = _result()
+    backend.set("big", {'last_scan': datetime.utcnow(), 'data': result, 'version': 1, 'size': 5000})
+    backend.set("small", {'last_scan': datetime.utcnow(), 'data': {}, 'version': 1, 'size': 10})
+    usage = backend.memory_usage()
+    assert usage['compressed_entries'] == 1
+    assert backend.metadata()["big"][2] == 5000
+
+    backend.clear()
+    backend.set("big", {'last_scan': datetime.utcnow(), 'data': result, 'version': 2, 'size': 5000})
+    backend._hot.clear()
+    loaded = backend.get("big")
+    assert loaded['data'].to_dict() == result.to_dict()
+    assert loaded['size'] == 5000
+    assert backend.get("big") is loaded
+    backend.delete("big")
+    assert backend.get("big") is None
+    assert backend.memory_usage()['decompressed_entries'] == 0
+
+def test_sweep_frees_expired_entries(scan_cache):
+    """The sweeper removes entries past the grace period and counts them on the status"""
+    scan_cache.update_cache("old", _result())
+    scan_cache.update_cache("new", _result())
+    scan_cache.backend.get("old")['last_scan'] -= scan_cache.cache_ttl + scan_cache.stale_grace + timedelta(minutes=1)
+    expired_before = scan_cache.expired_evictions
+    assert scan_cache.sweep() == 1
+    status = scan_cache.get_cache_status()
+    assert list(status['directories']) == ["new"]
+    assert status['directories']['new']['size_bytes'] > 0
+    assert status['evictions']['expired'] == expired_before + 1
+
+def test_concurrent_scans_are_coalesced(scan_cache):
+    """Callers asking for the same target while it is scanned share one scan"""
+    calls = []
+
+    async def scan():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return _result()
+
+    async def run():
+        return await asyncio.gather(*(scan_cache.get_or_scan("folder", scan) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert scan_cache.get_cached_result("folder") is results[0]
+    assert not scan_cache.flights.in_flight("folder")
+
+def test_failed_scans_reach_every_caller():
+    """An exception from the shared work is raised in every waiting caller"""
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("quota exceeded")
+
+    async def run():
+        return await asyncio.gather(*(flights.do("folder", fail) for _ in range(3)), return_exceptions=True)
+
+    assert [str(e) for e in asyncio.run(run())] == ["quota exceeded"] * 3
+
+def test_stale_results_are_served_while_refreshing(scan_cache):
+    """An expired result inside the grace period is returned at once and rescanned in the background"""
+    scan_cache.update_cache("folder", _result())
+    stale = scan_cache.get_cached_result("folder")
+    scan_cache.backend.get("folder")['last_scan'] -= scan_cache.cache_ttl + timedelta(minutes=1)
+    assert scan_cache.get_cached_result("folder") is None
+    assert scan_cache.is_stale("folder")
+    refreshed = _result()
+
+    async def scan():
+        await asyncio.sleep(0.01)
+        return refreshed
+
+    async def run():
+        served = await scan_cache.get_or_scan("folder", scan)
+        assert scan_cache.flights.in_flight("folder")
+        # Joining the refresh gives the new result
+        assert await scan_cache.flights.do("folder", scan) is refreshed
+        return served
+
+    assert asyncio.run(run()) is stale
+    assert scan_cache.get_cached_result("folder") is refreshed
+    assert not scan_cache.is_stale("folder")
+
+def test_results_past_the_grace_period_are_dropped(scan_cache):
+    """Entries older than the TTL plus the grace period are not served even as stale"""
+    scan_cache.update_cache("folder", _result())
+    scan_cache.backend.get("folder")['last_scan'] -= scan_cache.cache_ttl + scan_cache.stale_grace + timedelta(minutes=1)
+    assert scan_cache.get_cached_result("folder", allow_stale=True) is None
+    assert scan_cache.get_cache_entry("folder") is None
+
+def test_views_are_derived_from_one_scan(scan_cache):
+    """Views of a target share its cached scan and are derived again only when it changes"""
+    scans, derivations = [], []
+
+    async def scan():
+        scans.append(1)
+        return _result()
+
+    def derive(result):
+        derivations.append(1)
+        return {'total_files': len(result.files)}
+
+    async def run():
+        first = await scan_cache.get_view('summary', 'folder', scan, derive)
+        second = await scan_cache.get_view('summary', 'folder', scan, derive)
+        await scan_cache.get_view('risks', 'folder', scan, derive)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == {'total_files': 1}
+    assert len(scans) == 1
+    assert len(derivations) == 2
+    assert scan_cache.get_cached_directories() == ['folder']
+    assert scan_cache.get_cache_status()['views'] == 2
+
+    scan_cache.update_cache('folder', _result())
+    asyncio.run(scan_cache.get_view('summary', 'folder', scan, derive))
+    assert len(scans) == 1
+    assert len(derivations) == 3
+
+    scan_cache.invalidate_cache('folder')
+    assert scan_cache.get_cache_status()['views'] == 0
+
+def test_lookups_and_scans_are_counted(client, scan_cache):
+    """Serving lookups, view derivations and scan times show up on the status and metrics endpoints"""
+    scan_cache.metrics = CacheMetrics()
+
+    async def scan():
+        return _result()
+
+    async def run():
+        await scan_cache.get_or_scan("folder", scan)
+        await scan_cache.get_or_scan("folder", scan)
+        await scan_cache.get_view('summary', 'folder', scan, lambda result: {'total_files': 1})
+
+    asyncio.run(run())
+    scan_cache.get_cached_result("folder")
+    metrics = client.get("/api/v1/cache/status").json()['metrics']
+    assert (metrics['scan']['hits'], metrics['scan']['misses']) == (2, 1)
+    assert metrics['scan']['scan_seconds']['count'] == 1
+    assert metrics['scan']['bytes'] > 0
+    assert metrics['summary']['misses'] == 1
+
+    response = client.get("/api/v1/cache/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'scan_cache_lookups_total{namespace="scan",result="hit"} 2' in response.text
+
+def test_unloads_are_not_counted_as_evictions(tmp_path):
+    """Dropping a loaded SQLite entry from memory is an unload; the memory backend's drops are evictions"""
+    reasons = []
+    for kind in ("sqlite", "memory"):
+        backend = create_cache_backend(kind, str(tmp_path / "scan_cache.db"), max_bytes=150,
+                                       on_evict=lambda key, reason: reasons.append((kind, key, reason)))
+        for target_id in ("a", "b"):
+            backend.set(target_id, {'last_scan': datetime.utcnow(), 'data': {}, 'version': 1, 'size': 100})
+    assert reasons == [("sqlite", "a", "unload"), ("memory", "a", "lru")]
+
+def test_invalid_page_cursor_is_a_bad_request(client, scan_cache):
+    """Negative or non-numeric cursors are rejected with a 400 instead of paging from the end"""
+    scan_cache.update_cache("folder", _result())
+    url = "/api/v1/drive/directories/folder/analyze/files?age_group=moreThanThreeYears&section=file_types&key=documents"
+    assert client.get(url).status_code == 200
+    assert client.get(url + "&cursor=-5").status_code == 400
+    assert client.get(url + "&cursor=x").status_code == 400
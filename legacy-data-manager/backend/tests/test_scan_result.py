@@ -0,0 +1,131 @@
+import pytest
+from pathlib import Path
+import sys
+import json
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.scan_result import ScanAggregates, ScanResult, render_result
+
+FILE_TYPES = ["documents", "others"]
+CATEGORIES = ["pii", "financial"]
+
+def _drive_result():
+    result = ScanResult(FILE_TYPES, CATEGORIES)
+    row = result.add_file("lessThanOneYear", "documents", "f1", "budget.docx", "application/msword", "2025-01-01T00:00:00.000Z")
+    result.add_findings("lessThanOneYear", row, {"financial": ["budget", "cost"]})
+    result.add_file("oneToThreeYears", "documents", "f2", "budget copy.docx", "application/msword", "2024-01-01T00:00:00.000Z")
+    result.add_duplicates("md5", [("lessThanOneYear", "f1"), ("oneToThreeYears", "f2")])
+    result.total_files = 2
+    return result
+
+def test_drive_result_renders_scan_shape():
+    """Drive files render as file dicts wherever they are referenced"""
+    data = _drive_result().to_dict()
+    file_ref = {"id": "f1", "name": "budget.docx", "mimeType": "application/msword", "modifiedTime": "2025-01-01T00:00:00.000Z"}
+    assert data["lessThanOneYear"]["file_types"]["documents"] == [file_ref]
+    assert data["lessThanOneYear"]["sensitive_info"]["financial"] == [{
+        "file": file_ref,
+        "confidence": 0.8,
+        "explanation": "Found budget, cost",
+        "categories": ["budget", "cost"]
+    }]
+    assert data["oneToThreeYears"]["duplicate_files"][0]["duplicate_of"] == "f1"
+    assert data["content_hashes"] == {"md5": ["f1", "f2"]}
+    assert data["total_sensitive_files"] == 1
+    assert data["total_duplicates"] == 1
+
+def test_result_reads_like_a_dict():
+    """Keys can be read without rendering the whole result"""
+    result = _drive_result()
+    assert result["total_files"] == 2
+    assert result.get("missing") is None
+    assert list(result)[:3] == ["moreThanThreeYears", "oneToThreeYears", "lessThanOneYear"]
+    assert render_result(result) == result.to_dict()
+    assert render_result({"plain": "dict"}) == {"plain": "dict"}
+
+def test_files_are_stored_once():
+    """A file referenced from several categories has one row in the file table"""
+    result = _drive_result()
+    assert len(result.files) == 2
+
+def test_local_result_and_merge():
+    """Local files render as paths and partial results merge with remapped rows"""
+    result = ScanResult(FILE_TYPES, CATEGORIES)
+    result.add_file("lessThanOneYear", "documents", "/data/a.txt")
+    partial = ScanResult(FILE_TYPES, CATEGORIES)
+    row = partial.add_file("lessThanOneYear", "documents", "/data/b.txt")
+    partial.add_findings("lessThanOneYear", row, {"pii": ["ssn"]})
+    partial.processed_files = 1
+
+    result.merge(partial)
+    bucket = result["lessThanOneYear"]
+    assert bucket["file_types"]["documents"] == ["/data/a.txt", "/data/b.txt"]
+    assert bucket["sensitive_info"]["pii"] == ["ssn"]
+    assert result["processed_files"] == 1
+    assert result["total_sensitive_files"] == 1
+
+def test_aggregates_track_the_scan():
+    """Aggregates are kept up to date as files are added"""
+    aggregates = _drive_result().aggregates
+    assert aggregates.total_documents == 2
+    assert aggregates.by_type == {"documents": 2}
+    assert aggregates.by_age == {"lessThanOneYear": 1, "oneToThreeYears": 1}
+    assert aggregates.by_sensitivity == {"financial": 1}
+    assert aggregates.sensitive_files == 1
+    assert aggregates.duplicate_files == 1
+
+def test_aggregates_merge_across_folders():
+    """Aggregates from several folders combine into one set of totals"""
+    first = ScanResult(FILE_TYPES, CATEGORIES)
+    first.add_file("lessThanOneYear", "documents", "/a/one.txt", size=10)
+    second = ScanResult(FILE_TYPES, CATEGORIES)
+    row = second.add_file("moreThanThreeYears", "others", "/b/two.bin", size=32)
+    second.add_findings("moreThanThreeYears", row, {"pii": ["ssn"], "financial": []})
+
+    combined = ScanAggregates.combine([first.aggregates, second.aggregates])
+    assert combined.total_size == 42
+    assert combined.size_by_age == {"lessThanOneYear": 10, "moreThanThreeYears": 32}
+    assert combined.by_sensitivity == {"pii": 1}
+
+    first.merge(second)
+    assert first["aggregates"] == combined.to_dict()
+
+def test_summary_has_counts_only():
+    """The summary replaces every file list with its length"""
+    summary = _drive_result().summary()
+    assert summary["lessThanOneYear"]["file_types"] == {"documents": 1, "others": 0}
+    assert summary["lessThanOneYear"]["sensitive_info"]["financial"] == 1
+    assert summary["oneToThreeYears"]["duplicate_files"] == 1
+    assert summary["total_files"] == 2
+
+def test_page_through_a_file_list():
+    """Cursors walk a per-bucket list page by page"""
+    result = ScanResult(FILE_TYPES, CATEGORIES)
+    for i in range(5):
+        result.add_file("lessThanOneYear", "documents", f"/data/{i}.txt")
+    first = result.page("lessThanOneYear", "file_types", "documents", limit=2)
+    assert first["items"] == ["/data/0.txt", "/data/1.txt"]
+    assert first["total"] == 5
+    last = result.page("lessThanOneYear", "file_types", "documents", cursor="4", limit=2)
+    assert last["items"] == ["/data/4.txt"]
+    assert last["next_cursor"] is None
+    with pytest.raises(ValueError):
+        result.page("lessThanOneYear", "file_types", "missing")
+    for cursor in ("-2", "abc", "+1", " 1"):
+        with pytest.raises(ValueError):
+            result.page("lessThanOneYear", "file_types", "documents", cursor=cursor)
+
+def test_ndjson_rebuilds_the_full_result():
+    """The NDJSON lines carry the same lists as the full rendering"""
+    result = _drive_result()
+    lines = [json.loads(line) for line in result.iter_ndjson(chunk_size=1)]
+    assert lines[0]["type"] == "summary"
+    assert lines[-1] == {"type": "end"}
+    data = result.to_dict()
+    for line in lines:
+        if line["type"] == "items" and line["section"] == "file_types":
+            assert line["items"][0] in data[line["age_group"]]["file_types"][line["key"]]
+    assert {"type": "content_hashes", "content_hashes": {"md5": ["f1", "f2"]}} in lines